@@ -1,10 +1,14 @@
 import os
 import json_repair
 import json
+import threading
 from datetime import datetime
-from openai import OpenAI
-from langchain.chains import RetrievalQA
-from core.utils.func_build_tools import build_tools_from_functions, get_args_in_order
+from core.utils.tool_registry import ToolRegistry
+from core.utils.tool_scheduler import ToolScheduler
+from core.utils.json_stream_parser import JsonMapStreamParser
+from core.utils.tracing import span
+from core.memory_tools.conversation_memory import ConversationMemory
+from core.memory_tools.semantic_cache import SemanticQueryCache
 
 from core.config.project_root_provider import ProjectRootProvider
 from core.db_tools.vector_db_provider import VectorDBProvider
@@ -18,7 +22,12 @@ class BaseAgent:
             vector_db_provider: VectorDBProvider, 
             llm_chat_provider: LLMChatProvider, 
             llm_chat_completion_provider: LLMChatCompletionProvider, 
-            agent_name: str
+            agent_name: str,
+            tool_scheduler: ToolScheduler = None,
+            memory: ConversationMemory = None,
+            query_cache: SemanticQueryCache = None,
+            tool_mode: str = "prompt",
+            model_roles: dict = None
         ):
         self.agent_name = agent_name
         # Load agent-specific configuration
@@ -27,19 +36,15 @@ class BaseAgent:
         # LLMs
         self.llm_chat_provider = llm_chat_provider
         self.llm_chat_completion_provider = llm_chat_completion_provider
-        self.llm = self.llm_chat_provider.get_chat_llm()
-        self.client = self.llm_chat_completion_provider.get_client()
 
-        # Vector DB
+        # Vector DB, retriever and RetrievalQA chain, see load_rag()
         self.vector_db_provider = vector_db_provider
-        self.db, self.retriever = self.vector_db_provider.load_or_create()
-
-        # RetrievalQA chain
-        self.qa = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            retriever=self.retriever,
-            return_source_documents=True,
-        )
+        self.rag_db = None
+        self.rag_retriever = None
+        self.qa_chain = None
+        self.rag_lock = threading.Lock()
+        # Optional semantic answer cache for query_rag
+        self.query_cache = query_cache
 
         # Tools
         self.tools = [
@@ -51,9 +56,33 @@ class BaseAgent:
             self.add_nums,
             self.query_rag,
         ]
-        self.func_descriptions, self.func_lookup = build_tools_from_functions(self.tools)
+        # Schemas and argument binders are compiled once, see ToolRegistry
+        self.tool_registry = ToolRegistry(self.tools)
+        self.func_descriptions = self.tool_registry.descriptions()
+        self.func_lookup = self.tool_registry.lookup()
+        self.tool_scheduler = tool_scheduler
+        # "prompt": tools are listed in the system prompt and parsed from the reply text
+        # "native": tools are sent as OpenAI-style `tools` and read from `tool_calls`
+        self.tool_mode = tool_mode
+
+        # Per-role models from llm.roles (None = the provider's configured model):
+        # router for routing turns, generator for generate() and escalated turns,
+        # rag for RetrievalQA answers
+        model_roles = model_roles or {}
+        self.router_model = model_roles.get("router")
+        self.generator_model = model_roles.get("generator")
+        self.rag_model = model_roles.get("rag")
+        self.escalate = (
+            model_roles.get("escalate", True)
+            and self.generator_model is not None
+            and self.generator_model != self.router_model
+        )
 
         self.messages=[]
+        # Tool calls may run concurrently, guard shared conversation history
+        self.messages_lock = threading.Lock()
+        # Optional token budget for the history sent with each request
+        self.memory = memory
         self.instruct_message_base = [
             {"role": "system", "content": f"""
             You are a friendly and patient AI agent that always responds in valid JSON.
@@ -79,6 +108,16 @@ class BaseAgent:
             CONVERSATION: This is a sample message!
             """},
         ]
+        self.native_message_base = [
+            {"role": "system", "content": """
+            You are a friendly and patient AI agent. Your sole job is to route requests
+            to the provided tools. Call as many tools as the request needs, and only call
+            tools from the provided list. Do not generate a false tool call.
+
+            However, if the user's intent is a conversation, do not call a tool; simply
+            reply to the user in a friendly manner.
+            """},
+        ]
         self.generative_message_base=[
             {"role": "system", "content": f"""
             You generate codes and documents. Respond only with the generated content.
@@ -96,8 +135,7 @@ class BaseAgent:
         """
 
         dir_path = os.path.join(self.root_dir, relative_path)
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path)
+        os.makedirs(dir_path, exist_ok=True)
             
     def get_weather(self, city: str, country: str) -> str:
         """Return the current weather for a city and country."""
@@ -131,14 +169,29 @@ class BaseAgent:
         Query the existing RAG (Retrieval-Augmented Generation) system for an answer.
         Use this tool when the user asks a question related to the local documents.
         """
-        response = self.qa.invoke({"query": query})
+        # Make sure queued document writes are visible to retrieval
+        self.vector_db_provider.flush()
+
+        response, ticket = None, None
+        if self.query_cache is not None and self.query_cache.enabled:
+            # Identifier lookups skip the embedding call in retrieval, so the cache must too
+            exact = self.retriever.takes_fast_path(query)
+            response, ticket = self.query_cache.lookup(query, exact=exact)
+        if response is None:
+            response = self.qa.invoke({"query": query})
+            if ticket is not None:
+                self.query_cache.store(ticket, response)
         
+        citations = "\n        ".join(
+            f"- {doc.metadata.get('citation', doc.metadata.get('source'))}"
+            for doc in response["source_documents"]
+        )
         return f"""
         this is what I found out about your request: 
         {response["result"]}
 
-        Supporting Documents:
-        {response["source_documents"]}
+        Sources:
+        {citations or "- none"}
         """
 
     def read_file(self, filename):
@@ -184,6 +237,9 @@ class BaseAgent:
         with open(file_path, "w") as f:
             f.write(result)
         
+        # Queued right away even when the background indexer is watching: a query_rag
+        # right after this must see the new content, and the watcher's later event for
+        # the same write is skipped once the manifest matches
         self.vector_db_provider.upsert_file(file_path=file_path)
 
         print(f"Modified and saved code output to {file_path}")
@@ -211,58 +267,287 @@ class BaseAgent:
     def generate_assistant(self, content):
         return {"role": "assistant", "content": content}
 
+    # RAG components are built on first use: most sessions never call query_rag,
+    # and langchain/Chroma are slow to import and open
+    @property
+    def llm(self):
+        return self.llm_chat_provider.get_chat_llm(self.rag_model)
+
+    @property
+    def client(self):
+        return self.llm_chat_completion_provider.get_client()
+
+    @property
+    def db(self):
+        self.load_rag()
+        return self.rag_db
+
+    @property
+    def retriever(self):
+        self.load_rag()
+        return self.rag_retriever
+
+    @property
+    def qa(self):
+        self.load_rag()
+        return self.qa_chain
+
+    def load_rag(self):
+        with self.rag_lock:
+            if self.qa_chain is not None:
+                return
+            from langchain.chains import RetrievalQA
+            from langchain.prompts import PromptTemplate
+            self.rag_db, self.rag_retriever = self.vector_db_provider.load_or_create()
+            # RetrievalQA chain, each context block is labelled with its citation
+            self.qa_chain = RetrievalQA.from_chain_type(
+                llm=self.llm,
+                retriever=self.rag_retriever,
+                return_source_documents=True,
+                chain_type_kwargs={
+                    "document_prompt": PromptTemplate.from_template("[{citation}]\n{page_content}"),
+                },
+            )
+
     def generate_query(self, content):
         return {"role": "user", "content": content}
 
     def generate(self, user_query):
-        self.messages.append(self.generate_query(user_query))
-        resp = self.llm_chat_completion_provider.chat_completion(self.generative_message_base + self.messages)
+        query = self.generate_query(user_query)
+        history = self.history()
+        resp = self.llm_chat_completion_provider.chat_completion(
+            self.generative_message_base + history + [query],
+            model=self.generator_model,
+        )
 
         content = resp.choices[0].message.content
-        self.messages.append(self.generate_assistant(content))
+        with self.messages_lock:
+            self.messages.append(query)
+            self.messages.append(self.generate_assistant(content))
         return content
+
+    def history(self):
+        """Conversation history to send, trimmed to the memory budget when configured."""
+        with self.messages_lock:
+            if self.memory is None:
+                return list(self.messages)
+            # The agent owns its history, so dropped messages are pruned for good
+            return self.memory.window(self.messages, prune=True)
+
+    def call_tool(self, tool, arguments):
+        compiled = self.tool_registry[tool]
+        with span(f"tool.{tool}"):
+            return compiled(arguments)
+
+    def run_calls(self, calls):
+        if self.tool_scheduler is None:
+            return [self.call_tool(tool, arguments) for tool, arguments in calls]
+        return self.tool_scheduler.run(calls, self.call_tool)
     
     def run(self, user_query):
-        self.messages.append(self.generate_query(user_query))
+        with span("agent_run", agent=self.agent_name):
+            route = self.route_native if self.tool_mode == "native" else self.route
+            return self.cascade(user_query, route)
 
-        resp = self.llm_chat_completion_provider.chat_completion(self.instruct_message_base + self.messages)
+    def run_native(self, user_query, on_conversation=None):
+        """
+        `run` with native function calling: the compiled tool definitions are sent
+        as `tools` and calls are read from the response's `tool_calls`, so no JSON
+        has to be recovered from free text. A reply without tool calls is a conversation.
+        """
+        results, success = self.cascade(user_query, self.route_native)
+        # Reply text (conversation or failure) goes to on_conversation in one piece
+        if not success and on_conversation:
+            on_conversation(results[0])
+        return results, success
 
-        self.messages.append(self.generate_assistant(resp.choices[0].message.content))
+    def cascade(self, user_query, route):
+        """
+        Route the turn on the router model. If its reply cannot be parsed, names an
+        unknown tool or has unusable arguments, the same turn is retried once on the
+        generator model (when one is configured and differs).
+        """
+        query = self.generate_query(user_query)
+        self.messages.append(query)
+
+        results, calls, usable = route(self.router_model)
+        if not usable and self.escalate:
+            # Drop the router's unusable reply before asking the larger model. Routing may
+            # have pruned older messages, so the query is found by identity, not by index
+            with self.messages_lock:
+                position = next((i + 1 for i, m in enumerate(self.messages) if m is query), 0)
+                del self.messages[position:]
+            with span("router_escalation", model=self.generator_model):
+                results, calls, usable = route(self.generator_model)
+        if calls is None:
+            return results, False
+
+        try:
+            return self.run_calls(calls), True
+        except Exception as e:
+            # print(f"Exception!: {e}")
+            return (results if results is not None else [f"Tool call failed: {e}"]), False
+
+    def check_calls(self, calls):
+        """Bind every call's arguments up front; raises on an unknown tool or bad arguments."""
+        for tool, arguments in calls:
+            self.tool_registry[tool].bind(arguments)
+
+    def route(self, model):
+        """
+        One routing request in prompt mode. Returns (results, calls, usable):
+        `calls` is the list of (tool, arguments) to run, or None for a conversation
+        reply or unparsable output, in which case `results` is the answer. `usable`
+        is False when the reply warrants escalation.
+        """
+        resp = self.llm_chat_completion_provider.chat_completion(self.instruct_message_base + self.history(), model=model)
+        content = resp.choices[0].message.content
+
+        self.messages.append(self.generate_assistant(content))
 
         header = "CONVERSATION:"
 
-        if len(resp.choices[0].message.content) >= len(header) and resp.choices[0].message.content[:len(header)] == header:
-            return [resp.choices[0].message.content[len(header):]], False
-        else:
-            tool_calls = self.extract_root_json_maps(resp.choices[0].message.content)
-            # quit()
-            # print(tool_calls)
-            try:
-                results = []
+        if len(content) >= len(header) and content[:len(header)] == header:
+            return [content[len(header):]], None, True
+        # quit()
+        # print(tool_calls)
+        try:
+            calls = []
+            with span("json_extraction"):
+                tool_calls = self.extract_root_json_maps(content)
                 for call in tool_calls:
                     json_object = json_repair.loads(call)
                     self.messages.append(self.generate_assistant(call))
-                    result = self.func_lookup[json_object["tool"]](*get_args_in_order(self.func_lookup[json_object["tool"]], json_object["arguments"]))
-                    results.append(result)
-                return results, True
-            except Exception as e:
-                # print(f"Exception!: {e}")
-                return [resp.choices[0].message.content], False
+                    calls.append((json_object["tool"], json_object["arguments"]))
+            self.check_calls(calls)
+        except Exception as e:
+            return [content], None, False
+        return [content], calls, bool(calls)
+
+    def route_native(self, model):
+        """One routing request with native function calling, see route()."""
+        resp = self.llm_chat_completion_provider.chat_completion(
+            self.native_message_base + self.history(),
+            tools=self.tool_registry.definitions(),
+            model=model,
+        )
+        message = resp.choices[0].message
+
+        if not message.tool_calls:
+            content = message.content or ""
+            self.messages.append(self.generate_assistant(content))
+            header = "CONVERSATION:"
+            if content[:len(header)] == header:
+                content = content[len(header):]
+            return [content], None, True
+
+        try:
+            calls = []
+            with span("json_extraction"):
+                for tool_call in message.tool_calls:
+                    tool = tool_call.function.name
+                    arguments = json_repair.loads(tool_call.function.arguments or "{}")
+                    # History stays plain text, in the same form prompt mode records
+                    self.messages.append(self.generate_assistant(json.dumps({"tool": tool, "arguments": arguments})))
+                    calls.append((tool, arguments))
+            self.check_calls(calls)
+        except Exception as e:
+            return [f"Tool call failed: {e}"], None, False
+        return None, calls, True
     
+    def run_stream(self, user_query, on_conversation=None):
+        """
+        Streaming variant of `run`. Each tool call is dispatched as soon as its JSON map
+        is complete, and a conversation reply is passed to `on_conversation` piece by
+        piece as it is generated. Returns the same (results, success) pair as `run`.
+        """
+        with span("agent_run", agent=self.agent_name, stream=True):
+            if self.tool_mode == "native":
+                # Tool calls arrive whole with the final response, so nothing to stream early
+                return self.run_native(user_query, on_conversation)
+            return self._run_stream(user_query, on_conversation)
+
+    def _run_stream(self, user_query, on_conversation=None):
+        query = self.generate_query(user_query)
+        with self.messages_lock:
+            self.messages.append(query)
+        history = self.history()
+
+        header = "CONVERSATION:"
+        parser = JsonMapStreamParser()
+        batch = None if self.tool_scheduler is None else self.tool_scheduler.start(self.call_tool)
+        results = []
+        pieces = []
+        is_conversation = None
+        failed = False
+
+        def dispatch(text):
+            with span("json_extraction"):
+                calls = parser.feed(text)
+            for call in calls:
+                json_object = json_repair.loads(call)
+                tool, arguments = json_object["tool"], json_object["arguments"]
+                with self.messages_lock:
+                    self.messages.append(self.generate_assistant(call))
+                if batch is None:
+                    results.append(self.call_tool(tool, arguments))
+                else:
+                    batch.submit(tool, arguments)
+
+        # Streamed turns use the router model; tools may already run before the reply ends,
+        # so they are not escalated
+        stream = self.llm_chat_completion_provider.stream_chat_completion(self.instruct_message_base + history, model=self.router_model)
+        try:
+            for delta in stream:
+                pieces.append(delta)
+                if is_conversation is None:
+                    content = "".join(pieces)
+                    if len(content) < len(header) and header.startswith(content):
+                        continue
+                    is_conversation = content[:len(header)] == header
+                    delta = content[len(header):] if is_conversation else content
+
+                if is_conversation:
+                    if on_conversation and delta:
+                        on_conversation(delta)
+                elif not failed:
+                    try:
+                        dispatch(delta)
+                    except Exception as e:
+                        failed = True
+        except BaseException:
+            # Calls dispatched before the failure still finish before the error reaches the caller
+            if batch is not None:
+                batch.join()
+            raise
+        finally:
+            # Release the stream (and its rate-limiter slot) even if a callback raised
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        content = "".join(pieces)
+        with self.messages_lock:
+            # Keep the full response right after its query, like run() does
+            position = next((i + 1 for i, m in enumerate(self.messages) if m is query), 0)
+            self.messages.insert(position, self.generate_assistant(content))
+
+        if is_conversation:
+            return [content[len(header):]], False
+        if is_conversation is None:
+            try:
+                dispatch(content)
+            except Exception as e:
+                failed = True
+
+        try:
+            if batch is not None:
+                results = batch.results()
+            if failed:
+                return [content], False
+            return results, True
+        except Exception as e:
+            return [content], False
+
     def extract_root_json_maps(self, text: str):
-        maps = []
-        depth = 0
-        start = None
-
-        for i, ch in enumerate(text):
-            if ch == '{':
-                if depth == 0:
-                    start = i
-                depth += 1
-            elif ch == '}':
-                depth -= 1
-                if depth == 0 and start is not None:
-                    maps.append(text[start:i+1])
-                    start = None
-
-        return maps
+        return JsonMapStreamParser().feed(text)
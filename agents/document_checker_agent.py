@@ -2,15 +2,44 @@ import os
 import json_repair
 import json
 from datetime import datetime
-from openai import OpenAI
-from langchain.chains import RetrievalQA
+import threading
 from core.utils.func_build_tools import build_tools_from_functions, get_args_in_order
+from core.utils.tracing import span
+from core.utils.json_output import extract_json_object
 
 from core.config.project_root_provider import ProjectRootProvider
 from core.db_tools.vector_db_provider import VectorDBProvider
 from core.llm_tools.llm_chat_provider import LLMChatProvider
 from core.llm_tools.llm_chat_completion_provider import LLMChatCompletionProvider
 
+# JSON schema of a check result, sent as `response_format` when the backend supports it
+CHECK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdict": {"type": "boolean"},
+        "suggested_edit": {"type": "string"},
+    },
+    "required": ["verdict", "suggested_edit"],
+    "additionalProperties": False,
+}
+
+class CheckOutputError(ValueError):
+    """The model's reply could not be turned into a check result, even after repair."""
+
+def parse_check_result(text: str):
+    """Tolerant parse of a checker reply into {"verdict": bool, "suggested_edit": str}."""
+    value = extract_json_object(text)
+    verdict = value.get("verdict")
+    if isinstance(verdict, str) and verdict.strip().lower() in ("true", "false"):
+        verdict = verdict.strip().lower() == "true"
+    if not isinstance(verdict, bool):
+        raise ValueError(f"'verdict' must be true or false, got {verdict!r}")
+    suggested_edit = value.get("suggested_edit") or ""
+    if not isinstance(suggested_edit, str):
+        raise ValueError("'suggested_edit' must be a string")
+    return {"verdict": verdict, "suggested_edit": suggested_edit}
+
+
 class DocumentCheckerAgent:
     def __init__(
             self, 
@@ -18,7 +47,8 @@ class DocumentCheckerAgent:
             vector_db_provider: VectorDBProvider, 
             llm_chat_provider: LLMChatProvider, 
             llm_chat_completion_provider: LLMChatCompletionProvider, 
-            agent_name: str
+            agent_name: str,
+            output_conf: dict = None
         ):
         self.agent_name = agent_name
         # Load agent-specific configuration
@@ -27,19 +57,19 @@ class DocumentCheckerAgent:
         # LLMs
         self.llm_chat_provider = llm_chat_provider
         self.llm_chat_completion_provider = llm_chat_completion_provider
-        self.llm = self.llm_chat_provider.get_chat_llm()
-        self.client = self.llm_chat_completion_provider.get_client()
 
-        # Vector DB
+        # Vector DB, retriever and RetrievalQA chain, see load_rag()
         self.vector_db_provider = vector_db_provider
-        self.db, self.retriever = self.vector_db_provider.load_or_create()
-
-        # RetrievalQA chain
-        self.qa = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            retriever=self.retriever,
-            return_source_documents=True,
-        )
+        self.rag_db = None
+        self.rag_retriever = None
+        self.qa_chain = None
+        self.rag_lock = threading.Lock()
+
+        # Structured output, see check(). response_format is "json_schema",
+        # "json_object" or "none"; it falls back to "none" if the backend rejects it
+        output_conf = output_conf or {}
+        self.response_format_mode = output_conf.get("response_format", "json_schema")
+        self.repair_retries = output_conf.get("repair_retries", 1)
         
         self.messages=[]
         self.instruct_message_base = [
@@ -93,19 +123,117 @@ class DocumentCheckerAgent:
             {{"verdict": false, "suggested_edit": "We're going to a picnic. It'll be fun!"}}
             """},
         ]
+        self.repair_message_base = [
+            {"role": "system", "content": """
+            The user message is a malformed reply to a document check. Rewrite it as
+            exactly one JSON object: {"verdict": true or false, "suggested_edit": "..."}.
+            Keep the verdict and edit it contains. Output only the JSON object.
+            """},
+        ]
     
+    # RAG components are built on first use: most sessions never call query_rag,
+    # and langchain/Chroma are slow to import and open
+    @property
+    def llm(self):
+        return self.llm_chat_provider.get_chat_llm()
+
+    @property
+    def client(self):
+        return self.llm_chat_completion_provider.get_client()
+
+    @property
+    def db(self):
+        self.load_rag()
+        return self.rag_db
+
+    @property
+    def retriever(self):
+        self.load_rag()
+        return self.rag_retriever
+
+    @property
+    def qa(self):
+        self.load_rag()
+        return self.qa_chain
+
+    def load_rag(self):
+        with self.rag_lock:
+            if self.qa_chain is not None:
+                return
+            from langchain.chains import RetrievalQA
+            self.rag_db, self.rag_retriever = self.vector_db_provider.load_or_create()
+            # RetrievalQA chain
+            self.qa_chain = RetrievalQA.from_chain_type(
+                llm=self.llm,
+                retriever=self.rag_retriever,
+                return_source_documents=True,
+            )
+
     def generate_query(self, content):
         return {"role": "user", "content": content}
     
     def run(self, user_query):
         self.messages.append(self.generate_query(user_query))
 
-        resp = self.llm_chat_completion_provider.chat_completion(self.instruct_message_base + self.messages)
+        with span("checker_run", agent=self.agent_name, chars=len(user_query)):
+            resp = self.complete(self.instruct_message_base + self.messages)
 
         self.messages.pop()
 
         return resp.choices[0].message.content
 
+    def check(self, user_query):
+        """
+        Run the check and return the parsed result. A malformed reply is sent back
+        alone for reformatting (up to `repair_retries` times) instead of re-checking
+        the whole document. Raises CheckOutputError if it still cannot be parsed.
+        """
+        raw = self.run(user_query)
+        for attempt in range(self.repair_retries + 1):
+            try:
+                with span("json_extraction"):
+                    return parse_check_result(raw)
+            except ValueError as e:
+                error = e
+            if attempt < self.repair_retries:
+                raw = self.repair(raw, error)
+        raise CheckOutputError(f"Unparsable checker output after {self.repair_retries} repair attempts: {error}")
+
+    def repair(self, raw, error):
+        messages = self.repair_message_base + [self.generate_query(f"Problem: {error}\n\nReply:\n{raw}")]
+        with span("output_repair", agent=self.agent_name):
+            resp = self.complete(messages)
+        return resp.choices[0].message.content or ""
+
+    def response_format(self):
+        if self.response_format_mode == "json_schema":
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": "check_response", "strict": True, "schema": CHECK_SCHEMA},
+            }
+        if self.response_format_mode == "json_object":
+            return {"type": "json_object"}
+        return None
+
+    def complete(self, messages):
+        """Chat completion constrained to the check schema when the backend accepts it."""
+        response_format = self.response_format()
+        if response_format is not None:
+            try:
+                return self.llm_chat_completion_provider.chat_completion(messages, response_format=response_format)
+            except Exception as e:
+                # Only a 400/422 about response_format means the backend does not
+                # support it; others (e.g. context length) would fail without it too
+                if getattr(e, "status_code", None) not in (400, 422) or not self.rejects_response_format(e):
+                    raise
+                print(f"[DocumentCheckerAgent] response_format {self.response_format_mode} rejected, using plain output")
+                self.response_format_mode = "none"
+        return self.llm_chat_completion_provider.chat_completion(messages)
+
+    def rejects_response_format(self, error):
+        detail = f"{error} {getattr(error, 'body', '') or ''}".lower()
+        return any(term in detail for term in ("response_format", "response format", "json_schema"))
+
     
     def extract_root_json_maps(self, text: str):
         maps = []
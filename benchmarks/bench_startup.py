@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark: import time of the agent modules and time to a first agent.
+
+Each case runs in a fresh interpreter (so nothing is already imported) with a
+temporary working directory, and the median of `--runs` is reported as JSON.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --max factory_import=0.5 --max first_agent=1.0
+
+With `--max name=seconds`, the script exits with status 1 when a case is slower.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "base_agent_import": "import agents.base_agent",
+    "factory_import": "import core.factory.agent_factory",
+    "first_agent": (
+        "from core.factory.agent_factory import AgentFactory\n"
+        "AgentFactory().create_base_agent('local_test_agent')"
+    ),
+    "docs_service_import": "import main_docs_service",
+}
+
+TIMER = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+def run_case(code: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as cwd:
+            result = subprocess.run(
+                [sys.executable, "-c", TIMER.format(root=REPO_ROOT, code=code)],
+                cwd=cwd,
+                capture_output=True,
+                text=True,
+            )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="Run only these cases")
+    parser.add_argument("--max", action="append", default=[], metavar="NAME=SECONDS", help="Fail if slower")
+    args = parser.parse_args()
+
+    limits = {}
+    for item in args.max:
+        name, seconds = item.split("=", 1)
+        limits[name] = float(seconds)
+
+    results = {}
+    for name in args.case or CASES:
+        results[name] = round(run_case(CASES[name], args.runs), 4)
+    print(json.dumps(results, indent=2))
+
+    slow = [name for name, limit in limits.items() if results.get(name, 0.0) > limit]
+    for name in slow:
+        print(f"[bench_startup] {name}: {results[name]:.3f}s > {limits[name]:.3f}s", file=sys.stderr)
+    return 1 if slow else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""
+Offline micro-benchmarks for the agent and indexing hot paths.
+
+Every LLM and embedding call goes to the stubs in benchmarks/stubs.py, so the
+suite needs no network or model server. By default backend latency is 0 and
+the numbers are pure framework overhead; `--llm-latency` / `--embed-latency`
+add a fixed delay per call.
+
+    python benchmarks/run_benchmarks.py                      # run, compare with baseline.json
+    python benchmarks/run_benchmarks.py --case agent_run_sequential
+    python benchmarks/run_benchmarks.py --save-baseline      # record a new baseline
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --check              # exit 1 on a regression
+
+Each case reports `seconds` (best time per operation over `--repeat` rounds)
+and, where it makes sense, a throughput `rate` in `unit`. A fixed pure-Python
+workload is timed between the rounds as `calibration`, and cases are compared
+with the baseline by `seconds / calibration`, so a slower or busier machine
+does not read as a regression. A case regresses when that ratio
+exceeds the baseline's by more than its threshold (the baseline's per-case
+`thresholds`, else `--threshold`). Cases that write to disk (upsert_file,
+build, ingest_pipeline) are only partly normalized by the CPU-bound
+calibration, so their thresholds are wider.
+
+Timings still vary with load, so the comparison is a local check: it is
+reported, and only fails the script (exit status 1) with `--check`.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from stubs import (
+    StubChatCompletionProvider,
+    StubEmbeddings,
+    StubEmbeddingProvider,
+    StubProjectRootProvider,
+    StubSettings,
+)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+CASES = {}
+
+def case(func):
+    CASES[func.__name__] = func
+    return func
+
+CALIBRATION_DATA = [{"id": i, "name": f"item_{i}", "tags": ["a", "b", "c"]} for i in range(2000)]
+CALIBRATION_PATTERN = re.compile(r"item_(\d+)")
+calibration_timings = []  # rounds of the current case's calibration workload
+
+def calibration_work():
+    """A fixed JSON, regex and dict workload that case timings are normalized by."""
+    text = json.dumps(CALIBRATION_DATA)
+    counts = {}
+    for item in json.loads(text):
+        counts[item["name"]] = len(item["tags"])
+    return sum(int(match.group(1)) for match in CALIBRATION_PATTERN.finditer(text))
+
+def measure(func, repeat, number=1, setup=None):
+    """
+    Best seconds per call of `func` over `repeat` rounds of `number` calls.
+    The fastest round is the one least disturbed by other load. A calibration
+    round runs before each round, so both see the same machine conditions.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        calibration_work()
+        calibration_timings.append(time.perf_counter() - start)
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+def result(seconds, items=None, unit=None):
+    report = {"seconds": seconds}
+    if items is not None:
+        report["rate"] = items / seconds if seconds else 0.0
+        report["unit"] = unit
+    return report
+
+# Sample data
+WORDS = (
+    "agent vector chunk embedding retriever provider settings document "
+    "query index manifest splitter loader tool schedule memory cache"
+).split()
+
+def sample_text(rng, n_chars):
+    lines = []
+    size = 0
+    while size < n_chars:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+        if rng.random() < 0.1:
+            line += "\n"
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+def tool_call_response(n_calls, content_chars=0):
+    calls = []
+    for i in range(n_calls):
+        if content_chars:
+            arguments = {"filename": f"docs/file_{i}.md", "content": "x" * content_chars}
+            calls.append(json.dumps({"tool": "create_document", "arguments": arguments}))
+        else:
+            calls.append(json.dumps({"tool": "add_nums", "arguments": {"a": str(i), "b": "1"}}))
+    return ",\n".join(calls)
+
+def write_tree(root, n_files, file_chars, seed=0):
+    rng = random.Random(seed)
+    for i in range(n_files):
+        directory = os.path.join(root, f"dir_{i % 10}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file_{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(sample_text(rng, file_chars))
+    return [
+        os.path.join(dirpath, name)
+        for dirpath, _, names in os.walk(root) for name in sorted(names)
+    ]
+
+# Agent dispatch
+def make_agent(work_dir, response, latency, scheduled):
+    from agents.base_agent import BaseAgent
+    from core.utils.tool_scheduler import ToolScheduler
+    settings = StubSettings(work_dir)
+    return BaseAgent(
+        StubProjectRootProvider(os.path.join(work_dir, "project")),
+        None,
+        None,
+        StubChatCompletionProvider(response, latency=latency),
+        "bench_agent",
+        tool_scheduler=ToolScheduler(settings, "bench_agent") if scheduled else None,
+    )
+
+def bench_agent_run(args, work_dir, scheduled):
+    n_calls = 20
+    agent = make_agent(work_dir, tool_call_response(n_calls), args.llm_latency, scheduled)
+
+    def run():
+        results, success = agent.run("add some numbers")
+        assert success and len(results) == n_calls, results
+
+    # Fresh history each round so runs do not slow down as it grows
+    seconds = measure(run, args.repeat, number=20, setup=agent.messages.clear)
+    return result(seconds, n_calls, "tool calls/s")
+
+@case
+def agent_run_sequential(args, work_dir):
+    """BaseAgent.run: LLM call, JSON extraction and 20 tool calls, executed in order."""
+    return bench_agent_run(args, work_dir, scheduled=False)
+
+@case
+def agent_run_scheduled(args, work_dir):
+    """BaseAgent.run with the same 20 tool calls dispatched through the ToolScheduler."""
+    return bench_agent_run(args, work_dir, scheduled=True)
+
+@case
+def agent_conversation(args, work_dir):
+    """BaseAgent.run for a plain conversation reply (no tool calls)."""
+    agent = make_agent(work_dir, "CONVERSATION: " + "hello " * 200, args.llm_latency, scheduled=False)
+    seconds = measure(lambda: agent.run("hi"), args.repeat, number=200, setup=agent.messages.clear)
+    return result(seconds)
+
+# JSON extraction and repair
+@case
+def extract_json_maps(args, work_dir):
+    """JsonMapStreamParser over a 200-call output with 2 KB string arguments."""
+    from core.utils.json_stream_parser import JsonMapStreamParser
+    text = tool_call_response(200, content_chars=2000)
+
+    def run():
+        assert len(JsonMapStreamParser().feed(text)) == 200
+
+    seconds = measure(run, args.repeat, number=5)
+    return result(seconds, len(text) / 1e6, "MB/s")
+
+@case
+def json_repair_valid(args, work_dir):
+    """json_repair.loads on each of 200 well-formed tool call maps."""
+    import json_repair
+    from core.utils.json_stream_parser import JsonMapStreamParser
+    calls = JsonMapStreamParser().feed(tool_call_response(200, content_chars=2000))
+    seconds = measure(lambda: [json_repair.loads(call) for call in calls], args.repeat, number=5)
+    return result(seconds, len(calls), "maps/s")
+
+@case
+def json_repair_malformed(args, work_dir):
+    """json_repair.loads on a large output with trailing commas and a missing closing brace."""
+    import json_repair
+    items = ", ".join(f'{{"tool": "add_nums", "arguments": {{"a": "{i}", "b": "1",}}}}' for i in range(500))
+    text = '{"calls": [' + items + ",]"
+    seconds = measure(lambda: json_repair.loads(text), args.repeat)
+    return result(seconds, len(text) / 1e6, "MB/s")
+
+# Tool description building
+def sample_tools():
+    def create_document(filename: str, content: str, overwrite: bool) -> str:
+        """Create a document."""
+    def add_nums(a: str, b: str) -> str:
+        """Return the sum of a and b."""
+    def query_rag(query: str) -> str:
+        """Query the RAG system."""
+    return [create_document, add_nums, query_rag]
+
+@case
+def build_tools(args, work_dir):
+    """build_tools_from_functions over the base agent's tool set."""
+    from core.utils.func_build_tools import build_tools_from_functions
+    agent = make_agent(work_dir, "CONVERSATION: ok", 0.0, scheduled=False)
+    seconds = measure(lambda: build_tools_from_functions(agent.tools), args.repeat, number=200)
+    return result(seconds, len(agent.tools), "tools/s")
+
+@case
+def get_args_in_order(args, work_dir):
+    """get_args_in_order for a three-argument tool."""
+    from core.utils.func_build_tools import get_args_in_order as ordered
+    func = sample_tools()[0]
+    arguments = {"content": "text", "overwrite": True, "filename": "a.md"}
+    seconds = measure(lambda: ordered(func, arguments), args.repeat, number=5000)
+    return result(seconds, 1, "calls/s")
+
+@case
+def tool_registry_call(args, work_dir):
+    """ToolRegistry.call for the same tool: prebuilt binder with type coercion."""
+    from core.utils.tool_registry import ToolRegistry
+    registry = ToolRegistry([sample_tools()[0]])
+    arguments = {"content": "text", "overwrite": "true", "filename": "a.md"}
+    seconds = measure(lambda: registry.call("create_document", arguments), args.repeat, number=5000)
+    return result(seconds, 1, "calls/s")
+
+# Loading and splitting
+@case
+def splitter(args, work_dir):
+    """The provider's RecursiveCharacterTextSplitter on a 1 MB document."""
+    from langchain_core.documents import Document
+    from core.db_tools.vector_db_provider import VectorDBProvider
+    provider = VectorDBProvider(StubSettings(work_dir), "bench_agent", StubEmbeddingProvider(StubEmbeddings()))
+    text = sample_text(random.Random(1), 1_000_000)
+    doc = Document(page_content=text, metadata={"source": "bench.txt"})
+    seconds = measure(lambda: provider.get_splitter().split_documents([doc]), args.repeat)
+    return result(seconds, len(text) / 1e6, "MB/s")
+
+@case
+def loader(args, work_dir):
+    """get_loader + lazy_load over 200 text files of 4 KB."""
+    from core.db_tools.vector_db_provider import get_loader
+    paths = write_tree(os.path.join(work_dir, "tree"), 200, 4000)
+    seconds = measure(lambda: [list(get_loader(path).lazy_load()) for path in paths], args.repeat)
+    return result(seconds, len(paths), "files/s")
+
+# Indexing
+def make_provider(work_dir, args):
+    from core.db_tools.vector_db_provider import VectorDBProvider
+    embeddings = StubEmbeddings(latency=args.embed_latency)
+    return VectorDBProvider(StubSettings(work_dir), "bench_agent", StubEmbeddingProvider(embeddings))
+
+@case
+def upsert_file(args, work_dir):
+    """upsert_file for 100 files of 8 KB followed by one flush (write-behind batch)."""
+    paths = write_tree(os.path.join(work_dir, "tree"), 100, 8000)
+    provider = make_provider(work_dir, args)
+    provider.get_db()
+
+    def run():
+        for path in paths:
+            provider.upsert_file(path)
+        provider.flush()
+
+    seconds = measure(run, args.repeat)
+    provider.purge()
+    return result(seconds, len(paths), "files/s")
+
+@case
+def build(args, work_dir):
+    """VectorDBProvider.build over 200 files of 8 KB."""
+    source_dir = os.path.join(work_dir, "tree")
+    paths = write_tree(source_dir, 200, 8000)
+    provider = make_provider(work_dir, args)
+    seconds = measure(lambda: provider.build(source_dir), args.repeat)
+    provider.purge()
+    return result(seconds, len(paths), "files/s")
+
+@case
+def ingest_pipeline(args, work_dir):
+    """IngestPipeline rebuild over 200 files of 8 KB with 2 parse processes."""
+    from core.db_tools.ingest_pipeline import IngestPipeline
+    source_dir = os.path.join(work_dir, "tree")
+    paths = write_tree(source_dir, 200, 8000)
+    provider = make_provider(work_dir, args)
+    pipeline = IngestPipeline(provider, parse_workers=2, progress_interval=3600)
+    seconds = measure(lambda: pipeline.run(source_dir, rebuild=True), args.repeat)
+    provider.purge()
+    return result(seconds, len(paths), "files/s")
+
+# Runner
+def run_cases(names, args):
+    results = {}
+    for name in names:
+        work_dir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+        cwd = os.getcwd()
+        try:
+            # Some code paths write relative to the cwd; keep them out of the repo
+            os.chdir(work_dir)
+            calibration_timings.clear()
+            report = CASES[name](args, work_dir)
+            report["calibration"] = min(calibration_timings)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(work_dir, ignore_errors=True)
+        results[name] = {key: round(value, 9) if isinstance(value, float) else value for key, value in report.items()}
+        line = f"{name:24s} {report['seconds'] * 1e3:10.3f} ms/op"
+        if "rate" in report:
+            line += f"  {report['rate']:12.1f} {report['unit']}"
+        print(line, file=sys.stderr)
+    return results
+
+def relative(report):
+    """Case time in units of the calibration workload measured alongside it."""
+    return report["seconds"] / report["calibration"] if report.get("calibration") else report["seconds"]
+
+def compare(results, baseline, default_threshold):
+    """Return [(name, slowdown, threshold)] for cases slower than allowed relative to calibration."""
+    thresholds = baseline.get("thresholds", {})
+    regressions = []
+    for name, report in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or ("calibration" in previous) != ("calibration" in report):
+            continue
+        threshold = thresholds.get(name, default_threshold)
+        slowdown = relative(report) / relative(previous) - 1
+        if slowdown > threshold:
+            regressions.append((name, slowdown, threshold))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="Run only these cases")
+    parser.add_argument("--repeat", type=int, default=10, help="Rounds per case; the best is reported")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per stub chat completion")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Seconds per stub embedding call")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs. baseline (0.25 = 25%%)")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a case regresses against the baseline")
+    args = parser.parse_args()
+
+    names = args.case or list(CASES)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "llm_latency": args.llm_latency,
+            "embed_latency": args.embed_latency,
+        },
+        "results": run_cases(names, args),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        if baseline is not None:
+            # Keep per-case thresholds and results of cases that were not rerun
+            report["thresholds"] = baseline.get("thresholds", {})
+            if args.case:
+                report["results"] = {**baseline.get("results", {}), **report["results"]}
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"[run_benchmarks] Saved baseline to {args.baseline}", file=sys.stderr)
+        return 0
+
+    print(json.dumps(report, indent=2))
+    if baseline is None:
+        return 0
+    regressions = compare(report["results"], baseline, args.threshold)
+    for name, slowdown, threshold in regressions:
+        print(
+            f"[run_benchmarks] {name}: {slowdown:+.0%} vs. baseline (calibrated), allowed {threshold:.0%}",
+            file=sys.stderr,
+        )
+    return 1 if regressions and args.check else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Offline stand-ins for the LLM and embedding backends used by the benchmarks.
+
+They implement the same methods the agents and VectorDBProvider call, with a
+configurable latency so benchmarks can measure either pure overhead
+(latency 0) or behaviour under a realistic backend delay.
+"""
+import os
+import time
+import struct
+import hashlib
+from types import SimpleNamespace
+from langchain_core.embeddings import Embeddings
+
+def completion(content: str):
+    """Minimal object shaped like an OpenAI ChatCompletion."""
+    message = SimpleNamespace(role="assistant", content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class StubChatCompletionProvider:
+    """Returns `respond(messages)` (or a fixed response) after `latency` seconds."""
+
+    def __init__(self, response="CONVERSATION: ok", latency: float = 0.0, chunk_size: int = 16):
+        self.respond = response if callable(response) else (lambda messages: response)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.comp_model = "stub-model"
+        self.comp_base = "stub://"
+        self.calls = 0
+
+    def chat_completion(self, messages, temperature=0.0, max_tokens=1024, model=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return completion(self.respond(messages))
+
+    def stream_chat_completion(self, messages, temperature=0.0, max_tokens=1024, model=None):
+        self.calls += 1
+        content = self.respond(messages)
+        if self.latency:
+            time.sleep(self.latency)
+        for i in range(0, len(content), self.chunk_size):
+            yield content[i:i + self.chunk_size]
+
+    def structured_chat(self, system_prompt, user_query, temperature=0.0, max_tokens=1024, model=None):
+        return self.chat_completion([{"role": "system", "content": system_prompt}, {"role": "user", "content": user_query}])
+
+    def get_client(self):
+        return None
+
+    def cache_stats(self):
+        return None
+
+
+class StubEmbeddings(Embeddings):
+    """Deterministic hash-based vectors, `latency` seconds per call plus `per_text` per input."""
+
+    def __init__(self, dimensions: int = 64, latency: float = 0.0, per_text: float = 0.0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.per_text = per_text
+        self.calls = 0
+        self.texts = 0
+
+    def vector(self, text: str):
+        digest = b""
+        seed = text.encode("utf-8")
+        while len(digest) < self.dimensions:
+            seed = hashlib.sha256(seed).digest()
+            digest += seed
+        values = struct.unpack(f"{self.dimensions}B", digest[:self.dimensions])
+        return [v / 255.0 - 0.5 for v in values]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        delay = self.latency + self.per_text * len(texts)
+        if delay:
+            time.sleep(delay)
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class StubEmbeddingProvider:
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def get_provider(self):
+        return self.embeddings
+
+
+class StubProjectRootProvider:
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+
+class StubSettings:
+    """Duck-typed Settings returning one in-memory agent config for every agent name."""
+
+    def __init__(self, work_dir: str, **overrides):
+        self.agent_conf = {
+            "project_root": os.path.join(work_dir, "project"),
+            "tools": {"max_workers": 4},
+            "memory": {
+                "vector_db": {
+                    "persist_directory": os.path.join(work_dir, "vector_db"),
+                    "chunk_size": 2000,
+                    "chunk_overlap": 200,
+                    "retriever_k": 3,
+                    "write_behind": {"enabled": True, "max_batch": 10000, "flush_interval_seconds": 3600},
+                    "hybrid": {"enabled": True},
+                },
+            },
+        }
+        self.agent_conf.update(overrides)
+
+    def load_agent_config(self, agent_name: str):
+        return self.agent_conf
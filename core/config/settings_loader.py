@@ -1,5 +1,6 @@
 import os
 import yaml
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -23,6 +24,12 @@ class Settings:
         with open(global_path, "r") as f:
             self.global_data = yaml.safe_load(f)
 
+        self.agents_dir = str(Path(__file__).resolve().parent / "agents")
+
+        # Parsed agent configs: agent_name -> (mtime, config)
+        self.agent_configs = {}
+        self.agent_configs_lock = threading.Lock()
+
         # Handle .env loading from global settings
         dotenv_path = self.get("secrets", "dotenv_path")
         if dotenv_path:
@@ -57,17 +64,26 @@ class Settings:
     def load_agent_config(self, agent_name: str):
         """
         Load agent-specific configuration from core/config/agents/<agent_name>.yaml
+        Parsed files are cached until their mtime changes. The returned dict is
+        shared between callers, so treat it as read-only.
         """
-        base_dir = Path(__file__).resolve().parent / "agents"
-        agent_path = base_dir / f"{agent_name}.yaml"
+        agent_path = os.path.join(self.agents_dir, f"{agent_name}.yaml")
 
-        if not agent_path.exists():
+        try:
+            mtime = os.stat(agent_path).st_mtime_ns
+        except FileNotFoundError:
             raise FileNotFoundError(f"Agent config not found at: {agent_path}")
 
-        with open(agent_path, "r") as f:
-            agent_conf = yaml.safe_load(f)
+        with self.agent_configs_lock:
+            cached = self.agent_configs.get(agent_name)
+        if cached is None or cached[0] != mtime:
+            with open(agent_path, "r") as f:
+                agent_conf = yaml.safe_load(f)
+            cached = (mtime, agent_conf)
+            with self.agent_configs_lock:
+                self.agent_configs[agent_name] = cached
 
-        return agent_conf
+        return cached[1]
 
     # Internal helpers
     def _ensure_env_exists(self, dotenv_file: Path):
@@ -0,0 +1,133 @@
+def document_class():
+    """langchain's Document, imported on first use."""
+    from langchain_core.documents import Document
+    return Document
+
+class ContextBuilder:
+    """
+    Turns retrieved chunks into the context handed to the LLM.
+
+    - Chunks scoring below `min_score` (vector relevance, 0..1) are dropped
+      instead of always passing on `retriever_k` chunks. Chunks without a score
+      (lexical-only hits, already past the retriever's BM25 floor) are kept.
+    - Overlapping or adjacent chunks of the same source are merged, using the
+      `start_index` the splitter records.
+    - The remaining chunks are packed, best first, into `max_tokens`, up to
+      `limit` of them.
+    - Each result carries a compact `citation` (path plus line range, or page).
+
+    Configured from the agent YAML:
+
+        memory:
+          vector_db:
+            context:
+              min_score: 0.3
+              max_tokens: 1500
+    """
+
+    def __init__(self, mem_conf: dict):
+        context_conf = mem_conf.get("context") or {}
+        self.min_score = context_conf.get("min_score", 0.0)
+        self.max_tokens = context_conf.get("max_tokens", 1500)
+
+    def count_tokens(self, text: str) -> int:
+        return len(text) // 4 + 1
+
+    def build(self, scored_docs, limit: int = None):
+        """
+        `scored_docs` is [(Document, score or None)] in retrieval order.
+        Returns at most `limit` merged, budgeted Documents with `citation` and `score` metadata.
+        """
+        kept = [
+            (rank, doc, score) for rank, (doc, score) in enumerate(scored_docs)
+            if score is None or score >= self.min_score
+        ]
+        merged = self.merge(kept)
+        merged.sort(key=lambda item: item[0])
+
+        budget = self.max_tokens
+        packed = []
+        for _, doc in merged:
+            if limit is not None and len(packed) >= limit:
+                break
+            tokens = self.count_tokens(doc.page_content)
+            if tokens > budget:
+                if packed:
+                    continue
+                # Always return something: cut the best chunk down to the budget
+                doc = document_class()(page_content=doc.page_content[:budget * 4], metadata=doc.metadata)
+                tokens = budget
+            budget -= tokens
+            packed.append(doc)
+
+        file_cache = {}
+        for doc in packed:
+            doc.metadata["citation"] = self.citation(doc, file_cache)
+        return packed
+
+    def merge(self, kept):
+        """Merge overlapping/adjacent chunks per (source, page). Returns [(best rank, Document)]."""
+        groups = {}
+        loose = []
+        for rank, doc, score in kept:
+            if "start_index" not in doc.metadata:
+                loose.append((rank, self.copy(doc, score)))
+                continue
+            key = (doc.metadata.get("source"), doc.metadata.get("page"))
+            groups.setdefault(key, []).append((doc.metadata["start_index"], rank, doc, score))
+
+        merged = []
+        for spans in groups.values():
+            spans.sort(key=lambda span: span[0])
+            current = None
+            for start, rank, doc, score in spans:
+                if current is not None and start <= current["end"]:
+                    text = doc.page_content[current["end"] - start:]
+                    current["text"] += text
+                    current["end"] = max(current["end"], start + len(doc.page_content))
+                    current["rank"] = min(current["rank"], rank)
+                    if score is not None:
+                        current["score"] = max(current["score"] or score, score)
+                    continue
+                if current is not None:
+                    merged.append(self.finish(current))
+                current = {
+                    "start": start, "end": start + len(doc.page_content), "text": doc.page_content,
+                    "rank": rank, "score": score, "metadata": doc.metadata,
+                }
+            merged.append(self.finish(current))
+        return merged + loose
+
+    def copy(self, doc, score):
+        metadata = dict(doc.metadata)
+        metadata["score"] = score
+        return document_class()(page_content=doc.page_content, metadata=metadata)
+
+    def finish(self, span):
+        metadata = dict(span["metadata"])
+        metadata["start_index"] = span["start"]
+        metadata["score"] = span["score"]
+        return span["rank"], document_class()(page_content=span["text"], metadata=metadata)
+
+    def citation(self, doc, file_cache):
+        source = doc.metadata.get("source", "unknown")
+        if "page" in doc.metadata:
+            return f"{source} p.{int(doc.metadata['page']) + 1}"
+        start = doc.metadata.get("start_index")
+        if start is None:
+            return source
+
+        if source not in file_cache:
+            try:
+                with open(source, "r", encoding="utf-8") as f:
+                    file_cache[source] = f.read()
+            except (OSError, UnicodeDecodeError):
+                file_cache[source] = None
+        content = file_cache[source]
+        text = doc.page_content
+        # Line numbers only when the file still matches what was indexed
+        if content is None or content[start:start + len(text)] != text:
+            return source
+        first = content.count("\n", 0, start) + 1
+        last = first + text.rstrip("\n").count("\n")
+        return f"{source}:{first}-{last}" if last > first else f"{source}:{first}"
@@ -0,0 +1,103 @@
+import re
+from typing import Any, List
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from core.utils.tracing import span
+
+IDENTIFIER = re.compile(r"^\S+$")
+# Marks of code identifiers and paths: snake_case, dotted names, paths, digits, camelCase
+IDENTIFIER_MARK = re.compile(r"[_/\\]|\w\.\w|\d|[a-z][A-Z]")
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever combining BM25 (LexicalIndex) and vector search (Chroma).
+
+    Both result lists are merged with reciprocal-rank fusion. Identifier-like
+    queries (a single token such as `get_db`, `settings_loader.py` or
+    `VectorDBProvider`, not an ordinary word) whose best lexical hit contains
+    every query term and scores at least `fast_path_min_score` in BM25 are
+    answered from the lexical index alone, which skips the embedding call
+    entirely. With `use_lexical` off it is
+    plain vector search.
+
+    Lexical hits scoring below `lexical_min_score` in BM25 (e.g. matches on
+    common words only) are discarded before fusion. Up to `fetch_k` candidates
+    from each side go through the ContextBuilder, which applies the score
+    cutoff, merges overlapping chunks and packs at most `k` of them into the
+    token budget.
+    """
+
+    vector_db_provider: Any
+    context_builder: Any = None
+    use_lexical: bool = True
+    k: int = 3
+    fetch_k: int = 20
+    rrf_k: int = 60
+    lexical_fast_path: bool = True
+    fast_path_min_score: float = 2.0
+    lexical_min_score: float = 1.0
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with span("retrieval", k=self.k) as retrieval:
+            docs = self.retrieve(query, retrieval)
+            retrieval.set(docs=len(docs))
+            return docs
+
+    def retrieve(self, query: str, retrieval):
+        lexical = []
+        if self.use_lexical:
+            lexical = [
+                hit for hit in self.vector_db_provider.get_lexical_index().search(query, self.fetch_k)
+                if hit[1] >= self.lexical_min_score
+            ]
+            if lexical and self.is_strong_lexical_match(query, lexical):
+                retrieval.set(lexical_fast_path=True)
+                return self.finish([(doc, None) for doc, _, _ in lexical])
+
+        db = self.vector_db_provider.get_db()
+        vector = db.similarity_search_with_relevance_scores(query, k=self.fetch_k)
+        if not lexical:
+            return self.finish(vector)
+
+        scores = {self.key(doc): score for doc, score in vector}
+        fused = self.fuse([[doc for doc, _, _ in lexical], [doc for doc, _ in vector]])
+        return self.finish([(doc, scores.get(self.key(doc))) for doc in fused])
+
+    def finish(self, scored_docs):
+        if self.context_builder is None:
+            return [doc for doc, _ in scored_docs[:self.k]]
+        return self.context_builder.build(scored_docs, limit=self.k)
+
+    def takes_fast_path(self, query: str):
+        """True when `query` is answered from the lexical index alone, without an embedding call."""
+        if not self.use_lexical or not self.is_identifier_query(query):
+            return False
+        lexical = self.vector_db_provider.get_lexical_index().search(query, self.fetch_k)
+        return bool(lexical) and self.is_strong_lexical_match(query, lexical)
+
+    def is_identifier_query(self, query: str):
+        query = query.strip()
+        return self.lexical_fast_path and bool(IDENTIFIER.match(query)) and bool(IDENTIFIER_MARK.search(query))
+
+    def is_strong_lexical_match(self, query: str, lexical):
+        if not self.is_identifier_query(query):
+            return False
+        _, score, coverage = lexical[0]
+        return coverage == 1.0 and score >= self.fast_path_min_score
+
+    def key(self, doc):
+        return (doc.metadata.get("source"), doc.page_content)
+
+    def fuse(self, rankings):
+        """Reciprocal-rank fusion: score(d) = sum over lists of 1 / (rrf_k + rank)."""
+        scores = {}
+        docs = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking, start=1):
+                key = self.key(doc)
+                docs.setdefault(key, doc)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank)
+        return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
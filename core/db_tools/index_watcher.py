@@ -0,0 +1,163 @@
+import os
+import time
+import threading
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+from watchdog.events import FileSystemEventHandler
+
+class IndexWatcher(FileSystemEventHandler):
+    """
+    Keeps a VectorDBProvider in sync with a directory in the background.
+
+    File system events (inotify where available, or polling) are debounced:
+    a path is indexed only once it has been quiet for `debounce_seconds`, and
+    repeated events for the same path collapse into a single upsert or delete.
+    The work runs on a dedicated thread so callers never wait on embedding.
+    """
+
+    def __init__(
+        self,
+        vector_db_provider,
+        root_dir: str,
+        debounce_seconds: float = 1.0,
+        backend: str = "inotify",
+        polling_interval: float = 2.0,
+        sync_on_start: bool = True,
+    ):
+        self.provider = vector_db_provider
+        self.root_dir = root_dir
+        self.debounce_seconds = debounce_seconds
+        self.backend = backend
+        self.polling_interval = polling_interval
+        self.sync_on_start = sync_on_start
+        self.ignored_dir = os.path.abspath(self.provider.persist_dir)
+
+        self.pending = {}  # path -> (action, last event time)
+        self.condition = threading.Condition()
+        self.running = False
+        self.busy = False
+        self.observer = None
+        self.worker = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        if self.backend == "polling":
+            self.observer = PollingObserver(timeout=self.polling_interval)
+        else:
+            self.observer = Observer()
+        self.observer.schedule(self, self.root_dir, recursive=True)
+        self.observer.start()
+        self.worker = threading.Thread(target=self._work, name="index-watcher", daemon=True)
+        self.worker.start()
+        print(f"[IndexWatcher] Watching {self.root_dir} ({self.backend})")
+
+    def stop(self):
+        """Stop watching after indexing whatever is still pending."""
+        if not self.running:
+            return
+        self.observer.stop()
+        self.observer.join()
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.worker.join()
+
+    def wait_idle(self, timeout: float = None):
+        """Block until no changes are pending. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.pending or self.busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    # Event handling
+    def on_created(self, event):
+        self._mark(event, event.src_path, "upsert")
+
+    def on_modified(self, event):
+        self._mark(event, event.src_path, "upsert")
+
+    def on_closed(self, event):
+        self._mark(event, event.src_path, "upsert")
+
+    def on_deleted(self, event):
+        self._mark(event, event.src_path, "delete")
+
+    def on_moved(self, event):
+        self._mark(event, event.src_path, "delete")
+        self._mark(event, event.dest_path, "upsert")
+
+    def _mark(self, event, path, action):
+        if event.is_directory:
+            return
+        if os.path.abspath(path).startswith(self.ignored_dir + os.sep):
+            return
+        path = self._source_path(path)
+        with self.condition:
+            self.pending[path] = (action, time.monotonic())
+            self.condition.notify_all()
+
+    def _source_path(self, path):
+        # Report paths under root_dir the same way VectorDBProvider.list_files does
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_dir))
+        return os.path.normpath(os.path.join(self.root_dir, relative))
+
+    # Background worker
+    def _work(self):
+        if self.sync_on_start:
+            # Catch up with changes made while nobody was watching
+            with self.condition:
+                self.busy = True
+            self._run(self.provider.sync, self.root_dir)
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+        while True:
+            with self.condition:
+                ready = self._take_ready()
+                while not ready:
+                    if not self.running and not self.pending:
+                        return
+                    if self.pending:
+                        oldest = min(t for _, t in self.pending.values())
+                        timeout = max(0.0, oldest + self.debounce_seconds - time.monotonic())
+                    else:
+                        timeout = None
+                    if not self.running:
+                        timeout = 0.0
+                    self.condition.wait(timeout)
+                    ready = self._take_ready(force=not self.running)
+                self.busy = True
+
+            for path, action in ready:
+                if action == "upsert" and os.path.isfile(path):
+                    if not self.provider.is_unchanged(path):
+                        self._run(self.provider.upsert_file, path)
+                else:
+                    self._run(self.provider.delete_file, path)
+
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def _take_ready(self, force: bool = False):
+        now = time.monotonic()
+        ready = [
+            (path, action) for path, (action, t) in self.pending.items()
+            if force or now - t >= self.debounce_seconds
+        ]
+        for path, _ in ready:
+            del self.pending[path]
+        return ready
+
+    def _run(self, func, path):
+        try:
+            func(path)
+        except Exception as e:
+            print(f"[IndexWatcher] Failed to index {path}: {e}")
@@ -0,0 +1,319 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from core.db_tools.vector_db_provider import VectorDBProvider, get_loader
+
+def load_and_split(paths, chunk_size, chunk_overlap):
+    """
+    Parse and chunk a group of files. Runs inside a worker process.
+    Returns [(path, chunks, error)] in the same order as `paths`.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True,
+    )
+    results = []
+    for path in paths:
+        try:
+            chunks = splitter.split_documents(list(get_loader(path).lazy_load()))
+            for chunk in chunks:
+                chunk.metadata["source"] = path
+            results.append((path, chunks, None))
+        except Exception as e:
+            results.append((path, [], f"{type(e).__name__}: {e}"))
+    return results
+
+
+class IngestPipeline:
+    """
+    Parallel, resumable ingestion of a source tree into a VectorDBProvider's DB.
+
+    Stages:
+      1. parse: a process pool loads and chunks files (PDF, docx, text) in groups;
+         a tree that fits in one group is parsed in-process
+      2. embed + insert: worker threads take chunk batches from a bounded queue
+         and add each batch to the store (one batched embedding call and one
+         batched insert per batch)
+
+    A file is recorded in the provider's manifest only after all of its chunks
+    are stored, so an interrupted run resumes with the files it had not finished.
+    New files are listed in a journal (ingest_journal.txt in the DB directory)
+    before their chunks are stored; stale vectors are only cleared for files with
+    an earlier version or left over from an interrupted run.
+
+    Defaults come from the agent YAML:
+
+        memory:
+          vector_db:
+            ingest:
+              parse_workers: 4
+              embed_workers: 4
+              batch_size: 64
+              queue_size: 16
+    """
+
+    def __init__(
+        self,
+        vector_db_provider: VectorDBProvider,
+        parse_workers: int = None,
+        embed_workers: int = None,
+        batch_size: int = None,
+        queue_size: int = None,
+        files_per_task: int = 8,
+        progress_interval: float = 2.0,
+    ):
+        self.provider = vector_db_provider
+        ingest_conf = self.provider.mem_conf.get("ingest") or {}
+        self.parse_workers = parse_workers or ingest_conf.get("parse_workers") or os.cpu_count() or 1
+        self.embed_workers = embed_workers or ingest_conf.get("embed_workers", 4)
+        self.batch_size = batch_size or ingest_conf.get("batch_size", 64)
+        self.queue_size = queue_size or ingest_conf.get("queue_size", 16)
+        self.files_per_task = files_per_task
+        self.progress_interval = progress_interval
+
+    def run(self, source_dir: str = None, rebuild: bool = False):
+        """
+        Ingest `source_dir` (defaults to the project root). With `rebuild`, the DB is
+        purged first; otherwise only new or changed files are processed.
+        Returns a report of file/chunk counts and throughput.
+        """
+        source_dir = source_dir or self.provider.root_dir
+        if rebuild:
+            self.provider.purge()
+        else:
+            self.provider.flush()
+
+        with self.provider.manifest_lock:
+            # Files an interrupted run had started may have some of their chunks stored
+            self.partial = set() if rebuild else self.read_journal() - set(self.provider.manifest)
+            # Without a manifest, "new" files may already have vectors, see sync()
+            self.unknown_contents = not rebuild and not self.provider.manifest
+        self.journaled = set()
+
+        plan = self.provider.plan_sync(source_dir)
+        by_path = {path: (record, previous) for path, record, previous in plan["changed"]}
+        paths = list(by_path)
+        groups = [paths[i:i + self.files_per_task] for i in range(0, len(paths), self.files_per_task)]
+        self.report = {
+            "added": 0, "updated": 0, "removed": 0, "skipped": plan["skipped"],
+            "failed": 0, "chunks": 0, "seconds": 0.0,
+        }
+        self.total_files = len(plan["changed"])
+        self.done_files = 0
+        self.start = time.monotonic()
+        self.last_progress = self.start
+        self.lock = threading.Lock()
+        self.pending_chunks = {}
+        self.records = {}
+        self.errors = []
+        self.carry = []
+
+        # Worker processes are forked before this run opens the DB or starts threads
+        executor = self._start_parse_pool(len(groups))
+        embedders = []
+        self.journal = None
+        try:
+            self.db = self.provider.get_db()
+
+            for path in plan["removed"]:
+                self.provider.delete_chunks(self.db, [path])
+                with self.provider.manifest_lock:
+                    self.provider.manifest.pop(path, None)
+                self.report["removed"] += 1
+            # Partly stored files that no longer exist
+            for path in self.partial - set(by_path):
+                self.provider.delete_chunks(self.db, [path])
+                self.partial.discard(path)
+
+            print(
+                f"[IngestPipeline] {self.total_files} files to ingest from {source_dir} "
+                f"({plan['skipped']} unchanged, {len(plan['removed'])} removed)"
+            )
+
+            self.journal = open(self.journal_path(), "a")
+            self.batches = queue.Queue(maxsize=self.queue_size)
+            embedders = [
+                threading.Thread(target=self._embed_worker, name=f"ingest-embed-{i}", daemon=True)
+                for i in range(self.embed_workers)
+            ]
+            for thread in embedders:
+                thread.start()
+
+            self._parse(groups, by_path, executor)
+            if self.carry:
+                self.batches.put(self.carry)
+                self.carry = []
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            for _ in embedders:
+                self.batches.put(None)
+            for thread in embedders:
+                thread.join()
+            with self.provider.manifest_lock:
+                self.provider.save_manifest()
+                unfinished = {path for path in self.partial | self.journaled if path not in self.provider.manifest}
+            self.close_journal(unfinished)
+
+        if self.errors:
+            raise RuntimeError(f"Ingestion stopped: {self.errors[0]}")
+
+        self.report["seconds"] = time.monotonic() - self.start
+        self._print_progress(final=True)
+        return self.report
+
+    # Stage 1: parse in worker processes, feed chunk batches into the queue
+    def _start_parse_pool(self, group_count):
+        """
+        Return a process pool for parsing, or None when it is not worth starting one.
+        Workers are forked where possible, so they skip re-importing the parsers.
+        Callers start it before their own threads: forking a process with live
+        threads can deadlock on locks they hold.
+        """
+        if group_count <= 1 or self.parse_workers <= 1:
+            return None
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.parse_workers, group_count),
+            mp_context=multiprocessing.get_context(method),
+        )
+        # Forked workers all start with the first task, so start them now
+        executor.submit(int).result()
+        return executor
+
+    def _parse(self, groups, by_path, executor):
+        if executor is None:
+            for group in groups:
+                for path, chunks, error in load_and_split(group, self.provider.chunk_size, self.provider.chunk_overlap):
+                    record, previous = by_path[path]
+                    self._enqueue(path, chunks, error, record, previous)
+                if self.errors:
+                    return
+            return
+
+        max_outstanding = self.parse_workers * 2
+        outstanding = set()
+        next_group = 0
+        while next_group < len(groups) or outstanding:
+            while next_group < len(groups) and len(outstanding) < max_outstanding:
+                outstanding.add(executor.submit(
+                    load_and_split, groups[next_group], self.provider.chunk_size, self.provider.chunk_overlap
+                ))
+                next_group += 1
+            done, outstanding = wait(outstanding, return_when=FIRST_COMPLETED)
+            for future in done:
+                for path, chunks, error in future.result():
+                    record, previous = by_path[path]
+                    self._enqueue(path, chunks, error, record, previous)
+            if self.errors:
+                return
+
+    def _enqueue(self, path, chunks, error, record, previous):
+        if error is not None:
+            print(f"[IngestPipeline] Failed to parse {path}: {error}")
+            with self.lock:
+                self.report["failed"] += 1
+                self.done_files += 1
+            return
+
+        # Clear vectors from an earlier version or an interrupted run of this file.
+        # A file that was never ingested (or a rebuild's purged DB) has none
+        if previous or self.unknown_contents or path in self.partial:
+            self.provider.delete_chunks(self.db, [path])
+        if not previous:
+            self.journal.write(path + "\n")
+            self.journal.flush()
+            self.journaled.add(path)
+
+        with self.lock:
+            self.records[path] = (record, "updated" if previous else "added")
+            self.pending_chunks[path] = len(chunks)
+        if not chunks:
+            self._complete(path)
+            return
+
+        # Batches may span files so small files still make full-size requests
+        for chunk in chunks:
+            self.carry.append(chunk)
+            if len(self.carry) >= self.batch_size:
+                self.batches.put(self.carry)
+                self.carry = []
+
+    # Journal of new files whose chunks may be partly stored
+    def journal_path(self):
+        return os.path.join(self.provider.persist_dir, "ingest_journal.txt")
+
+    def read_journal(self):
+        try:
+            with open(self.journal_path(), "r") as f:
+                return {line.rstrip("\n") for line in f if line.strip()}
+        except OSError:
+            return set()
+
+    def close_journal(self, unfinished):
+        """Keep only the files that are still partly stored, or drop the journal."""
+        if self.journal is not None:
+            self.journal.close()
+        if not unfinished:
+            if os.path.exists(self.journal_path()):
+                os.remove(self.journal_path())
+            return
+        with open(self.journal_path(), "w") as f:
+            f.writelines(path + "\n" for path in sorted(unfinished))
+
+    # Stage 2: embed and insert batches
+    def _embed_worker(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            if self.errors:
+                continue
+            try:
+                self.provider.add_chunks(self.db, batch)
+            except Exception as e:
+                with self.lock:
+                    self.errors.append(f"{type(e).__name__}: {e}")
+                continue
+
+            finished = []
+            with self.lock:
+                self.report["chunks"] += len(batch)
+                for chunk in batch:
+                    path = chunk.metadata["source"]
+                    self.pending_chunks[path] -= 1
+                    if self.pending_chunks[path] == 0:
+                        finished.append(path)
+            for path in finished:
+                self._complete(path)
+            self._print_progress()
+
+    def _complete(self, path):
+        with self.lock:
+            record, kind = self.records.pop(path)
+            self.pending_chunks.pop(path, None)
+            self.report[kind] += 1
+            self.done_files += 1
+            checkpoint = self.done_files % 100 == 0
+        with self.provider.manifest_lock:
+            self.provider.manifest[path] = record
+            if checkpoint:
+                self.provider.save_manifest()
+
+    def _print_progress(self, final: bool = False):
+        now = time.monotonic()
+        with self.lock:
+            if not final and now - self.last_progress < self.progress_interval:
+                return
+            self.last_progress = now
+            elapsed = max(now - self.start, 1e-9)
+            print(
+                f"[IngestPipeline] {self.done_files}/{self.total_files} files, "
+                f"{self.report['chunks']} chunks, {self.report['chunks'] / elapsed:.1f} chunks/s, "
+                f"{self.done_files / elapsed:.1f} files/s"
+            )
@@ -0,0 +1,155 @@
+import os
+import re
+import json
+import math
+import heapq
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+
+WORD = re.compile(r"[A-Za-z0-9_]+")
+CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+def document_class():
+    """langchain's Document, imported on first use."""
+    from langchain_core.documents import Document
+    return Document
+
+def tokenize(text: str):
+    """
+    Lowercased word tokens. Identifiers also contribute their parts, so
+    `get_db`, `VectorDBProvider` and `vector_db_provider.py` match both as a
+    whole and by component.
+    """
+    tokens = []
+    for word in WORD.findall(text):
+        lowered = word.lower()
+        tokens.append(lowered)
+        parts = [p.lower() for piece in word.split("_") for p in CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the same chunks as the vector store.
+
+    Chunks are persisted in SQLite so the index survives restarts; postings are
+    rebuilt in memory on load. Chunks are indexed with their source path, so
+    filename lookups work too.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.Lock()
+        self.db = None
+        self.reset()
+        self.open()
+
+    def reset(self):
+        self.chunks = {}  # id -> (source, text, metadata json)
+        self.lengths = {}  # id -> token count
+        self.postings = defaultdict(dict)  # term -> {id: term frequency}
+        self.by_source = defaultdict(set)  # source -> ids
+        self.total_length = 0
+
+    def open(self):
+        parent = os.path.dirname(self.path)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks "
+            "(id INTEGER PRIMARY KEY, source TEXT, text TEXT, metadata TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+        self.db.commit()
+        for chunk_id, source, text, metadata in self.db.execute("SELECT id, source, text, metadata FROM chunks"):
+            self._index(chunk_id, source, text, metadata)
+
+    def close(self):
+        """Release the SQLite file, e.g. before the DB directory is deleted."""
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+            self.reset()
+
+    def __len__(self):
+        return len(self.chunks)
+
+    # Updates
+    def add_documents(self, docs):
+        with self.lock:
+            for doc in docs:
+                source = doc.metadata.get("source", "")
+                metadata = json.dumps(doc.metadata, default=str)
+                cursor = self.db.execute(
+                    "INSERT INTO chunks (source, text, metadata) VALUES (?, ?, ?)",
+                    (source, doc.page_content, metadata),
+                )
+                self._index(cursor.lastrowid, source, doc.page_content, metadata)
+            self.db.commit()
+
+    def delete_sources(self, sources):
+        with self.lock:
+            for source in sources:
+                for chunk_id in self.by_source.pop(source, ()):
+                    self._unindex(chunk_id)
+            self.db.executemany("DELETE FROM chunks WHERE source = ?", [(s,) for s in sources])
+            self.db.commit()
+
+    def _index(self, chunk_id, source, text, metadata):
+        counts = Counter(tokenize(text) + tokenize(source))
+        self.chunks[chunk_id] = (source, text, metadata)
+        self.lengths[chunk_id] = sum(counts.values())
+        self.total_length += self.lengths[chunk_id]
+        self.by_source[source].add(chunk_id)
+        for term, tf in counts.items():
+            self.postings[term][chunk_id] = tf
+
+    def _unindex(self, chunk_id):
+        source, text, _ = self.chunks.pop(chunk_id)
+        self.total_length -= self.lengths.pop(chunk_id)
+        for term in set(tokenize(text) + tokenize(source)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    # Search
+    def search(self, query: str, k: int = 4):
+        """
+        Return up to `k` (Document, score, coverage) tuples, best first.
+        `coverage` is the fraction of distinct query terms the chunk contains.
+        """
+        Document = document_class()
+        terms = set(WORD.findall(query.lower())) or set(tokenize(query))
+        with self.lock:
+            n = len(self.chunks)
+            if not n or not terms:
+                return []
+            avg_length = self.total_length / n
+            scores = defaultdict(float)
+            matched = defaultdict(int)
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / avg_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / norm
+                    matched[chunk_id] += 1
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            results = []
+            for chunk_id, score in top:
+                _, text, metadata = self.chunks[chunk_id]
+                doc = Document(page_content=text, metadata=json.loads(metadata))
+                results.append((doc, score, matched[chunk_id] / len(terms)))
+            return results
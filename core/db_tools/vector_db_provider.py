@@ -1,16 +1,52 @@
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    DirectoryLoader, TextLoader, PyPDFLoader, UnstructuredWordDocumentLoader
-)
+# Chroma, loaders, splitters and the retriever are imported where they are
+# first used, so constructing a provider stays cheap
 from core.config.settings_loader import Settings
 from core.embedding_tools.embedding_provider import EmbeddingProvider
+from core.db_tools.index_watcher import IndexWatcher
+from core.db_tools.lexical_index import LexicalIndex
+from core.db_tools.context_builder import ContextBuilder
+from core.utils.tracing import span
 import os
+import json
+import time
+import atexit
 import shutil
+import hashlib
+import threading
+from collections import OrderedDict
 
 class DummyLoader:
     def lazy_load(self):
         return []
+
+def is_binary(path):
+    with open(path, 'rb') as f:
+        chunk = f.read(4096)
+    try:
+        chunk.decode('utf-8')
+        return False   # decodes fine -> text
+    except UnicodeDecodeError:
+        return True    # invalid UTF-8 -> probably binary
+
+def get_loader(path):
+    """
+    Loads a file based on its extension, skipping binary files.
+    Module-level so ingestion worker processes can use it.
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if is_binary(path):
+        return DummyLoader()  # Skip binary files
+
+    if ext == ".pdf":
+        from langchain_community.document_loaders import PyPDFLoader
+        return PyPDFLoader(path)
+    elif ext in [".docx", ".doc"]:
+        from langchain_community.document_loaders import UnstructuredWordDocumentLoader
+        return UnstructuredWordDocumentLoader(path)
+    else:
+        from langchain_community.document_loaders import TextLoader
+        return TextLoader(path, encoding="utf-8")
     
 class VectorDBProvider:
     """
@@ -30,42 +66,61 @@ class VectorDBProvider:
         self.chunk_overlap = mem_conf["chunk_overlap"]
         self.retriever_k = mem_conf.get("retriever_k", 3)
 
-        # Initialize embeddings
-        self.embeddings = embedding_provider.get_provider()
+        # File manifest used for incremental sync: path -> size, mtime, sha256
+        self.manifest_path = os.path.join(self.persist_dir, "manifest.json")
+        self.manifest_lock = threading.Lock()
+        self.manifest = self.load_manifest()
+
+        # Optional background indexer for project_root, see start_watching()
+        self.watch_conf = mem_conf.get("watch") or {}
+        self.index_watcher = None
+
+        # Embeddings are created by the provider on first use, see the embeddings property
+        self.embedding_provider = embedding_provider
+
+        # One long-lived store handle and splitter, see get_db() and get_splitter()
+        self.db = None
+        self.db_lock = threading.Lock()
+        self.splitter = None
+
+        # BM25 index kept alongside the vector store, see get_retriever()
+        self.hybrid_conf = mem_conf.get("hybrid") or {}
+        self.hybrid = self.hybrid_conf.get("enabled", True)
+        self.lexical_path = os.path.join(self.persist_dir, "lexical_index.sqlite")
+        self.lexical_index = None
+        self.lexical_lock = threading.Lock()
+
+        # Called with the changed source paths (None = everything) after each write
+        self.change_listeners = []
+
+        # Write-behind queue for upsert_file/delete_file, see flush()
+        write_conf = mem_conf.get("write_behind") or {}
+        self.write_behind = write_conf.get("enabled", True)
+        self.max_batch = write_conf.get("max_batch", 32)
+        self.flush_interval = write_conf.get("flush_interval_seconds", 2.0)
+        self.pending_writes = OrderedDict()  # path -> "upsert" | "delete"
+        self.pending_since = None
+        self.write_condition = threading.Condition()
+        self.flush_lock = threading.Lock()
+        self.flusher = None
+
+    @property
+    def embeddings(self):
+        return self.embedding_provider.get_provider()
 
     # Document loading
     def is_binary(self, path):
-        with open(path, 'rb') as f:
-            chunk = f.read(4096)
-        try:
-            chunk.decode('utf-8')
-            return False   # decodes fine -> text
-        except UnicodeDecodeError:
-            return True    # invalid UTF-8 -> probably binary
+        return is_binary(path)
 
     def custom_loader(self, path):
         """
         Loads a file based on its extension, skipping binary files.
         """
-        # print(path)
-
-        ext = os.path.splitext(path)[1].lower()
-
-        if self.is_binary(path):
-            print(path, " is binary")
-            return DummyLoader()  # Skip binary files
-        else:
-            print(path, " is not binary")
-
-        if ext == ".pdf":
-            return PyPDFLoader(path)
-        elif ext in [".docx", ".doc"]:
-            return UnstructuredWordDocumentLoader(path)
-        else:
-            return TextLoader(path, encoding="utf-8")
+        return get_loader(path)
 
     def load_documents(self, source_dir: str):
         """Loads text and document files from a given directory."""
+        from langchain_community.document_loaders import DirectoryLoader
         source = source_dir
         loader = DirectoryLoader(
             source,
@@ -80,75 +135,413 @@ class VectorDBProvider:
     # Build or load
     def build(self, source_dir: str):
         """
-        Rebuilds a fresh Chroma DB from documents.
+        Rebuilds a fresh Chroma DB from documents with the parallel IngestPipeline.
         Automatically deletes any existing DB directory before rebuild.
         """
-        if self.persist_dir.exists():
+        with span("index_build"):
+            return self._build(source_dir)
+
+    def _build(self, source_dir: str):
+        from core.db_tools.ingest_pipeline import IngestPipeline
+        report = IngestPipeline(self).run(source_dir, rebuild=True)
+        if not report["added"]:
+            print(f"[VectorDBManager] No documents found in {source_dir}")
+            return None
+
+        print(f"[VectorDBManager] Rebuilt DB at {self.persist_dir}")
+        return self.get_db()
+
+    def purge(self):
+        """Delete the DB directory and its manifest, dropping any queued writes."""
+        with self.write_condition:
+            self.pending_writes.clear()
+        with self.db_lock:
+            self.db = None
+        with self.lexical_lock:
+            if self.lexical_index is not None:
+                self.lexical_index.close()
+                self.lexical_index = None
+        if os.path.exists(self.persist_dir):
             print(f"[VectorDBManager] Purging existing DB at {self.persist_dir}...")
             shutil.rmtree(self.persist_dir, ignore_errors=True)
+            # Drop cached in-process clients still pointing at the deleted files
+            from chromadb.api.client import SharedSystemClient
+            SharedSystemClient.clear_system_cache()
 
-        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        os.makedirs(self.persist_dir, exist_ok=True)
+        with self.manifest_lock:
+            self.manifest = {}
+        self.notify_change(None)
 
-        docs = self.load_documents(source_dir)
-        if not docs:
-            print(f"[VectorDBManager] No documents found in {source_dir}")
-            return None
+    # Incremental sync
+    def sync(self, source_dir: str = None):
+        """
+        Bring the DB in line with `source_dir` (defaults to the project root) without
+        a full rebuild. Only new or changed files are re-chunked and re-embedded,
+        and vectors of files that no longer exist are deleted.
+        Returns a report of added/updated/removed/skipped file counts.
+        """
+        source_dir = source_dir or self.root_dir
+        self.flush()
+        with self.manifest_lock:
+            # Without a manifest (e.g. a DB built by an older version) "new" files
+            # may already have vectors, so their entries are replaced, not added to
+            unknown_contents = not self.manifest
+        plan = self.plan_sync(source_dir)
+        report = {"added": 0, "updated": 0, "removed": 0, "skipped": plan["skipped"]}
+        db = self.get_db()
 
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
+        for path, record, previous in plan["changed"]:
+            if previous or unknown_contents:
+                self.delete_chunks(db, [path])
+            chunks = self.get_splitter().split_documents(list(self.custom_loader(path).lazy_load()))
+            if chunks:
+                self.add_chunks(db, chunks)
+            with self.manifest_lock:
+                self.manifest[path] = record
+            report["updated" if previous else "added"] += 1
+
+        for path in plan["removed"]:
+            self.delete_chunks(db, [path])
+            with self.manifest_lock:
+                self.manifest.pop(path, None)
+            report["removed"] += 1
+
+        with self.manifest_lock:
+            self.save_manifest()
+
+        print(
+            f"[VectorDBManager] Synced {source_dir}: {report['added']} added, {report['updated']} updated, "
+            f"{report['removed']} removed, {report['skipped']} skipped"
         )
-        chunks = splitter.split_documents(docs)
+        return report
+
+    def plan_sync(self, source_dir: str):
+        """
+        Compare `source_dir` against the manifest.
+        Returns {"changed": [(path, record, previous_record)], "removed": [path], "skipped": count}.
+        """
+        plan = {"changed": [], "removed": [], "skipped": 0}
+        seen = set()
+        for path in self.list_files(source_dir):
+            seen.add(path)
+            with self.manifest_lock:
+                previous = self.manifest.get(path)
+            stat = os.stat(path)
+            if previous and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime:
+                plan["skipped"] += 1
+                continue
+
+            record = self.file_record(path)
+            if previous and previous["sha256"] == record["sha256"]:
+                # Touched but unchanged, only refresh the stat fields
+                with self.manifest_lock:
+                    self.manifest[path] = record
+                plan["skipped"] += 1
+                continue
+
+            plan["changed"].append((path, record, previous))
 
-        db = Chroma.from_documents(
-            chunks,
-            embedding=self.embeddings,
-            persist_directory=str(self.persist_dir),
+        with self.manifest_lock:
+            plan["removed"] = [
+                path for path in self.manifest
+                if path not in seen and self.is_under(path, source_dir)
+            ]
+        return plan
+
+    # Background indexing
+    def start_watching(self):
+        """
+        Start the background IndexWatcher on project_root if
+        memory.vector_db.watch.enabled is set. Safe to call more than once.
+        """
+        if not self.watch_conf.get("enabled", False) or self.index_watcher is not None:
+            return
+        self.index_watcher = IndexWatcher(
+            self,
+            self.root_dir,
+            debounce_seconds=self.watch_conf.get("debounce_seconds", 1.0),
+            backend=self.watch_conf.get("backend", "inotify"),
+            polling_interval=self.watch_conf.get("polling_interval", 2.0),
+            sync_on_start=self.watch_conf.get("sync_on_start", True),
         )
-        db.persist()
+        self.index_watcher.start()
 
-        print(f"[VectorDBManager] Rebuilt DB at {self.persist_dir}")
-        return db
+    def stop_watching(self):
+        if self.index_watcher is not None:
+            self.index_watcher.stop()
+            self.index_watcher = None
+
+    def is_watching(self):
+        return self.index_watcher is not None
+
+    def list_files(self, source_dir: str):
+        """Yield every file under `source_dir`, skipping the DB's own directory."""
+        persist_dir = os.path.abspath(self.persist_dir)
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            dirnames[:] = [
+                d for d in dirnames
+                if os.path.abspath(os.path.join(dirpath, d)) != persist_dir
+            ]
+            for filename in filenames:
+                # Normalized the same way as DirectoryLoader's "source" metadata
+                yield os.path.normpath(os.path.join(dirpath, filename))
+
+    def is_under(self, path: str, source_dir: str):
+        source_dir = os.path.abspath(source_dir)
+        return os.path.commonpath([os.path.abspath(path), source_dir]) == source_dir
+
+    # Manifest helpers
+    def is_unchanged(self, path: str):
+        """True if the file's content matches what the manifest says is indexed."""
+        with self.manifest_lock:
+            previous = self.manifest.get(os.path.normpath(path))
+        if not previous:
+            return False
+        try:
+            return self.file_record(path)["sha256"] == previous["sha256"]
+        except OSError:
+            return False
+
+    def file_record(self, path: str):
+        stat = os.stat(path)
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"[VectorDBManager] Ignoring unreadable manifest at {self.manifest_path}")
+            return {}
+
+    def save_manifest(self):
+        """Write the manifest atomically. Caller must hold manifest_lock."""
+        os.makedirs(self.persist_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get_db(self):
+        """Return the shared Chroma handle, opening it on first use."""
+        with self.db_lock:
+            if self.db is None:
+                from langchain_community.vectorstores import Chroma
+                self.db = Chroma(
+                    embedding_function=self.embeddings,
+                    persist_directory=str(self.persist_dir),
+                )
+            return self.db
 
     def load_or_create(self):
         """Load existing DB, or create an empty one if missing."""
         try:
-            db = Chroma(
-                embedding_function=self.embeddings,
-                persist_directory=str(self.persist_dir),
-            )
-            retriever = db.as_retriever(search_kwargs={"k": self.retriever_k})
+            db = self.get_db()
+            retriever = self.get_retriever()
             print(f"[VectorDBManager] Loaded existing DB from {self.persist_dir}")
             return db, retriever
         except Exception:
             print(f"[VectorDBManager] No existing DB found at {self.persist_dir}, initializing empty.")
+            from langchain_community.vectorstores import Chroma
             db = Chroma.from_documents([], embedding=self.embeddings, persist_directory=str(self.persist_dir))
-            retriever = db.as_retriever(search_kwargs={"k": self.retriever_k})
+            with self.db_lock:
+                self.db = db
+            retriever = self.get_retriever()
             return db, retriever
     
+    def get_splitter(self):
+        with self.db_lock:
+            if self.splitter is None:
+                from langchain.text_splitter import RecursiveCharacterTextSplitter
+                self.splitter = RecursiveCharacterTextSplitter(
+                    chunk_size=self.chunk_size,
+                    chunk_overlap=self.chunk_overlap,
+                    add_start_index=True,  # lets ContextBuilder merge overlaps and cite lines
+                )
+            return self.splitter
+
+    def get_retriever(self):
+        """Hybrid BM25 + vector retriever (plain vector search when hybrid is off) feeding a ContextBuilder."""
+        from core.db_tools.hybrid_retriever import HybridRetriever
+        return HybridRetriever(
+            vector_db_provider=self,
+            context_builder=ContextBuilder(self.mem_conf),
+            use_lexical=self.hybrid,
+            k=self.retriever_k,
+            fetch_k=self.hybrid_conf.get("fetch_k", 20),
+            rrf_k=self.hybrid_conf.get("rrf_k", 60),
+            lexical_fast_path=self.hybrid_conf.get("lexical_fast_path", True),
+            fast_path_min_score=self.hybrid_conf.get("fast_path_min_score", 2.0),
+            lexical_min_score=self.hybrid_conf.get("lexical_min_score", 1.0),
+        )
+
+    def get_lexical_index(self):
+        """
+        Return the BM25 index, opening it on first use. A DB built before the
+        index existed is backfilled from the chunks already stored in Chroma.
+        The collection itself decides this, since such a DB may also predate the
+        manifest.
+        """
+        with self.lexical_lock:
+            if self.lexical_index is None:
+                self.lexical_index = LexicalIndex(self.lexical_path)
+                stored = None if len(self.lexical_index) else self.get_db().get(include=["documents", "metadatas"])
+                if stored and stored["documents"]:
+                    from langchain_core.documents import Document
+                    self.lexical_index.add_documents([
+                        Document(page_content=text, metadata=metadata or {})
+                        for text, metadata in zip(stored["documents"], stored["metadatas"])
+                    ])
+                    print(f"[VectorDBManager] Backfilled lexical index with {len(self.lexical_index)} chunks")
+            return self.lexical_index
+
+    def add_chunks(self, db, chunks):
+        """Insert chunks into the vector store and the lexical index."""
+        # Opened first, so a backfill from the store cannot pick up these chunks too
+        lexical_index = self.get_lexical_index() if self.hybrid else None
+        db.add_documents(chunks)
+        if lexical_index is not None:
+            lexical_index.add_documents(chunks)
+        self.notify_change({chunk.metadata.get("source") for chunk in chunks})
+
+    def delete_chunks(self, db, paths):
+        """Remove every chunk of `paths` from the vector store and the lexical index."""
+        db.delete(where={"source": {"$in": list(paths)}})
+        if self.hybrid:
+            self.get_lexical_index().delete_sources(paths)
+        self.notify_change(paths)
+
+    def add_change_listener(self, callback):
+        """Register `callback(paths)` to hear about indexed content changes, e.g. to drop cached answers."""
+        self.change_listeners.append(callback)
+
+    def notify_change(self, paths):
+        for callback in self.change_listeners:
+            callback(None if paths is None else set(paths))
+
     # Single-file update
     def upsert_file(self, file_path: str):
         """
         Replace all previous entries for a file and insert the updated version.
         Safe to call multiple times — ensures no duplicate vectors.
+        Writes are queued and applied in batches; call flush() to read your writes.
         """
-        db = Chroma(
-            embedding_function=self.embeddings,
-            persist_directory=str(self.persist_dir),
-        )
+        self.queue_write(file_path, "upsert")
 
-        # 1. Delete existing vectors by metadata match
-        db.delete(where={"source": file_path})
-        # print(f"[VectorDBManager] Cleared existing entries for {file_path}")
+    def delete_file(self, file_path: str):
+        """Remove all entries for a file that no longer exists."""
+        self.queue_write(file_path, "delete")
 
-        # 2. Load new content
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-        )
-        _loader = TextLoader(file_path, encoding="utf-8")
-        _docs = _loader.load()
-        _chunks = splitter.split_documents(_docs)
-        db.add_documents(_chunks)
+    def queue_write(self, file_path: str, action: str):
+        file_path = os.path.normpath(file_path)
+        with self.write_condition:
+            if not self.pending_writes:
+                self.pending_since = time.monotonic()
+            # Later writes to the same file replace earlier ones
+            self.pending_writes.pop(file_path, None)
+            self.pending_writes[file_path] = action
+            if self.write_behind and self.flusher is None:
+                self.flusher = threading.Thread(target=self._flush_loop, name="vector-db-flusher", daemon=True)
+                self.flusher.start()
+                atexit.register(self.flush)
+            self.write_condition.notify_all()
+
+        if not self.write_behind:
+            self.flush()
+
+    def flush(self):
+        """
+        Apply every queued write: one batched delete of the affected files'
+        entries followed by one batched insert of their new chunks.
+        Returns the number of files written.
+        """
+        with self.flush_lock:
+            with self.write_condition:
+                writes = list(self.pending_writes.items())
+                self.pending_writes.clear()
+            if not writes:
+                return 0
+
+            try:
+                return self.apply_writes(writes)
+            except Exception:
+                self.requeue_writes(writes)
+                raise
+
+    def requeue_writes(self, writes):
+        """Put back writes that failed to apply, unless a newer write for the same file was queued meanwhile."""
+        with self.write_condition:
+            newer = list(self.pending_writes.items())
+            self.pending_writes.clear()
+            for path, action in writes:
+                self.pending_writes[path] = action
+            for path, action in newer:
+                self.pending_writes.pop(path, None)
+                self.pending_writes[path] = action
+            self.pending_since = time.monotonic()
+            self.write_condition.notify_all()
+
+    def apply_writes(self, writes):
+        """Delete the old entries of `writes` and insert their new chunks. Returns the number of files."""
+        with span("upsert", files=len(writes)) as upsert:
+            chunks = []
+            records = {}
+            removed = []
+            for path, action in writes:
+                if action == "upsert" and os.path.isfile(path):
+                    try:
+                        records[path] = self.file_record(path)
+                        file_chunks = self.get_splitter().split_documents(list(self.custom_loader(path).lazy_load()))
+                    except Exception as e:
+                        print(f"[VectorDBManager] Skipping {path}: {e}")
+                        records.pop(path, None)
+                        continue
+                    for chunk in file_chunks:
+                        chunk.metadata["source"] = path
+                    chunks.extend(file_chunks)
+                else:
+                    removed.append(path)
+
+            upsert.set(chunks=len(chunks))
+            db = self.get_db()
+            paths = list(records) + removed
+            if paths:
+                self.delete_chunks(db, paths)
+            if chunks:
+                self.add_chunks(db, chunks)
+
+            with self.manifest_lock:
+                self.manifest.update(records)
+                for path in removed:
+                    self.manifest.pop(path, None)
+                self.save_manifest()
+            return len(writes)
 
-        # print(f"[VectorDBManager] Updated DB with {len(_chunks)} chunks from {file_path}")
+    def _flush_loop(self):
+        """Flush when max_batch files are queued or flush_interval has passed."""
+        while True:
+            with self.write_condition:
+                while not self.pending_writes:
+                    self.write_condition.wait()
+                deadline = self.pending_since + self.flush_interval
+                while self.pending_writes and len(self.pending_writes) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.write_condition.wait(remaining)
+                if not self.pending_writes:
+                    # Flushed by someone else meanwhile
+                    continue
+            try:
+                self.flush()
+            except Exception as e:
+                # The writes are back in the queue; retry after a full interval
+                print(f"[VectorDBManager] Background flush failed, retrying in {self.flush_interval}s: {e}")
+                time.sleep(self.flush_interval)
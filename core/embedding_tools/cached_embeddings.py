@@ -0,0 +1,128 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from langchain_core.embeddings import Embeddings
+
+class CachedEmbeddings(Embeddings):
+    """
+    Persistent embedding cache wrapping any LangChain `Embeddings` backend.
+
+    Vectors are keyed by (provider, model, sha256(text)) and stored as packed
+    float32 blobs in a local SQLite file, so re-embedding unchanged chunks costs
+    a lookup instead of a backend call. Cache misses are sent to the backend in
+    batches of `batch_size`, and the least recently used vectors are evicted
+    once the cache holds more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        provider: str,
+        model: str,
+        path: str,
+        max_entries: int = 500000,
+        batch_size: int = 256,
+    ):
+        self.embeddings = embeddings
+        self.provider = provider
+        self.model = model
+        self.max_entries = max_entries
+        self.batch_size = max(1, batch_size)
+        self.hits = 0
+        self.misses = 0
+
+        parent = os.path.dirname(path)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "provider TEXT, model TEXT, text_hash TEXT, vector BLOB, accessed REAL, "
+            "PRIMARY KEY (provider, model, text_hash))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)")
+        self.db.commit()
+
+    def embed_documents(self, texts):
+        return self.embed(texts, "", self.embeddings.embed_documents)
+
+    def embed_query(self, text):
+        # Backends may embed queries differently (e.g. a "query: " prefix), so queries
+        # go through embed_query and are keyed apart from documents with the same text
+        return self.embed([text], "query\0", lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    def embed(self, texts, namespace, embed_batch):
+        """Cached vectors for `texts`, keyed under `namespace`; misses go to `embed_batch`."""
+        hashes = [hashlib.sha256((namespace + text).encode("utf-8")).hexdigest() for text in texts]
+        found = self.lookup(set(hashes))
+
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in found and text_hash not in missing:
+                missing[text_hash] = text
+
+        with self.lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        pending = list(missing.items())
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i:i + self.batch_size]
+            vectors = embed_batch([text for _, text in batch])
+            new_entries = {text_hash: vector for (text_hash, _), vector in zip(batch, vectors)}
+            self.store(new_entries)
+            found.update(new_entries)
+
+        return [list(found[text_hash]) for text_hash in hashes]
+
+    def lookup(self, hashes):
+        """Return {text_hash: vector} for the hashes already in the cache."""
+        found = {}
+        hashes = list(hashes)
+        now = time.time()
+        with self.lock:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE provider = ? AND model = ? "
+                    f"AND text_hash IN ({placeholders})",
+                    [self.provider, self.model] + batch,
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+            if found:
+                self.db.executemany(
+                    "UPDATE embeddings SET accessed = ? WHERE provider = ? AND model = ? AND text_hash = ?",
+                    [(now, self.provider, self.model, text_hash) for text_hash in found],
+                )
+                self.db.commit()
+        return found
+
+    def store(self, entries):
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (provider, model, text_hash, vector, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (self.provider, self.model, text_hash, array("f", vector).tobytes(), now)
+                    for text_hash, vector in entries.items()
+                ],
+            )
+            count = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self.db.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY accessed ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -1,7 +1,6 @@
 import os
+import threading
 from core.config.settings_loader import Settings
-from langchain_fireworks import FireworksEmbeddings
-from langchain.embeddings import OllamaEmbeddings
 
 class EmbeddingProvider:
     """
@@ -13,28 +12,60 @@ class EmbeddingProvider:
       - FIREWORKS
 
     The design allows easy extension to support additional providers in the future.
+
+    When `memory.embedding.cache.enabled` is set, the backend is wrapped in a
+    persistent CachedEmbeddings so unchanged chunks are never re-embedded.
     """
     def __init__(self, settings: Settings, agent_name: str):
         self.agent_conf = settings.load_agent_config(agent_name)
+        self.embedding_conf = self.agent_conf["memory"]["embedding"]
+
+        # Built on first use, backends and langchain are slow to import
+        self.embeddings = None
+        self.lock = threading.Lock()
+
+    def get_provider(self):
+        with self.lock:
+            if self.embeddings is None:
+                self.embeddings = self.build()
+            return self.embeddings
 
-        embedding_conf = self.agent_conf["memory"]["embedding"]
+    def build(self):
+        embedding_conf = self.embedding_conf
         provider = embedding_conf["provider"]
         model = embedding_conf["model"]
         api_key_name = embedding_conf["api_key_name"]
-        self.embeddings = None
+        embeddings = None
         
+        # Backends are imported only when selected
         if provider == "OLLAMA":
-            self.embeddings = OllamaEmbeddings(model=model)
+            from langchain_community.embeddings import OllamaEmbeddings
+            embeddings = OllamaEmbeddings(model=model)
         elif provider == "FIREWORKS":
-            self.embeddings = FireworksEmbeddings(
+            from langchain_fireworks import FireworksEmbeddings
+            embeddings = FireworksEmbeddings(
                 model=model,
                 fireworks_api_key=os.getenv(api_key_name)
             )
         elif "@" in provider:
-            self.embeddings = OllamaEmbeddings(
+            from langchain_community.embeddings import OllamaEmbeddings
+            embeddings = OllamaEmbeddings(
                 base_url= provider.split("@")[1],
                 model=model
             )
 
-    def get_provider(self):
-        return self.embeddings
\ No newline at end of file
+        cache_conf = embedding_conf.get("cache") or {}
+        if embeddings is not None and cache_conf.get("enabled", False):
+            from core.embedding_tools.cached_embeddings import CachedEmbeddings
+            embeddings = CachedEmbeddings(
+                embeddings,
+                provider=provider,
+                model=model,
+                path=cache_conf.get("path", "./vector_db/embedding_cache.sqlite"),
+                max_entries=cache_conf.get("max_entries", 500000),
+                batch_size=cache_conf.get("batch_size", 256),
+            )
+        if embeddings is not None:
+            from core.embedding_tools.traced_embeddings import TracedEmbeddings
+            embeddings = TracedEmbeddings(embeddings)
+        return embeddings
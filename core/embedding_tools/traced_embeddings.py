@@ -0,0 +1,16 @@
+from langchain_core.embeddings import Embeddings
+from core.utils.tracing import span
+
+class TracedEmbeddings(Embeddings):
+    """Records an `embedding` span for every call to the wrapped backend."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts):
+        with span("embedding", texts=len(texts)):
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        with span("embedding", texts=1):
+            return self.embeddings.embed_query(text)
@@ -5,40 +5,83 @@ from core.embedding_tools.embedding_provider import EmbeddingProvider
 from core.db_tools.vector_db_provider import VectorDBProvider
 from core.llm_tools.llm_chat_provider import LLMChatProvider
 from core.llm_tools.llm_chat_completion_provider import LLMChatCompletionProvider
+from core.utils.tool_scheduler import ToolScheduler
+from core.memory_tools.conversation_memory import ConversationMemory
+from core.memory_tools.semantic_cache import SemanticQueryCache
+from core.factory.agent_pool import AgentPool
+from core.factory.provider_registry import ProviderRegistry
+from core.utils.tracing import get_tracer
 
 class AgentFactory:
     def __init__(self, settings=None):
         self.settings = settings or Settings()
+        # Providers are shared across agents with the same effective config
+        self.registry = ProviderRegistry(self.settings)
+        # Spans and token counters are process-wide, see core/utils/tracing.py
+        get_tracer().configure(self.settings.get("tracing"))
 
     def create_base_agent(self, agent_name: str):
-        project_root_provider = ProjectRootProvider(self.settings, agent_name)
-        embedding_provider = EmbeddingProvider(self.settings, agent_name)
-        vector_db_provider = VectorDBProvider(self.settings, agent_name, embedding_provider)
-        llm_chat_provider = LLMChatProvider(self.settings, agent_name)
-        llm_chat_completion_provider = LLMChatCompletionProvider(self.settings, agent_name)
+        project_root_provider = self.registry.get(ProjectRootProvider, agent_name)
+        embedding_provider = self.registry.get(EmbeddingProvider, agent_name)
+        vector_db_provider = self.registry.get(VectorDBProvider, agent_name, embedding_provider)
+        vector_db_provider.start_watching()
+        llm_chat_provider = self.registry.get(LLMChatProvider, agent_name)
+        llm_chat_completion_provider = self.registry.get(LLMChatCompletionProvider, agent_name)
+        tool_scheduler = self.registry.get(ToolScheduler, agent_name)
+        memory = ConversationMemory(self.settings, agent_name, llm_chat_completion_provider)
+        query_cache = self.registry.get(SemanticQueryCache, agent_name, vector_db_provider)
         
         return BaseAgent(
             project_root_provider, 
             vector_db_provider, 
             llm_chat_provider, 
             llm_chat_completion_provider, 
-            agent_name
+            agent_name,
+            tool_scheduler,
+            memory,
+            query_cache,
+            self.tool_mode(agent_name),
+            self.model_roles(agent_name)
         )
     
+    def create_vector_db_provider(self, agent_name: str):
+        """Build only the vector DB side of an agent, e.g. for offline ingestion."""
+        embedding_provider = self.registry.get(EmbeddingProvider, agent_name)
+        return self.registry.get(VectorDBProvider, agent_name, embedding_provider)
+
     def create_document_checker_agent(self):
-        project_root_provider = ProjectRootProvider(self.settings, "document_checker_agent")
-        embedding_provider = EmbeddingProvider(self.settings, "document_checker_agent")
-        vector_db_provider = VectorDBProvider(self.settings, "document_checker_agent", embedding_provider)
-        llm_chat_provider = LLMChatProvider(self.settings, "document_checker_agent")
-        llm_chat_completion_provider = LLMChatCompletionProvider(self.settings, "document_checker_agent")
+        return self.create_document_checker_agents(1)[0]
+
+    def create_document_checker_agents(self, count: int):
+        """
+        Create `count` checker instances that share one set of providers
+        (LLM clients, vector DB) but each keep their own message state.
+        """
+        project_root_provider = self.registry.get(ProjectRootProvider, "document_checker_agent")
+        embedding_provider = self.registry.get(EmbeddingProvider, "document_checker_agent")
+        vector_db_provider = self.registry.get(VectorDBProvider, "document_checker_agent", embedding_provider)
+        llm_chat_provider = self.registry.get(LLMChatProvider, "document_checker_agent")
+        llm_chat_completion_provider = self.registry.get(LLMChatCompletionProvider, "document_checker_agent")
+        output_conf = self.settings.load_agent_config("document_checker_agent").get("output")
         
-        return DocumentCheckerAgent(
-            project_root_provider, 
-            vector_db_provider, 
-            llm_chat_provider, 
-            llm_chat_completion_provider, 
-            "document_checker_agent"
-        )
+        return [
+            DocumentCheckerAgent(
+                project_root_provider, 
+                vector_db_provider, 
+                llm_chat_provider, 
+                llm_chat_completion_provider, 
+                "document_checker_agent",
+                output_conf
+            )
+            for _ in range(count)
+        ]
+
+    def create_document_checker_pool(self):
+        """Pool of checker agents sized by service.pool_size in the checker config."""
+        agent_conf = self.settings.load_agent_config("document_checker_agent")
+        pool_size = (agent_conf.get("service") or {}).get("pool_size", 4)
+        agents = self.create_document_checker_agents(pool_size)
+        return AgentPool(self.settings, "document_checker_agent", agents)
 
     def hybridize_base_agent(
         self, 
@@ -48,16 +91,37 @@ class AgentFactory:
         llm_chat_provider_config: str,
         llm_chat_completion_provider_config: str
     ):
-        project_root_provider = ProjectRootProvider(self.settings, project_root_provider_config)
-        embedding_provider = EmbeddingProvider(self.settings, embedding_provider_config)
-        vector_db_provider = VectorDBProvider(self.settings, vector_db_provider_config, embedding_provider)
-        llm_chat_provider = LLMChatProvider(self.settings, llm_chat_provider_config)
-        llm_chat_completion_provider = LLMChatCompletionProvider(self.settings, llm_chat_completion_provider_config)
+        project_root_provider = self.registry.get(ProjectRootProvider, project_root_provider_config)
+        embedding_provider = self.registry.get(EmbeddingProvider, embedding_provider_config)
+        vector_db_provider = self.registry.get(VectorDBProvider, vector_db_provider_config, embedding_provider)
+        vector_db_provider.start_watching()
+        llm_chat_provider = self.registry.get(LLMChatProvider, llm_chat_provider_config)
+        llm_chat_completion_provider = self.registry.get(LLMChatCompletionProvider, llm_chat_completion_provider_config)
+        # Tools operate on the project root, so follow its config
+        tool_scheduler = self.registry.get(ToolScheduler, project_root_provider_config)
+        memory = ConversationMemory(self.settings, project_root_provider_config, llm_chat_completion_provider)
+        # Cached answers depend on the indexed documents, so follow the vector DB config
+        query_cache = self.registry.get(SemanticQueryCache, vector_db_provider_config, vector_db_provider)
 
         return BaseAgent(
             project_root_provider, 
             vector_db_provider, 
             llm_chat_provider, 
             llm_chat_completion_provider, 
-            "hybrid_agent"
-        )
\ No newline at end of file
+            "hybrid_agent",
+            tool_scheduler,
+            memory,
+            query_cache,
+            self.tool_mode(llm_chat_completion_provider_config),
+            self.model_roles(llm_chat_completion_provider_config)
+        )
+
+    def tool_mode(self, agent_name: str):
+        """tools.mode from the agent config: "prompt" (default) or "native" function calling."""
+        tools_conf = self.settings.load_agent_config(agent_name).get("tools") or {}
+        return tools_conf.get("mode", "prompt")
+
+    def model_roles(self, agent_name: str):
+        """llm.roles from the agent config: router/generator/rag model names and escalate."""
+        llm_conf = self.settings.load_agent_config(agent_name).get("llm") or {}
+        return llm_conf.get("roles") or {}
\ No newline at end of file
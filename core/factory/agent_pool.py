@@ -0,0 +1,142 @@
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from core.config.settings_loader import Settings
+
+class PoolSaturatedError(Exception):
+    """Raised when every agent is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Agent pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AgentPool:
+    """
+    Async pool of agent instances for request handlers.
+
+    At most one request runs on an agent at a time, so each instance keeps its
+    own message state. The number of agents caps in-flight work. Up to
+    `max_waiting` further requests queue for a free agent. Requests beyond
+    that, or ones that wait longer than `wait_timeout_seconds`, fail fast with
+    PoolSaturatedError, which carries a Retry-After estimate.
+
+    Configured from the agent YAML:
+
+        service:
+          pool_size: 4
+          max_waiting: 32
+          wait_timeout_seconds: 30
+    """
+
+    def __init__(self, settings: Settings, agent_name: str, agents: list):
+        self.agent_conf = settings.load_agent_config(agent_name)
+        service_conf = self.agent_conf.get("service") or {}
+        self.agents = list(agents)
+        self.max_waiting = service_conf.get("max_waiting", 32)
+        self.wait_timeout = service_conf.get("wait_timeout_seconds", 30)
+
+        # Idle agents, and futures of queued requests (oldest first) that
+        # release() hands agents to before they become idle again
+        self.free = list(self.agents)
+        self.waiters = deque()
+        self.in_flight = 0
+        self.rejected = 0
+        self.avg_seconds = 1.0
+
+    def size(self):
+        return len(self.agents)
+
+    @property
+    def waiting(self):
+        return len(self.waiters)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow an agent for the duration of the `async with` block. Waiters are served in arrival order."""
+        agent, start = await self.checkout()
+        try:
+            yield agent
+        finally:
+            self.checkin(agent, start)
+
+    async def checkout(self):
+        """Take an agent, waiting in line if none is free. Returns (agent, start time) for checkin()."""
+        if self.free and not self.waiters:
+            agent = self.free.pop()
+        else:
+            agent = await self.wait_for_agent()
+        self.in_flight += 1
+        return agent, time.monotonic()
+
+    def checkin(self, agent, start):
+        elapsed = time.monotonic() - start
+        self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * elapsed
+        self.in_flight -= 1
+        self.release(agent)
+
+    async def wait_for_agent(self):
+        if len(self.waiters) >= self.max_waiting:
+            self.rejected += 1
+            raise PoolSaturatedError(self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        try:
+            # asyncio.wait() does not cancel the future on timeout, so an agent
+            # handed over at the same moment is never lost
+            await asyncio.wait([future], timeout=self.wait_timeout)
+        except BaseException:
+            self.abandon(future)
+            raise
+        if not future.done():
+            self.abandon(future)
+            self.rejected += 1
+            raise PoolSaturatedError(self.retry_after())
+        return future.result()
+
+    def abandon(self, future):
+        """Withdraw a waiter, passing on an agent it was handed but never used."""
+        if future.done():
+            self.release(future.result())
+        else:
+            future.cancel()
+            self.waiters.remove(future)
+
+    def release(self, agent):
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(agent)
+                return
+        self.free.append(agent)
+
+    async def run(self, func, *args):
+        """Run blocking `func(agent, *args)` on a borrowed agent in a worker thread."""
+        agent, start = await self.checkout()
+        task = asyncio.ensure_future(asyncio.to_thread(func, agent, *args))
+
+        def done(task):
+            # A cancelled request cannot stop the worker thread, so the agent
+            # only goes back to the pool once the thread has finished
+            self.checkin(agent, start)
+            if not task.cancelled():
+                task.exception()
+
+        task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained."""
+        backlog = self.waiting + self.in_flight + 1
+        return max(1, int(round(self.avg_seconds * backlog / max(1, self.size()))))
+
+    def stats(self):
+        return {
+            "size": self.size(),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "avg_seconds": self.avg_seconds,
+        }
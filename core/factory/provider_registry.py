@@ -0,0 +1,66 @@
+import json
+import threading
+from core.config.settings_loader import Settings
+from core.config.project_root_provider import ProjectRootProvider
+from core.embedding_tools.embedding_provider import EmbeddingProvider
+from core.db_tools.vector_db_provider import VectorDBProvider
+from core.llm_tools.llm_chat_provider import LLMChatProvider
+from core.llm_tools.llm_chat_completion_provider import LLMChatCompletionProvider
+from core.utils.tool_scheduler import ToolScheduler
+from core.memory_tools.semantic_cache import SemanticQueryCache
+
+class ProviderRegistry:
+    """
+    Shares provider instances between agents whose effective config is the same.
+
+    A provider is identified by its class, the parts of the agent config it
+    actually reads, and the providers it was built on. Agents with different
+    names but the same LLM endpoint, embedding model or vector DB therefore
+    share one OpenAI client, ChatOpenAI, embeddings object or Chroma handle.
+
+    Per-agent state (messages, ConversationMemory) is never registered here.
+    """
+
+    # Config sections each provider reads, as paths into the agent YAML
+    config_sections = {
+        ProjectRootProvider: (("project_root",),),
+        EmbeddingProvider: (("memory", "embedding"),),
+        VectorDBProvider: (("project_root",), ("memory", "vector_db")),
+        LLMChatProvider: (("llm", "chat"),),
+        LLMChatCompletionProvider: (("llm", "chat_completion"),),
+        ToolScheduler: (("tools",),),
+        SemanticQueryCache: (("memory", "vector_db", "query_cache"),),
+    }
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.instances = {}
+        self.lock = threading.RLock()
+
+    def get(self, provider_cls, agent_name: str, *dependencies):
+        """Return the shared `provider_cls(settings, agent_name, *dependencies)` for this config."""
+        key = self.make_key(provider_cls, agent_name, dependencies)
+        with self.lock:
+            instance = self.instances.get(key)
+            if instance is None:
+                instance = provider_cls(self.settings, agent_name, *dependencies)
+                self.instances[key] = instance
+            return instance
+
+    def make_key(self, provider_cls, agent_name: str, dependencies):
+        agent_conf = self.settings.load_agent_config(agent_name)
+        sections = []
+        for path in self.config_sections[provider_cls]:
+            node = agent_conf
+            for part in path:
+                node = node.get(part) if isinstance(node, dict) else None
+            sections.append(node)
+        # Dependencies are registry instances themselves, so identity is stable
+        return (
+            provider_cls.__name__,
+            json.dumps(sections, sort_keys=True, default=str),
+            tuple(id(dependency) for dependency in dependencies),
+        )
+
+    def __len__(self):
+        return len(self.instances)
@@ -0,0 +1,171 @@
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from core.config.settings_loader import Settings
+from core.utils.document_chunker import split_blocks, strip_chunk
+
+class CheckResultCache:
+    """
+    Cache of document check results keyed by content hash.
+
+    Keys cover the checker model and system prompt, so changing either one
+    invalidates earlier results. Identical requests that arrive together share
+    one in-flight check (`single_flight`). Results are also recorded per
+    paragraph, so an edited document only needs its changed paragraphs checked.
+
+    Configured from the agent YAML:
+
+        service:
+          result_cache:
+            enabled: true
+            max_entries: 10000
+            ttl_seconds: 86400
+    """
+
+    def __init__(self, settings: Settings, agent_name: str, model: str, system_prompt: str):
+        self.agent_conf = settings.load_agent_config(agent_name)
+        cache_conf = (self.agent_conf.get("service") or {}).get("result_cache") or {}
+        self.enabled = cache_conf.get("enabled", True)
+        self.max_entries = cache_conf.get("max_entries", 10000)
+        self.ttl_seconds = cache_conf.get("ttl_seconds")
+        self.prefix = hashlib.sha256(f"{model}\0{system_prompt}".encode("utf-8")).hexdigest()
+
+        self.entries = OrderedDict()  # key -> (result, seconds to compute, created)
+        self.lock = threading.Lock()
+        self.in_flight = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.paragraph_hits = 0
+        self.saved_seconds = 0.0
+
+    def make_key(self, text: str):
+        return hashlib.sha256(f"{self.prefix}\0{text.strip()}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str):
+        """Cached result for `text`, or None. Counts toward the hit rate."""
+        result = self._lookup(self.make_key(text))
+        with self.lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def put(self, text: str, result: dict, seconds: float):
+        if not self.enabled:
+            return
+        with self.lock:
+            key = self.make_key(text)
+            self.entries[key] = (result, seconds, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _lookup(self, key: str):
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            result, seconds, created = entry
+            if self.ttl_seconds is not None and time.time() - created > self.ttl_seconds:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            self.saved_seconds += seconds
+            return result
+
+    async def single_flight(self, text: str, compute):
+        """
+        Await `compute(text)` once for all concurrent callers with the same text
+        and cache what it returns. Callers check `get` first. The computation
+        runs as its own task, so a caller that is cancelled (e.g. a client
+        disconnecting) only stops its own wait, not the others'.
+        """
+        key = self.make_key(text)
+        task = self.in_flight.get(key)
+        if task is not None:
+            with self.lock:
+                self.shared += 1
+        else:
+            task = asyncio.ensure_future(self._compute(key, text, compute))
+            # Mark the error retrieved when every caller has stopped waiting
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, text: str, compute):
+        start = time.monotonic()
+        try:
+            result = await compute(text)
+        finally:
+            del self.in_flight[key]
+        self.store_document(text, result, time.monotonic() - start)
+        return result
+
+    # Paragraph-level reuse
+    def store_document(self, text: str, result: dict, seconds: float):
+        """
+        Cache `result` for `text` and, where the result maps cleanly onto
+        paragraphs, for each paragraph too: a passing document passes every
+        paragraph, and a failing one is mapped when its suggested edit keeps the
+        same paragraph structure.
+        """
+        self.put(text, result, seconds)
+        blocks = [block for block in split_blocks(text) if block.strip()]
+        if len(blocks) < 2:
+            return
+
+        if result.get("verdict"):
+            edits = [""] * len(blocks)
+        else:
+            edits = [block for block in split_blocks(result.get("suggested_edit") or "") if block.strip()]
+            if len(edits) != len(blocks):
+                return
+
+        total = max(1, len(text))
+        for block, edit in zip(blocks, edits):
+            _, original, _ = strip_chunk(block)
+            edit = edit.strip()
+            verdict = not edit or edit == original
+            self.put(
+                original,
+                {"verdict": verdict, "suggested_edit": "" if verdict else edit},
+                seconds * len(block) / total,
+            )
+
+    def lookup_paragraphs(self, text: str):
+        """
+        Split `text` into paragraphs and return (blocks, results), where results
+        holds the cached result per block or None where the block must be checked.
+        """
+        blocks = split_blocks(text)
+        results = []
+        for block in blocks:
+            _, content, _ = strip_chunk(block)
+            if not content:
+                results.append({"verdict": True, "suggested_edit": ""})
+                continue
+            result = self._lookup(self.make_key(content))
+            if result is not None:
+                with self.lock:
+                    self.paragraph_hits += 1
+            results.append(result)
+        return blocks, results
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "shared_in_flight": self.shared,
+                "paragraph_hits": self.paragraph_hits,
+                "latency_saved_seconds": round(self.saved_seconds, 3),
+            }
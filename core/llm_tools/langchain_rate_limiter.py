@@ -0,0 +1,17 @@
+import asyncio
+from langchain_core.rate_limiters import BaseRateLimiter
+from core.llm_tools.rate_limiter import RateLimiter
+
+class LangChainRateLimiter(BaseRateLimiter):
+    """Adapter so LangChain chat models draw from a shared RateLimiter."""
+
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        self.limiter.acquire_token()
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        await asyncio.to_thread(self.limiter.acquire_token)
+        return True
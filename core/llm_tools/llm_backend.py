@@ -0,0 +1,115 @@
+import threading
+from collections import deque
+from core.config.settings_loader import Settings
+from core.llm_tools.rate_limiter import get_rate_limiter, parse_retry_after
+
+class BackendStats:
+    """Request outcomes and recent latencies (seconds to answer / first token) of one backend."""
+
+    def __init__(self, window: int = 256):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.wins = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def started(self):
+        with self.lock:
+            self.requests += 1
+
+    def answered(self, seconds: float):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def won(self):
+        with self.lock:
+            self.wins += 1
+
+    def failed(self):
+        with self.lock:
+            self.errors += 1
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled += 1
+
+    def summary(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            summary = {
+                "requests": self.requests,
+                "wins": self.wins,
+                "errors": self.errors,
+                "cancelled": self.cancelled,
+            }
+        if latencies:
+            summary["p50_seconds"] = round(latencies[len(latencies) // 2], 4)
+            summary["p95_seconds"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4)
+        return summary
+
+
+class LLMBackend:
+    """
+    One OpenAI-compatible chat completion endpoint: its model, lazily created
+    client, the process-wide rate limiter for its base_url and latency stats.
+    """
+
+    def __init__(self, settings: Settings, conf: dict):
+        self.model = conf["model"]
+        self.base_url = conf["base_url"]
+        self.api_key = settings.resolve_api_key(conf["api_key_name"])
+
+        self.client = None
+        self.client_lock = threading.Lock()
+
+        # Process-wide limiter shared by every provider using this backend
+        self.rate_limiter = get_rate_limiter(self.base_url, conf)
+        self.max_retries = (conf.get("rate_limit") or {}).get("max_retries", 5)
+        self.stats = BackendStats()
+
+    def get_client(self):
+        with self.client_lock:
+            if self.client is None:
+                from openai import OpenAI
+                # Retries are handled in send() so they go through the shared rate limiter
+                self.client = OpenAI(
+                    base_url=self.base_url,
+                    api_key=self.api_key,
+                    max_retries=0,
+                )
+            return self.client
+
+    def send(self, hold_slot: bool = False, **kwargs):
+        """
+        Issue a single chat completion request through the shared rate limiter.
+        Only this HTTP request is retried when the backend answers with a 429.
+        """
+        from openai import RateLimitError
+        client = self.get_client()
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = client.chat.completions.create(**kwargs)
+            except RateLimitError as e:
+                self.rate_limiter.release()
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.rate_limiter.backoff(parse_retry_after(e.response.headers))
+                print(f"[LLMChatCompletionProvider] Rate limited by {self.base_url}, retrying in {delay:.1f}s...")
+                continue
+            except Exception:
+                self.rate_limiter.release()
+                raise
+
+            self.rate_limiter.success()
+            if not hold_slot:
+                self.rate_limiter.release()
+            return response
+
+    def close_stream(self, stream):
+        """Close a stream opened with hold_slot=True and give back its in-flight slot."""
+        try:
+            stream.close()
+        finally:
+            self.rate_limiter.release()
@@ -1,10 +1,31 @@
-from openai import OpenAI
-from langchain_openai import ChatOpenAI
 from core.config.settings_loader import Settings
+from core.llm_tools.llm_backend import LLMBackend
+from core.llm_tools.response_cache import ResponseCache
+from core.utils.tracing import get_tracer
 import time
+import queue
+import threading
 
 class LLMChatCompletionProvider:
     """
+    Chat completions against the configured backend, optionally hedged across
+    redundant backends:
+
+        llm:
+          chat_completion:
+            model: ...                # primary backend
+            base_url: ...
+            hedge:
+              delay_seconds: 2.0      # send a duplicate once the primary is this late
+              backends:               # tried in order, each with its own model
+                - model: "accounts/fireworks/models/llama-v3p1-8b-instruct"
+                  base_url: "https://api.fireworks.ai/inference/v1"
+                  api_key_name: "FW_TOKEN"
+
+    If a backend has not answered (or, when streaming, sent its first token)
+    within the delay, or has failed, the request is also sent to the next one.
+    The first answer wins; the others are closed or, for blocking requests
+    already in flight, abandoned. See backend_stats() for tuning the delay.
     """
 
     def __init__(self, settings: Settings, agent_name: str):
@@ -14,23 +35,34 @@ class LLMChatCompletionProvider:
 
         comp_conf = self.agent_conf["llm"]["chat_completion"]
 
-        self.comp_api_key = settings.resolve_api_key(comp_conf["api_key_name"])
+        # Primary backend first, then hedge backends in order
+        hedge_conf = comp_conf.get("hedge") or {}
+        self.backends = [LLMBackend(settings, comp_conf)]
+        self.backends += [LLMBackend(settings, conf) for conf in hedge_conf.get("backends") or []]
+        self.hedge_delay = hedge_conf.get("delay_seconds", 2.0)
+        primary = self.backends[0]
 
         # Store configurations
-        self.comp_model = comp_conf["model"]
-        self.comp_base = comp_conf["base_url"]
+        self.comp_api_key = primary.api_key
+        self.comp_model = primary.model
+        self.comp_base = primary.base_url
+        self.rate_limiter = primary.rate_limiter
+        self.max_retries = primary.max_retries
 
-        # Raw client (for completions or advanced calls)
-        self.client = OpenAI(
-            base_url=self.comp_base,
-            api_key=self.comp_api_key,
-        )
-
-        self.rate_limit_chat_completions = self.agent_conf["llm"]["chat_completion"]["rate_limit_seconds"]
+        # Opt-in cache for deterministic (temperature 0) responses
+        self.response_cache = None
+        cache_conf = comp_conf.get("cache") or {}
+        if cache_conf.get("enabled", False):
+            self.response_cache = ResponseCache(
+                max_entries=cache_conf.get("max_entries", 1024),
+                ttl_seconds=cache_conf.get("ttl_seconds"),
+                sqlite_path=cache_conf.get("sqlite_path"),
+                disk_max_entries=cache_conf.get("disk_max_entries", 100000),
+            )
 
     def get_client(self):
-        """Return raw OpenAI client instance."""
-        return self.client
+        """Return raw OpenAI client instance of the primary backend."""
+        return self.backends[0].get_client()
 
     # Chat Completion Helpers
     def chat_completion(
@@ -39,19 +71,272 @@ class LLMChatCompletionProvider:
         temperature: float = 0.0,
         max_tokens: int = 1024,
         model: str = None,
+        tools: list = None,
+        response_format: dict = None,
     ) -> str:
         """
         Perform a chat completion request using the raw OpenAI client.
+        `tools` are OpenAI-style function definitions for native tool calling, and
+        `response_format` requests JSON mode or schema-constrained output.
+        Temperature 0 responses are served from the response cache when enabled.
         """
-        time.sleep(self.rate_limit_chat_completions)
+        model = model or self.comp_model
+        extra = {"tools": tools} if tools else {}
+        if response_format:
+            extra["response_format"] = response_format
+        tracer = get_tracer()
+        with tracer.span("chat_completion", model=model) as span:
+            cache_key = None
+            if self.response_cache is not None and temperature == 0.0:
+                cache_key = self.response_cache.make_key(
+                    model, self.comp_base, messages, temperature=temperature, max_tokens=max_tokens, **extra
+                )
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    span.set(cached=True)
+                    from openai.types.chat import ChatCompletion
+                    return ChatCompletion.model_validate_json(cached)
 
-        response = self.client.chat.completions.create(
-            model=model or self.comp_model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        return response
+            index, response = self.request(
+                model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra,
+            )
+            tracer.record_usage(self.model_for(index, model), response.usage)
+
+            # Cache keys name the primary backend's model, so only its answers are stored
+            if cache_key is not None and index == 0:
+                self.response_cache.put(cache_key, response.model_dump_json())
+            return response
+
+    def cache_stats(self):
+        """Return response cache hit/miss counters, or None if caching is disabled."""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.stats()
+
+    def stream_chat_completion(
+        self,
+        messages: list,
+        temperature: float = 0.0,
+        max_tokens: int = 1024,
+        model: str = None,
+    ):
+        """
+        Perform a streaming chat completion request and yield content deltas
+        as they are generated.
+        """
+        model = model or self.comp_model
+        tracer = get_tracer()
+        # Backends only report usage for streams when asked to, on an extra last chunk
+        extra = {"stream_options": {"include_usage": True}} if tracer.enabled else {}
+        with tracer.detached_span("chat_completion_stream", model=model) as span:
+            # Keep the in-flight slot until the stream is fully consumed
+            index, chunks = self.open_stream(
+                model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra,
+            )
+            try:
+                for chunk in chunks:
+                    # Backends that report usage send it on the last chunk
+                    if getattr(chunk, "usage", None) is not None:
+                        tracer.record_usage(self.model_for(index, model), chunk.usage, span)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                chunks.close()
+
+    def send(self, hold_slot: bool = False, **kwargs):
+        """Issue a single chat completion request to the primary backend."""
+        return self.backends[0].send(hold_slot=hold_slot, **kwargs)
+
+    def backend_stats(self):
+        """Per-backend requests, wins, errors, cancellations and p50/p95 latency."""
+        return {backend.base_url: backend.stats.summary() for backend in self.backends}
+
+    # Hedging
+    def model_for(self, index, model):
+        # An explicit model only applies to the primary; other backends name models differently
+        return model if index == 0 else self.backends[index].model
+
+    def request(self, model, **kwargs):
+        """
+        Blocking request, hedged when more than one backend is configured.
+        Returns (index of the winning backend, response).
+        """
+        if len(self.backends) == 1:
+            backend = self.backends[0]
+            backend.stats.started()
+            start = time.monotonic()
+            try:
+                response = backend.send(model=model, **kwargs)
+            except Exception:
+                backend.stats.failed()
+                raise
+            backend.stats.answered(time.monotonic() - start)
+            backend.stats.won()
+            return 0, response
+
+        answers = queue.Queue()
+        winner = []
+
+        def attempt(index):
+            backend = self.backends[index]
+            backend.stats.started()
+            start = time.monotonic()
+            try:
+                response = backend.send(model=self.model_for(index, model), **kwargs)
+            except Exception as e:
+                backend.stats.failed()
+                answers.put((index, None, e))
+                return
+            backend.stats.answered(time.monotonic() - start)
+            if winner and winner[0] != index:
+                # Lost the race; the response is dropped
+                backend.stats.cancel()
+            answers.put((index, response, None))
+
+        response = self.race(attempt, answers, winner)
+        return winner[0], response
+
+    def open_stream(self, model, **kwargs):
+        """
+        Open a stream, hedged on time to first token when more than one backend
+        is configured. Returns (index of the winning backend, chunk generator).
+        The in-flight slot is held until the generator is consumed or closed.
+        """
+        if len(self.backends) == 1:
+            backend = self.backends[0]
+            backend.stats.started()
+            start = time.monotonic()
+            try:
+                stream = backend.send(hold_slot=True, model=model, stream=True, **kwargs)
+            except Exception:
+                backend.stats.failed()
+                raise
+            backend.stats.won()
+
+            def relay():
+                try:
+                    first = True
+                    for chunk in stream:
+                        if first:
+                            backend.stats.answered(time.monotonic() - start)
+                            first = False
+                        yield chunk
+                finally:
+                    backend.close_stream(stream)
+            return 0, relay()
+
+        answers = queue.Queue()
+        winner = []
+        lock = threading.Lock()
+        streams = {}  # index -> open stream; whoever pops one closes it
+
+        def close_losers():
+            with lock:
+                losers = [(i, streams.pop(i)) for i in list(streams) if i != winner[0]]
+            for i, stream in losers:
+                self.backends[i].stats.cancel()
+                self.backends[i].close_stream(stream)
+
+        def attempt(index):
+            backend = self.backends[index]
+            backend.stats.started()
+            start = time.monotonic()
+            try:
+                stream = backend.send(hold_slot=True, model=self.model_for(index, model), stream=True, **kwargs)
+            except Exception as e:
+                backend.stats.failed()
+                answers.put((index, None, e))
+                return
+            with lock:
+                lost = bool(winner)
+                if not lost:
+                    streams[index] = stream
+            if lost:
+                backend.stats.cancel()
+                backend.close_stream(stream)
+                return
+
+            chunks = iter(stream)
+            buffered = []
+            try:
+                for chunk in chunks:
+                    buffered.append(chunk)
+                    if chunk.choices:
+                        break
+            except Exception as e:
+                with lock:
+                    owned = streams.pop(index, None) is not None
+                if owned:
+                    # Closed by close_losers() otherwise, which counts it as cancelled
+                    backend.stats.failed()
+                    backend.close_stream(stream)
+                    answers.put((index, None, e))
+                return
+            backend.stats.answered(time.monotonic() - start)
+            answers.put((index, (stream, chunks, buffered), None))
+            if winner and winner[0] != index:
+                close_losers()
+
+        stream, chunks, buffered = self.race(attempt, answers, winner)
+        close_losers()
+        backend = self.backends[winner[0]]
+        with lock:
+            streams.pop(winner[0], None)
+
+        def relay():
+            try:
+                yield from buffered
+                yield from chunks
+            finally:
+                backend.close_stream(stream)
+        return winner[0], relay()
+
+    def race(self, attempt, answers, winner):
+        """
+        Start `attempt(0)`, and the next backend's attempt whenever `hedge_delay`
+        passes without an answer or a running attempt fails. Returns the first
+        successful answer and records its backend index in `winner`; re-raises
+        the last error when every backend failed.
+        """
+        launched = 0
+        running = 0
+        error = None
+        hedge = True
+        while True:
+            if hedge and launched < len(self.backends):
+                threading.Thread(target=attempt, args=(launched,), daemon=True, name="llm-hedge").start()
+                launched += 1
+                running += 1
+            hedge = False
+            if running == 0:
+                raise error
+            try:
+                timeout = self.hedge_delay if launched < len(self.backends) else None
+                index, response, exc = answers.get(timeout=timeout)
+            except queue.Empty:
+                # No answer within the delay: also ask the next backend
+                hedge = True
+                continue
+            running -= 1
+            if exc is not None:
+                # Fail over right away instead of waiting out the delay
+                error = exc
+                hedge = True
+                continue
+            winner.append(index)
+            self.backends[index].stats.won()
+            return response
 
     def structured_chat(
         self,
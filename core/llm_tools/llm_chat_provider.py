@@ -1,7 +1,6 @@
-from openai import OpenAI
-from langchain_openai import ChatOpenAI
 from core.config.settings_loader import Settings
-import time
+from core.llm_tools.rate_limiter import get_rate_limiter
+import threading
 
 class LLMChatProvider:
     """
@@ -19,17 +18,26 @@ class LLMChatProvider:
         self.chat_model = llm_conf["model"]
         self.chat_base = llm_conf["base_url"]
 
-        # LangChain-compatible Chat LLM
-        self.chat_llm = ChatOpenAI(
-            model=self.chat_model,
-            openai_api_base=self.chat_base,
-            openai_api_key=self.llm_api_key,
-        )
+        # Process-wide limiter shared by every provider using this backend
+        self.rate_limiter = get_rate_limiter(self.chat_base, llm_conf)
 
-        self.rate_limit_chat_completions = self.agent_conf["llm"]["chat_completion"]["rate_limit_seconds"]
+        # LangChain-compatible Chat LLMs per model, built on first use (langchain_openai is slow to import)
+        self.chat_llms = {}
+        self.chat_llm_lock = threading.Lock()
 
     # Public Accessors
-    def get_chat_llm(self):
-        """Return LangChain Chat LLM instance."""
-        return self.chat_llm
+    def get_chat_llm(self, model: str = None):
+        """Return LangChain Chat LLM instance, for `model` or the configured chat model."""
+        model = model or self.chat_model
+        with self.chat_llm_lock:
+            if model not in self.chat_llms:
+                from langchain_openai import ChatOpenAI
+                from core.llm_tools.langchain_rate_limiter import LangChainRateLimiter
+                self.chat_llms[model] = ChatOpenAI(
+                    model=model,
+                    openai_api_base=self.chat_base,
+                    openai_api_key=self.llm_api_key,
+                    rate_limiter=LangChainRateLimiter(self.rate_limiter),
+                )
+            return self.chat_llms[model]
 
@@ -0,0 +1,174 @@
+import time
+import random
+import threading
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter with a cap on in-flight requests and adaptive backoff.
+
+    - tokens_per_second: sustained request rate (None/0 for unlimited)
+    - burst: number of requests that may start back to back after an idle period
+    - max_in_flight: maximum concurrent requests (None/0 for unlimited)
+
+    On a 429 the limiter pauses every caller until the server's Retry-After
+    (or an exponentially growing delay) has passed and halves its rate. The rate
+    recovers gradually as requests succeed again.
+    """
+
+    def __init__(
+        self,
+        tokens_per_second: float = None,
+        burst: int = 1,
+        max_in_flight: int = None,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self.lock = threading.Lock()
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff_seconds = 0.0
+        self.explicit = False
+        self.slots = threading.Condition()
+        self.active = 0
+        self.configure(tokens_per_second, burst, max_in_flight, max_backoff_seconds)
+
+    def configure(
+        self,
+        tokens_per_second: float = None,
+        burst: int = 1,
+        max_in_flight: int = None,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self.base_rate = tokens_per_second or None
+        self.rate = self.base_rate
+        self.burst = max(1, int(burst or 1))
+        self.tokens = float(self.burst)
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_in_flight = max_in_flight or None
+        with self.slots:
+            self.slots.notify_all()
+
+    def acquire_token(self):
+        """Block until the bucket allows one more request to start."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.rate is None:
+                        return
+                    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def acquire(self):
+        """Take an in-flight slot and a rate token. Pair with `release`."""
+        with self.slots:
+            while self.max_in_flight is not None and self.active >= self.max_in_flight:
+                self.slots.wait()
+            self.active += 1
+        try:
+            self.acquire_token()
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        with self.slots:
+            self.active -= 1
+            self.slots.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold an in-flight slot and a rate token for the duration of one request."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def backoff(self, retry_after: float = None):
+        """Record a rate-limit response and pause new requests accordingly."""
+        with self.lock:
+            now = time.monotonic()
+            self.backoff_seconds = min(self.max_backoff_seconds, max(1.0, self.backoff_seconds * 2))
+            if retry_after is None:
+                delay = self.backoff_seconds + random.random()
+            else:
+                delay = min(self.max_backoff_seconds, retry_after)
+            self.blocked_until = max(self.blocked_until, now + delay)
+            if self.rate is not None:
+                self.rate = max(self.base_rate / 16, self.rate / 2)
+            self.tokens = 0.0
+            self.updated = now
+            return delay
+
+    def success(self):
+        """Record a successful request, relaxing any earlier backoff."""
+        with self.lock:
+            self.backoff_seconds /= 2
+            if self.rate is not None and self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate * 1.25)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(base_url: str, conf: dict) -> RateLimiter:
+    """
+    Return the process-wide limiter for `base_url`.
+
+    `conf` is an agent's llm.chat / llm.chat_completion section. An explicit
+    `rate_limit` block configures the limiter; otherwise the legacy
+    `rate_limit_seconds` is used as one request per that many seconds. An
+    explicit block takes precedence over a limiter created from legacy settings.
+    """
+    limit_conf = conf.get("rate_limit")
+    explicit = limit_conf is not None
+    if not explicit:
+        seconds = conf.get("rate_limit_seconds") or 0.0
+        limit_conf = {"tokens_per_second": 1.0 / seconds if seconds > 0 else None}
+    params = (
+        limit_conf.get("tokens_per_second"),
+        limit_conf.get("burst", 1),
+        limit_conf.get("max_in_flight"),
+        limit_conf.get("max_backoff_seconds", 60.0),
+    )
+
+    with _limiters_lock:
+        limiter = _limiters.get(base_url)
+        if limiter is None:
+            limiter = RateLimiter(*params)
+            _limiters[base_url] = limiter
+        elif explicit and not limiter.explicit:
+            with limiter.lock:
+                limiter.configure(*params)
+        limiter.explicit = limiter.explicit or explicit
+        return limiter
+
+def parse_retry_after(headers) -> float:
+    """Parse Retry-After / retry-after-ms response headers into seconds."""
+    if headers is None:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
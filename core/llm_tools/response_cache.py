@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    Two-tier cache for deterministic (temperature 0) chat completion responses.
+
+    - Memory tier: LRU bounded by `max_entries`.
+    - Disk tier (optional): SQLite database at `sqlite_path`, bounded by
+      `disk_max_entries` with least-recently-used eviction.
+
+    Entries older than `ttl_seconds` are treated as misses in both tiers.
+    Values are stored as serialized strings so any tier can hold them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = None,
+        sqlite_path: str = None,
+        disk_max_entries: int = 100000,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self.db = None
+        if sqlite_path:
+            parent = os.path.dirname(sqlite_path)
+            if parent and not os.path.exists(parent):
+                os.makedirs(parent)
+            self.db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self.db.commit()
+
+    def make_key(self, model: str, base_url: str, messages: list, **params):
+        """Hash everything that determines a deterministic response."""
+        payload = json.dumps(
+            {"model": model, "base_url": base_url, "messages": messages, "params": params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self.expired(created):
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.memory[key]
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self.expired(created):
+                        self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+                        self.db.commit()
+                        self._remember(key, value, created)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self.lock:
+            self._remember(key, value, now)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                count = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.disk_max_entries:
+                    self.db.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                        (count - self.disk_max_entries,),
+                    )
+                self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM responses")
+                self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
+
+    # Internal helpers
+    def _remember(self, key, value, created):
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
@@ -0,0 +1,152 @@
+import threading
+from core.config.settings_loader import Settings
+
+class ConversationMemory:
+    """
+    Keeps the conversation history sent with each request within a token budget.
+
+    - The most recent `keep_recent_messages` are sent verbatim (as long as they fit).
+    - Older messages larger than `max_message_tokens` (generated files, RAG output,
+      modify requests carrying a whole document) are shrunk to a short reference.
+    - Messages that no longer fit the budget are dropped from the history and,
+      when `summarize` is on, folded into a running summary in the background.
+
+    Configured from the agent YAML:
+
+        memory:
+          conversation:
+            max_tokens: 6000
+            keep_recent_messages: 8
+            max_message_tokens: 400
+            summarize: false
+            tokenizer: "approx"    # or "tiktoken"
+    """
+
+    def __init__(self, settings: Settings, agent_name: str, llm_chat_completion_provider=None):
+        self.agent_conf = settings.load_agent_config(agent_name)
+        conv_conf = (self.agent_conf.get("memory") or {}).get("conversation") or {}
+
+        self.max_tokens = conv_conf.get("max_tokens", 6000)
+        self.keep_recent_messages = conv_conf.get("keep_recent_messages", 8)
+        self.max_message_tokens = conv_conf.get("max_message_tokens", 400)
+        self.summarize = conv_conf.get("summarize", False) and llm_chat_completion_provider is not None
+        self.llm_chat_completion_provider = llm_chat_completion_provider
+
+        self.encoding = None
+        if conv_conf.get("tokenizer", "approx") == "tiktoken":
+            try:
+                import tiktoken
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                print(f"[ConversationMemory] tiktoken unavailable ({e}), using approximate counts")
+        self.token_cache = {}
+
+        self.summary = ""
+        self.unsummarized = []
+        self.summary_lock = threading.Lock()
+        self.summarizer = None
+
+    # Token counting
+    def count_tokens(self, content: str) -> int:
+        if self.encoding is None:
+            return len(content) // 4 + 1
+        count = self.token_cache.get(content)
+        if count is None:
+            count = len(self.encoding.encode(content, disallowed_special=()))
+            if len(self.token_cache) > 4096:
+                self.token_cache.clear()
+            self.token_cache[content] = count
+        return count
+
+    def message_tokens(self, message) -> int:
+        return self.count_tokens(message.get("content") or "") + 4
+
+    def truncate(self, content: str, max_tokens: int) -> str:
+        """The first `max_tokens` tokens of `content`."""
+        if self.encoding is None:
+            return content[: max(0, max_tokens - 1) * 4]
+        return self.encoding.decode(self.encoding.encode(content, disallowed_special=())[:max_tokens])
+
+    # History window
+    def window(self, messages: list, prune: bool = False) -> list:
+        """
+        Return the messages to send for `messages` within the token budget.
+        With `prune`, messages that can never be sent again are also removed
+        from `messages` in place (and summarized when enabled), so callers
+        should hold whatever lock guards the list.
+        """
+        budget = self.max_tokens
+        selected = []
+        recent_start = max(0, len(messages) - self.keep_recent_messages)
+        cut = 0
+
+        for i in range(len(messages) - 1, -1, -1):
+            message = messages[i]
+            if i < recent_start:
+                message = self.shrink(message)
+            tokens = self.message_tokens(message)
+            if tokens > budget and selected:
+                cut = i + 1
+                break
+            budget -= tokens
+            selected.append(message)
+
+        selected.reverse()
+        if cut and prune:
+            self.forget(messages[:cut])
+            del messages[:cut]
+
+        with self.summary_lock:
+            summary = self.summary
+        if summary:
+            selected.insert(0, {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        return selected
+
+    def shrink(self, message):
+        """Replace a large message with a short reference to its content."""
+        content = message.get("content") or ""
+        tokens = self.count_tokens(content)
+        if tokens <= self.max_message_tokens:
+            return message
+        head = self.truncate(content.strip(), self.max_message_tokens)
+        return {
+            "role": message["role"],
+            "content": f"{head}\n[... {tokens} tokens of earlier content omitted]",
+        }
+
+    # Background summary
+    def forget(self, dropped):
+        if not self.summarize or not dropped:
+            return
+        with self.summary_lock:
+            self.unsummarized.extend(self.shrink(m) for m in dropped)
+            if self.summarizer is None:
+                self.summarizer = threading.Thread(target=self._summarize, name="memory-summarizer", daemon=True)
+                self.summarizer.start()
+
+    def _summarize(self):
+        while True:
+            with self.summary_lock:
+                if not self.unsummarized:
+                    self.summarizer = None
+                    return
+                dropped = self.unsummarized
+                self.unsummarized = []
+                summary = self.summary
+
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m in dropped)
+            try:
+                resp = self.llm_chat_completion_provider.structured_chat(
+                    "You maintain a short running summary of a conversation between a user and an "
+                    "AI agent. Keep facts, file names, decisions and open requests. Respond only "
+                    "with the updated summary, at most a few short paragraphs.",
+                    f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}",
+                    max_tokens=512,
+                )
+                new_summary = resp.choices[0].message.content.strip()
+            except Exception as e:
+                print(f"[ConversationMemory] Summarization failed: {e}")
+                continue
+
+            with self.summary_lock:
+                self.summary = new_summary
@@ -0,0 +1,135 @@
+import time
+import threading
+from collections import OrderedDict
+from core.config.settings_loader import Settings
+
+def numpy():
+    """numpy, imported on first use."""
+    import numpy as np
+    return np
+
+class SemanticQueryCache:
+    """
+    Answer cache for query_rag keyed by query meaning rather than exact text.
+
+    A query's embedding is compared with the embeddings of earlier queries; when
+    the best cosine similarity reaches `similarity_threshold`, the stored answer
+    and source documents are returned without retrieval or an LLM call.
+
+    Queries the retriever answers from the lexical index alone (identifier
+    lookups) use `exact` lookups instead: only the same query text matches, so
+    they never pay for an embedding call.
+
+    Entries are dropped when one of their source documents changes (the cache
+    listens to the VectorDBProvider) or on a rebuild, and evicted LRU with a TTL.
+
+    Configured from the agent YAML:
+
+        memory:
+          vector_db:
+            query_cache:
+              enabled: true
+              similarity_threshold: 0.95
+              max_entries: 256
+              ttl_seconds: 3600
+    """
+
+    def __init__(self, settings: Settings, agent_name: str, vector_db_provider):
+        self.agent_conf = settings.load_agent_config(agent_name)
+        cache_conf = self.agent_conf["memory"]["vector_db"].get("query_cache") or {}
+        self.enabled = cache_conf.get("enabled", False)
+        self.similarity_threshold = cache_conf.get("similarity_threshold", 0.95)
+        self.max_entries = cache_conf.get("max_entries", 256)
+        self.ttl_seconds = cache_conf.get("ttl_seconds", 3600)
+
+        self.vector_db_provider = vector_db_provider
+        self.entries = OrderedDict()  # id -> (embedding or None, response, sources, created, query)
+        self.next_id = 0
+        self.generation = 0  # bumped on every invalidation
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            vector_db_provider.add_change_listener(self.invalidate)
+
+    def embed(self, query: str):
+        np = numpy()
+        vector = np.asarray(self.vector_db_provider.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query: str, exact: bool = False):
+        """
+        Return (response, ticket). `response` is the cached answer for a similar
+        enough query or None; on a miss, pass `ticket` to `store` with the answer.
+        With `exact`, only an earlier identical query matches and nothing is embedded.
+        """
+        query = query.strip()
+        embedding = None if exact else self.embed(query)
+        with self.lock:
+            ticket = (embedding, query, self.generation)
+            self.expire()
+            best_id, best_score = None, -1.0
+            if exact:
+                best_id = next((i for i, entry in self.entries.items() if entry[4] == query), None)
+                best_score = 1.0
+            else:
+                ids = [i for i, entry in self.entries.items() if entry[0] is not None]
+                if ids:
+                    np = numpy()
+                    scores = np.stack([self.entries[i][0] for i in ids]) @ embedding
+                    best = int(np.argmax(scores))
+                    best_id, best_score = ids[best], float(scores[best])
+
+            if best_id is None or best_score < self.similarity_threshold:
+                self.misses += 1
+                return None, ticket
+            self.entries.move_to_end(best_id)
+            self.hits += 1
+            return self.entries[best_id][1], ticket
+
+    def store(self, ticket, response: dict):
+        embedding, query, generation = ticket
+        sources = {doc.metadata.get("source") for doc in response.get("source_documents") or []}
+        with self.lock:
+            if generation != self.generation:
+                # Documents changed while the answer was being generated
+                return
+            self.entries[self.next_id] = (embedding, response, sources, time.monotonic(), query)
+            self.next_id += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def expire(self):
+        """Drop entries older than ttl_seconds. Caller must hold the lock."""
+        if self.ttl_seconds is None:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        for entry_id in [i for i, entry in self.entries.items() if entry[3] < cutoff]:
+            del self.entries[entry_id]
+
+    def invalidate(self, paths=None):
+        """
+        Drop answers built from any of `paths`, or everything when `paths` is None.
+        Answers that found no sources are dropped too, since new content may now match.
+        """
+        with self.lock:
+            self.generation += 1
+            if paths is None:
+                self.entries.clear()
+                return
+            paths = set(paths)
+            stale = [i for i, entry in self.entries.items() if not entry[2] or entry[2] & paths]
+            for entry_id in stale:
+                del self.entries[entry_id]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,94 @@
+import re
+
+# Blank lines and markdown headings start a new block
+BLOCK_BOUNDARY = re.compile(r"\n[ \t]*\n|\n(?=#{1,6} )")
+
+def split_blocks(text: str):
+    """Split `text` into paragraphs/sections. Each block keeps its trailing separator."""
+    blocks = []
+    start = 0
+    for match in BLOCK_BOUNDARY.finditer(text):
+        blocks.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        blocks.append(text[start:])
+    return blocks
+
+def split_long_block(block: str, max_chars: int):
+    """Split a block larger than `max_chars` on line boundaries, then hard-split long lines."""
+    pieces = []
+    for line in block.splitlines(keepends=True):
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if line:
+            pieces.append(line)
+    return pieces
+
+def split_document(text: str, max_chars: int = 4000):
+    """
+    Split a document into chunks of at most `max_chars`, cutting on paragraph or
+    section boundaries where possible. Joining the chunks gives back `text` exactly.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces = []
+    for block in split_blocks(text):
+        if len(block) > max_chars:
+            pieces.extend(split_long_block(block, max_chars))
+        else:
+            pieces.append(block)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def strip_chunk(chunk: str):
+    """Split a chunk into (leading whitespace, content, trailing whitespace)."""
+    content = chunk.strip()
+    if not content:
+        return chunk, "", ""
+    lead = chunk[:len(chunk) - len(chunk.lstrip())]
+    trail = chunk[len(chunk.rstrip()):]
+    return lead, content, trail
+
+def merge_chunk_results(chunks, results):
+    """
+    Merge per-chunk checker results back into one result for the document.
+
+    `results` holds, per chunk, the parsed {"verdict", "suggested_edit"} dict or an
+    Exception. A failed chunk keeps its original text in the reassembled edit and
+    is reported under `errors`; the verdict covers the chunks that were checked.
+    """
+    edits = []
+    verdicts = []
+    errors = []
+    for i, (chunk, result) in enumerate(zip(chunks, results)):
+        lead, content, trail = strip_chunk(chunk)
+        if isinstance(result, Exception):
+            errors.append(f"chunk {i}: {type(result).__name__}: {result}")
+            edits.append(chunk)
+            continue
+        verdict = bool(result.get("verdict"))
+        verdicts.append(verdict)
+        edit = (result.get("suggested_edit") or "").strip()
+        if verdict or not edit:
+            edits.append(chunk)
+        else:
+            edits.append(lead + edit + trail)
+
+    verdict = all(verdicts) if verdicts else None
+    return {
+        "verdict": verdict,
+        "suggested_edit": "".join(edits) if verdict is False else "",
+        "chunks": len(chunks),
+        "errors": errors,
+    }
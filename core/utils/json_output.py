@@ -0,0 +1,38 @@
+import re
+import json
+import json_repair
+
+THINK_BLOCK = re.compile(r"<think>.*?(</think>|$)", re.DOTALL)
+CODE_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
+def strip_reasoning(text: str) -> str:
+    """Drop `<think>...</think>` blocks (reasoning models) and surrounding code fences."""
+    if "<think>" in text:
+        text = THINK_BLOCK.sub("", text)
+    return CODE_FENCE.sub("", text.strip())
+
+def extract_json_object(text: str) -> dict:
+    """
+    Recover the JSON object from a model reply. Tries, cheapest first: the
+    whole reply, the outermost `{...}` span, then json_repair on that span.
+    Raises ValueError when no object can be recovered.
+    """
+    text = strip_reasoning(text or "")
+    try:
+        value = json.loads(text)
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+
+    start, end = text.find("{"), text.rfind("}")
+    candidate = text[start:end + 1] if start != -1 and end > start else text[start:] if start != -1 else ""
+    if not candidate:
+        raise ValueError("no JSON object in model output")
+    try:
+        value = json.loads(candidate)
+    except ValueError:
+        value = json_repair.loads(candidate)
+    if not isinstance(value, dict) or not value:
+        raise ValueError("no JSON object in model output")
+    return value
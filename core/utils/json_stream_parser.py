@@ -0,0 +1,44 @@
+class JsonMapStreamParser:
+    """
+    Incrementally extracts root-level JSON maps from a stream of text.
+
+    Text can be fed in arbitrary pieces (e.g. streamed tokens). Each root map is
+    returned by `feed` as soon as its closing brace arrives. Braces inside JSON
+    strings, including escaped quotes, do not affect nesting. Text outside of
+    maps (commas, prose, whitespace) is ignored.
+    """
+
+    def __init__(self):
+        self.current = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text: str):
+        maps = []
+        for ch in text:
+            if self.depth == 0:
+                if ch == '{':
+                    self.depth = 1
+                    self.current = [ch]
+                continue
+
+            self.current.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    maps.append("".join(self.current))
+                    self.current = []
+
+        return maps
@@ -0,0 +1,168 @@
+import re
+import json
+import inspect
+import json_repair
+from typing import get_type_hints
+
+ARGUMENT_LINE = re.compile(r"^\s*(\w+)\s*(?:\([^)]*\))?\s*:\s*(.*)$")
+
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+class ToolArgumentError(ValueError):
+    """Raised when tool call arguments are missing or cannot be coerced to the tool's hints."""
+
+
+def coerce_bool(value):
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "yes", "1"):
+            return True
+        if lowered in ("false", "no", "0", ""):
+            return False
+        raise ValueError(f"not a boolean: {value!r}")
+    return bool(value)
+
+def coerce_json(kind):
+    def coerce(value):
+        if isinstance(value, str):
+            value = json_repair.loads(value)
+        if not isinstance(value, kind):
+            raise ValueError(f"not a {kind.__name__}: {value!r}")
+        return value
+    return coerce
+
+def coerce_str(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+COERCERS = {
+    str: coerce_str,
+    int: lambda value: int(value) if not isinstance(value, str) else int(value.strip()),
+    float: float,
+    bool: coerce_bool,
+    list: coerce_json(list),
+    dict: coerce_json(dict),
+}
+
+def parse_docstring(doc: str):
+    """Split a tool docstring into (description, {argument: description})."""
+    doc = inspect.cleandoc(doc or "No description.")
+    description, _, rest = doc.partition("Arguments:")
+    arguments = {}
+    current = None
+    for line in rest.splitlines():
+        match = ARGUMENT_LINE.match(line)
+        if match:
+            current = match.group(1)
+            arguments[current] = match.group(2).strip()
+        elif current and line.strip():
+            arguments[current] = f"{arguments[current]} {line.strip()}".strip()
+    return description.strip(), arguments
+
+
+class CompiledTool:
+    """
+    One tool, inspected once: its JSON-schema definition and an argument binder
+    that maps a parsed `arguments` dict onto keyword arguments, coercing each
+    value to the parameter's type hint.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.doc = (func.__doc__ or "No description.").strip()
+        self.description, argument_docs = parse_docstring(func.__doc__)
+
+        hints = get_type_hints(func)
+        self.params = []  # (name, type, coerce, required)
+        properties = {}
+        required = []
+        for name, param in inspect.signature(func).parameters.items():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            kind = hints.get(name, str)
+            is_required = param.default is inspect.Parameter.empty
+            self.params.append((name, kind, COERCERS.get(kind), is_required))
+            properties[name] = {"type": JSON_TYPES.get(kind, "string")}
+            if name in argument_docs:
+                properties[name]["description"] = argument_docs[name]
+            if is_required:
+                required.append(name)
+
+        self.definition = {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": {"type": "object", "properties": properties, "required": required},
+            },
+        }
+
+    def bind(self, arguments):
+        """Return keyword arguments for `func`; unknown arguments are ignored."""
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError(f"{self.name}: arguments must be a JSON object, got {arguments!r}")
+        kwargs = {}
+        for name, kind, coerce, required in self.params:
+            if name not in arguments:
+                if required:
+                    raise ToolArgumentError(f"{self.name}: missing argument '{name}'")
+                continue
+            value = arguments[name]
+            if coerce is not None and value is not None:
+                try:
+                    value = coerce(value)
+                except (TypeError, ValueError) as e:
+                    raise ToolArgumentError(f"{self.name}: argument '{name}' should be {kind.__name__}: {e}")
+            kwargs[name] = value
+        return kwargs
+
+    def __call__(self, arguments):
+        return self.func(**self.bind(arguments))
+
+
+class ToolRegistry:
+    """
+    Tools compiled once at agent construction, replacing per-call
+    `inspect.signature` lookups.
+
+    - `descriptions()` is the name/description/arguments list pasted into
+      routing prompts (same shape as `build_tools_from_functions`)
+    - `definitions()` are OpenAI-compatible `tools` for native function calling
+    - `call(name, arguments)` binds, coerces and runs a tool
+    """
+
+    def __init__(self, funcs):
+        self.tools = {}
+        for func in funcs:
+            tool = CompiledTool(func)
+            self.tools[tool.name] = tool
+        self._definitions = [tool.definition for tool in self.tools.values()]
+
+    def __contains__(self, name):
+        return name in self.tools
+
+    def __getitem__(self, name):
+        return self.tools[name]
+
+    def lookup(self):
+        return {name: tool.func for name, tool in self.tools.items()}
+
+    def descriptions(self):
+        return [
+            {
+                "name": tool.name,
+                "description": tool.doc,
+                "arguments": {name: kind.__name__ for name, kind, _, _ in tool.params},
+            }
+            for tool in self.tools.values()
+        ]
+
+    def definitions(self):
+        return self._definitions
+
+    def call(self, name, arguments):
+        return self.tools[name](arguments)
@@ -0,0 +1,170 @@
+import os
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from core.config.settings_loader import Settings
+
+
+class ToolScheduler:
+    """
+    Runs parsed tool calls concurrently while respecting their dependencies.
+
+    A call that touches a path (e.g. `create_document("a/b.py")`) waits for every
+    earlier call touching the same path or one of its ancestors/descendants
+    (e.g. `create_directory("a")`). Calls without a path run independently,
+    except barrier tools such as `query_rag`, which wait for every earlier
+    call that touches a path so they observe its writes.
+
+    Configured from the agent YAML:
+
+        tools:
+          max_workers: 4
+    """
+    path_arguments = ("relative_path", "filename")
+    barrier_tools = ("query_rag",)
+
+    def __init__(self, settings: Settings, agent_name: str):
+        self.agent_conf = settings.load_agent_config(agent_name)
+        tools_conf = self.agent_conf.get("tools") or {}
+        self.max_workers = max(1, int(tools_conf.get("max_workers", 4)))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"{agent_name}-tools",
+        )
+
+    def start(self, execute):
+        """
+        Open a batch whose calls are dispatched as they are submitted.
+        `execute(tool, arguments)` performs a single call.
+        """
+        return ToolBatch(self, execute)
+
+    def run(self, calls, execute):
+        """Run (tool, arguments) pairs and return their results in the original order."""
+        batch = self.start(execute)
+        for tool, arguments in calls:
+            batch.submit(tool, arguments)
+        return batch.results()
+
+    # Dependency helpers
+    def get_paths(self, arguments):
+        if not isinstance(arguments, dict):
+            return []
+        paths = []
+        for name in self.path_arguments:
+            value = arguments.get(name)
+            if isinstance(value, str) and value:
+                parts = [p for p in os.path.normpath(value).split(os.sep) if p not in ("", ".")]
+                paths.append(tuple(parts))
+        return paths
+
+    def depends_on(self, earlier, later):
+        """Return True if call `later` must wait for call `earlier`."""
+        earlier_tool, earlier_args = earlier
+        later_tool, later_args = later
+        earlier_paths = self.get_paths(earlier_args)
+        later_paths = self.get_paths(later_args)
+
+        if later_tool in self.barrier_tools:
+            return bool(earlier_paths) or earlier_tool in self.barrier_tools
+
+        for a in earlier_paths:
+            for b in later_paths:
+                n = min(len(a), len(b))
+                if a[:n] == b[:n]:
+                    return True
+        return False
+
+
+class ToolBatch:
+    """
+    A set of tool calls scheduled by a ToolScheduler. Each call is launched on the
+    scheduler's worker pool once all of its dependencies have finished. A call
+    whose dependency failed is not run and fails with the same error; calls
+    that do not depend on it are unaffected.
+    """
+
+    def __init__(self, scheduler: ToolScheduler, execute):
+        self.scheduler = scheduler
+        self.execute = execute
+        self.lock = threading.Lock()
+        self.calls = []
+        self.futures = []
+        # Context of each submitter, so tracing spans nest under the caller's
+        self.contexts = []
+        self.waiting_on = []
+        self.dependents = []
+        # Error of each call, or of the dependency that made it fail
+        self.errors = []
+
+    def submit(self, tool, arguments):
+        """Schedule a call and return its index in the batch."""
+        with self.lock:
+            index = len(self.calls)
+            call = (tool, arguments)
+            deps = set()
+            error = None
+            for i, earlier in enumerate(self.calls):
+                if not self.scheduler.depends_on(earlier, call):
+                    continue
+                if not self.futures[i].done():
+                    deps.add(i)
+                elif error is None:
+                    error = self.futures[i].exception()
+            self.calls.append(call)
+            self.futures.append(Future())
+            self.contexts.append(contextvars.copy_context())
+            self.waiting_on.append(deps)
+            self.dependents.append([])
+            self.errors.append(error)
+            for i in deps:
+                self.dependents[i].append(index)
+            ready = not deps
+        if ready:
+            self._launch(index)
+        return index
+
+    def join(self):
+        """Wait for every call submitted so far, without raising their errors."""
+        wait(list(self.futures))
+
+    def results(self):
+        """
+        Wait for every call and return results in submission order. Raises the
+        first failed call's error, but only once every call has finished.
+        """
+        futures = list(self.futures)
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def _launch(self, index):
+        with self.lock:
+            error = self.errors[index]
+        if error is not None:
+            self.futures[index].set_exception(error)
+            self._release(index)
+            return
+        self.scheduler.executor.submit(self.contexts[index].run, self._run, index)
+
+    def _run(self, index):
+        tool, arguments = self.calls[index]
+        try:
+            self.futures[index].set_result(self.execute(tool, arguments))
+        except Exception as e:
+            with self.lock:
+                self.errors[index] = e
+            self.futures[index].set_exception(e)
+        self._release(index)
+
+    def _release(self, index):
+        ready = []
+        with self.lock:
+            error = self.errors[index]
+            for dependent in self.dependents[index]:
+                if error is not None and self.errors[dependent] is None:
+                    self.errors[dependent] = error
+                self.waiting_on[dependent].discard(index)
+                if not self.waiting_on[dependent]:
+                    ready.append(dependent)
+        for dependent in ready:
+            self._launch(dependent)
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import threading
+import contextvars
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+current_span = contextvars.ContextVar("current_span", default=None)
+
+class NullSpan:
+    """Returned while tracing is off, so instrumented code costs one attribute check."""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = (
+        "tracer", "name", "attrs", "detached", "trace_id", "span_id", "parent_id", "start", "started_at", "token",
+    )
+
+    def __init__(self, tracer, name, attrs, detached=False):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        # A detached span does not become the parent of spans opened while it
+        # is active; used inside generators, which run in their consumer's context
+        self.detached = detached
+        self.token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        parent = current_span.get()
+        self.span_id = self.tracer.next_id()
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        if not self.detached:
+            self.token = current_span.set(self)
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if self.token is not None:
+            current_span.reset(self.token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.finish(self, duration)
+        return False
+
+
+class Tracer:
+    """
+    Process-wide latency spans and token counters.
+
+    `span(stage)` times a block. Spans opened inside another span on the same
+    thread (or in a task/thread that copied its context) share its trace id, so
+    one agent turn can be followed from the LLM call through each tool. Per
+    stage, durations are aggregated into a histogram; `record_usage` adds a
+    response's `usage` to per-model prompt/completion token counters.
+
+    Finished spans are appended to `jsonl_path` when set, and `render_prometheus`
+    returns the aggregates in the Prometheus text format (see /metrics in
+    main_docs_service). Configured from settings.yaml:
+
+        tracing:
+          enabled: true
+          jsonl_path: "./traces/spans.jsonl"   # optional
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.ids = 0
+        self.jsonl_path = None
+        self.jsonl = None
+        self.buckets = DEFAULT_BUCKETS
+        self.conf = None
+        self.reset()
+
+    def configure(self, conf: dict = None):
+        """Apply a `tracing` config. Counters restart unless the config is unchanged."""
+        conf = conf or {}
+        with self.lock:
+            if conf == self.conf:
+                return
+            self.conf = dict(conf)
+            if self.jsonl is not None:
+                self.jsonl.close()
+                self.jsonl = None
+            self.enabled = bool(conf.get("enabled", False))
+            self.buckets = tuple(sorted(conf.get("buckets") or DEFAULT_BUCKETS))
+            self.jsonl_path = conf.get("jsonl_path") if self.enabled else None
+            if self.jsonl_path:
+                parent = os.path.dirname(self.jsonl_path)
+                if parent and not os.path.exists(parent):
+                    os.makedirs(parent)
+                self.jsonl = open(self.jsonl_path, "a", encoding="utf-8", buffering=1)
+            self.reset()
+
+    def reset(self):
+        self.stages = {}  # stage -> [count, total seconds, errors, bucket counts]
+        self.tokens = {}  # model -> [requests, prompt tokens, completion tokens]
+
+    def next_id(self):
+        with self.lock:
+            self.ids += 1
+            return f"{os.getpid():x}-{self.ids:x}"
+
+    # Recording
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def detached_span(self, name: str, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs, detached=True)
+
+    def finish(self, span, duration):
+        with self.lock:
+            stage = self.stages.get(span.name)
+            if stage is None:
+                stage = self.stages[span.name] = [0, 0.0, 0, [0] * len(self.buckets)]
+            stage[0] += 1
+            stage[1] += duration
+            if "error" in span.attrs:
+                stage[2] += 1
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    stage[3][i] += 1
+                    break
+            if self.jsonl is not None:
+                record = {
+                    "trace_id": span.trace_id,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start": span.started_at,
+                    "seconds": round(duration, 6),
+                    "attrs": span.attrs,
+                }
+                self.jsonl.write(json.dumps(record, default=str) + "\n")
+
+    def record_usage(self, model: str, usage, span=None):
+        """
+        Count a response's prompt/completion tokens for `model` (`usage` may be None)
+        and note them on `span`, by default the current one.
+        """
+        if not self.enabled or usage is None:
+            return
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        span = span or current_span.get()
+        if span is not None and span is not NULL_SPAN:
+            span.set(prompt_tokens=prompt, completion_tokens=completion)
+        with self.lock:
+            counts = self.tokens.setdefault(model, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += prompt
+            counts[2] += completion
+
+    # Export
+    def stats(self):
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "stages": {
+                    name: {"count": s[0], "seconds": round(s[1], 6), "errors": s[2]}
+                    for name, s in self.stages.items()
+                },
+                "tokens": {
+                    model: {"requests": t[0], "prompt": t[1], "completion": t[2]}
+                    for model, t in self.tokens.items()
+                },
+            }
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP agent_stage_seconds Time spent per stage.",
+            "# TYPE agent_stage_seconds histogram",
+        ]
+        with self.lock:
+            stages = {name: (s[0], s[1], s[2], list(s[3])) for name, s in self.stages.items()}
+            tokens = {model: list(t) for model, t in self.tokens.items()}
+
+        for name, (count, total, _, buckets) in sorted(stages.items()):
+            stage = label(name)
+            cumulative = 0
+            for bound, n in zip(self.buckets, buckets):
+                cumulative += n
+                lines.append(f'agent_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'agent_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'agent_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'agent_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        lines += ["# HELP agent_stage_errors_total Spans that ended with an exception.", "# TYPE agent_stage_errors_total counter"]
+        for name, (_, _, errors, _) in sorted(stages.items()):
+            lines.append(f'agent_stage_errors_total{{stage="{label(name)}"}} {errors}')
+
+        lines += ["# HELP llm_requests_total Chat completions with usage reported.", "# TYPE llm_requests_total counter"]
+        for model, (requests, _, _) in sorted(tokens.items()):
+            lines.append(f'llm_requests_total{{model="{label(model)}"}} {requests}')
+        lines += ["# HELP llm_tokens_total Tokens reported by the backend.", "# TYPE llm_tokens_total counter"]
+        for model, (_, prompt, completion) in sorted(tokens.items()):
+            lines.append(f'llm_tokens_total{{model="{label(model)}",kind="prompt"}} {prompt}')
+            lines.append(f'llm_tokens_total{{model="{label(model)}",kind="completion"}} {completion}')
+        return "\n".join(lines) + "\n"
+
+def label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+tracer = Tracer()
+
+def get_tracer() -> Tracer:
+    return tracer
+
+def span(name: str, **attrs):
+    """Time a block as stage `name`; a no-op while tracing is disabled."""
+    return tracer.span(name, **attrs)
@@ -0,0 +1,25 @@
+import argparse
+from core.factory.agent_factory import AgentFactory
+from core.db_tools.ingest_pipeline import IngestPipeline
+
+parser = argparse.ArgumentParser(description="Index an agent's documents into its vector DB.")
+parser.add_argument("agent", nargs="?", default="base_agent", help="agent config name (default: base_agent)")
+parser.add_argument("--source", help="directory to ingest (default: the agent's project_root)")
+parser.add_argument("--rebuild", action="store_true", help="purge the DB and re-ingest everything")
+parser.add_argument("--parse-workers", type=int, help="processes parsing files")
+parser.add_argument("--embed-workers", type=int, help="concurrent embedding/insert batches")
+parser.add_argument("--batch-size", type=int, help="chunks per embedding request")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    agent_factory = AgentFactory()
+    vector_db_provider = agent_factory.create_vector_db_provider(args.agent)
+    pipeline = IngestPipeline(
+        vector_db_provider,
+        parse_workers=args.parse_workers,
+        embed_workers=args.embed_workers,
+        batch_size=args.batch_size,
+    )
+    report = pipeline.run(args.source, rebuild=args.rebuild)
+    print(report)
@@ -1,12 +1,33 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 import uvicorn
+import time
+import asyncio
+from typing import List, Optional
 from pydantic import BaseModel
 from core.factory.agent_factory import AgentFactory
+from core.factory.agent_pool import PoolSaturatedError
+from agents.document_checker_agent import DocumentCheckerAgent, CheckOutputError
+from core.llm_tools.check_result_cache import CheckResultCache
+from core.utils.document_chunker import split_document, strip_chunk, merge_chunk_results
+from core.utils.tracing import get_tracer
 import json
 
-# Initialize agent
+# Initialize a pool of checker agents sharing the same providers
 agent_factory = AgentFactory()
-document_checker_agent = agent_factory.create_document_checker_agent()
+document_checker_pool = agent_factory.create_document_checker_pool()
+service_conf = document_checker_pool.agent_conf.get("service") or {}
+chunk_max_chars = service_conf.get("chunk_max_chars", 4000)
+batch_max_items = service_conf.get("batch_max_items", 64)
+
+# Results are keyed on the checker model and system prompt
+checker = document_checker_pool.agents[0]
+check_cache = CheckResultCache(
+    agent_factory.settings,
+    "document_checker_agent",
+    checker.llm_chat_completion_provider.comp_model,
+    checker.instruct_message_base[0]["content"],
+)
 
 app = FastAPI()
 
@@ -17,19 +38,193 @@ class CheckResponse(BaseModel):
     verdict: bool
     suggested_edit: str
 
+class BatchCheckRequest(BaseModel):
+    texts: List[str]
+
+class BatchItemResponse(BaseModel):
+    verdict: Optional[bool]
+    suggested_edit: str
+    chunks: int
+    errors: List[str]
+
+class BatchCheckResponse(BaseModel):
+    results: List[BatchItemResponse]
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(CheckOutputError)
+async def check_output_handler(request: Request, exc: CheckOutputError):
+    return JSONResponse(status_code=502, content={"detail": str(exc)})
+
+async def run_checker(text: str):
+    # Run the agent; it parses (and if needed repairs) the model's JSON itself
+    return await document_checker_pool.run(DocumentCheckerAgent.check, text)
+
+async def check_text(text: str):
+    """Check `text` as one prompt, reusing cached and in-flight results."""
+    result = check_cache.get(text)
+    if result is None:
+        result = await check_cache.single_flight(text, run_checker)
+    return result
+
 @app.post("/check", response_model=CheckResponse)
-def check_document(payload: CheckRequest):
+async def check_document(payload: CheckRequest):
     """
-    TODO: lock agent while executing query
+    Check a single document on a pooled agent.
+    When part of the document was checked before, only the paragraphs that
+    changed are sent to the model.
     """
+    text = payload.text
+    result = check_cache.get(text)
+    if result is not None:
+        return result
 
-    # Run the agent
-    raw_result = document_checker_agent.run(payload.text)
+    blocks, cached = check_cache.lookup_paragraphs(text)
+    if not any(r is not None and strip_chunk(b)[1] for b, r in zip(blocks, cached)):
+        return await check_cache.single_flight(text, run_checker)
 
-    # Parse JSON coming back from the model
-    result = json.loads(raw_result)
+    # Group consecutive unchecked paragraphs so they go out as few prompts
+    chunks, results, pending = [], [], []
+    run = ""
+    for block, result in zip(blocks + [""], cached + [{}]):
+        if result is None:
+            run += block
+            continue
+        if run:
+            for chunk in split_document(run, chunk_max_chars):
+                chunks.append(chunk)
+                results.append(None)
+                pending.append(len(chunks) - 1)
+            run = ""
+        if block:
+            chunks.append(block)
+            results.append(result)
 
+    start = time.monotonic()
+    checked = await asyncio.gather(*(check_text(strip_chunk(chunks[i])[1]) for i in pending))
+    for i, result in zip(pending, checked):
+        results[i] = result
+
+    merged = merge_chunk_results(chunks, results)
+    result = {"verdict": merged["verdict"], "suggested_edit": merged["suggested_edit"]}
+    check_cache.put(text, result, time.monotonic() - start)
     return result
 
+async def check_chunk(chunk: str, limit: asyncio.Semaphore):
+    _, content, _ = strip_chunk(chunk)
+    if not content:
+        return {"verdict": True, "suggested_edit": ""}
+    async with limit:
+        return await check_text(content)
+
+@app.post("/check/batch", response_model=BatchCheckResponse)
+async def check_batch(payload: BatchCheckRequest):
+    """
+    Check many documents concurrently. Long documents are split on paragraph and
+    section boundaries, checked in parallel and merged back per document.
+    Results keep the order of `texts`; a failed chunk is reported in that item's
+    `errors` instead of failing the batch.
+    """
+    if len(payload.texts) > batch_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {batch_max_items} texts per batch")
+
+    # One batch should not fill the pool's wait queue by itself
+    limit = asyncio.Semaphore(document_checker_pool.size())
+
+    documents = [split_document(text, chunk_max_chars) for text in payload.texts]
+    results = await asyncio.gather(
+        *(check_chunk(chunk, limit) for chunks in documents for chunk in chunks),
+        return_exceptions=True,
+    )
+
+    items = []
+    offset = 0
+    for chunks in documents:
+        items.append(merge_chunk_results(chunks, results[offset:offset + len(chunks)]))
+        offset += len(chunks)
+
+    return {"results": items}
+
+async def timed_check_chunk(index: int, position: int, chunk: str, limit: asyncio.Semaphore):
+    start = time.monotonic()
+    try:
+        result = await check_chunk(chunk, limit)
+    except Exception as e:
+        result = e
+    return index, position, result, time.monotonic() - start
+
+@app.post("/check/stream")
+async def check_stream(payload: BatchCheckRequest):
+    """
+    Like /check/batch, but streams NDJSON: one line per document or chunk as soon
+    as it finishes, in completion order. Chunked documents get a final line with
+    the merged result once all of their chunks are done.
+
+    If the client disconnects, chunks still waiting for a slot are dropped. Checks
+    already running on an agent cannot be interrupted: they finish in their worker
+    thread, holding the agent until then, and their results still go to the cache.
+    """
+    if len(payload.texts) > batch_max_items:
+        raise HTTPException(status_code=413, detail=f"At most {batch_max_items} texts per batch")
+
+    documents = [split_document(text, chunk_max_chars) for text in payload.texts]
+
+    async def lines():
+        limit = asyncio.Semaphore(document_checker_pool.size())
+        started = time.monotonic()
+        tasks = [
+            asyncio.create_task(timed_check_chunk(index, position, chunk, limit))
+            for index, chunks in enumerate(documents)
+            for position, chunk in enumerate(chunks)
+        ]
+        # Chunk results are kept only until their document is merged
+        partial = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, position, result, seconds = await next_done
+                chunks = documents[index]
+                line = {"index": index, "chunk": position, "chunks": len(chunks), "seconds": round(seconds, 3)}
+                if isinstance(result, Exception):
+                    line.update(verdict=None, suggested_edit="", error=f"{type(result).__name__}: {result}")
+                else:
+                    line.update(verdict=bool(result.get("verdict")), suggested_edit=result.get("suggested_edit") or "")
+                yield json.dumps(line) + "\n"
+
+                if len(chunks) == 1:
+                    continue
+                results = partial.setdefault(index, [None] * len(chunks))
+                results[position] = result
+                if all(r is not None for r in results):
+                    del partial[index]
+                    merged = merge_chunk_results(chunks, results)
+                    merged.update(index=index, merged=True, seconds=round(time.monotonic() - started, 3))
+                    yield json.dumps(merged) + "\n"
+        finally:
+            # Client went away: stop waiting; running checks finish in their threads
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/stats")
+async def stats():
+    return {
+        "pool": document_checker_pool.stats(),
+        "result_cache": check_cache.stats(),
+        "llm_backends": checker.llm_chat_completion_provider.backend_stats(),
+        "tracing": get_tracer().stats(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latency histograms and token counters in the Prometheus text format."""
+    return PlainTextResponse(get_tracer().render_prometheus(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run("main_docs_service:app", host="localhost", port=8500, reload=True)
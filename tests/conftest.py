@@ -0,0 +1,24 @@
+import pytest
+
+class FakeSettings:
+    """
+    Settings stand-in: `load_agent_config` returns `agent_conf` for every agent,
+    or `configs[agent_name]` when per-agent configs are given.
+    """
+
+    def __init__(self, agent_conf=None, configs=None):
+        self.agent_conf = agent_conf if agent_conf is not None else {}
+        self.configs = configs
+
+    def load_agent_config(self, agent_name):
+        if self.configs is not None:
+            return self.configs[agent_name]
+        return self.agent_conf
+
+    def resolve_api_key(self, api_key_name):
+        return "test"
+
+@pytest.fixture
+def fake_settings():
+    """FakeSettings factory: fake_settings(agent_conf) or fake_settings(configs={...})."""
+    return FakeSettings
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import pytest
+from core.factory.agent_pool import AgentPool, PoolSaturatedError
+
+@pytest.fixture
+def make_pool(fake_settings):
+    def make(agents=("agent",), **service_conf):
+        return AgentPool(fake_settings({"service": service_conf}), "document_checker_agent", list(agents))
+    return make
+
+def test_waiters_are_served_in_arrival_order(make_pool):
+    pool = make_pool()
+    order = []
+
+    async def request(name):
+        async with pool.acquire():
+            order.append(name)
+
+    async def main():
+        holder = pool.acquire()
+        await holder.__aenter__()
+        waiters = [asyncio.create_task(request(f"waiter_{i}")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        await holder.__aexit__(None, None, None)
+        # Arrives right as the agent is released: it must not jump the queue
+        await request("late")
+        await asyncio.gather(*waiters)
+
+    asyncio.run(main())
+    assert order == ["waiter_0", "waiter_1", "waiter_2", "late"]
+    assert pool.free == ["agent"] and not pool.waiters
+
+def test_full_wait_queue_is_rejected(make_pool):
+    pool = make_pool(max_waiting=1)
+
+    async def main():
+        async with pool.acquire():
+            waiter = asyncio.create_task(pool.run(lambda agent: agent))
+            await asyncio.sleep(0.01)
+            with pytest.raises(PoolSaturatedError) as error:
+                async with pool.acquire():
+                    pass
+            assert error.value.retry_after >= 1
+        return await waiter
+
+    assert asyncio.run(main()) == "agent"
+    assert pool.stats()["rejected"] == 1
+
+def test_wait_timeout_is_rejected_and_agent_is_kept(make_pool):
+    pool = make_pool(wait_timeout_seconds=0.02)
+
+    async def main():
+        async with pool.acquire():
+            with pytest.raises(PoolSaturatedError):
+                async with pool.acquire():
+                    pass
+        assert not pool.waiters
+        async with pool.acquire() as agent:
+            return agent
+
+    assert asyncio.run(main()) == "agent"
+    assert pool.free == ["agent"]
+
+def test_cancelled_waiter_passes_on_a_handed_agent(make_pool):
+    pool = make_pool()
+
+    async def main():
+        holder = pool.acquire()
+        await holder.__aenter__()
+        first = asyncio.create_task(pool.run(lambda agent: "first"))
+        second = asyncio.create_task(pool.run(lambda agent: "second"))
+        await asyncio.sleep(0.01)
+        await holder.__aexit__(None, None, None)  # hands the agent to `first`...
+        first.cancel()  # ...which is cancelled before it can use it
+        assert await second == "second"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
+    assert pool.free == ["agent"] and pool.in_flight == 0
+
+def test_cancelled_run_keeps_the_agent_until_its_thread_finishes(make_pool):
+    pool = make_pool()
+    started, finish = threading.Event(), threading.Event()
+    busy = []
+
+    def work(agent, name):
+        busy.append(name)
+        if name == "first":
+            started.set()
+            finish.wait(5)
+        assert busy == [name]
+        busy.remove(name)
+        return name
+
+    async def main():
+        first = asyncio.create_task(pool.run(work, "first"))
+        await asyncio.to_thread(started.wait, 5)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # The first request's thread still holds the agent
+        second = asyncio.create_task(pool.run(work, "second"))
+        await asyncio.sleep(0.05)
+        assert not second.done() and pool.in_flight == 1
+        finish.set()
+        return await second
+
+    assert asyncio.run(main()) == "second"
+    assert pool.free == ["agent"] and pool.in_flight == 0
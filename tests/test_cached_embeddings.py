@@ -0,0 +1,55 @@
+from langchain_core.embeddings import Embeddings
+from core.embedding_tools.cached_embeddings import CachedEmbeddings
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append(["query: " + text])
+        return [float(len(text)), 1.0]
+
+def test_hits_skip_the_backend_and_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache" / "embeddings.sqlite")
+    backend = CountingEmbeddings()
+    cache = CachedEmbeddings(backend, "openai", "small", path, batch_size=2)
+
+    assert cache.embed_documents(["a", "bb", "a", "ccc"]) == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5], [3.0, 0.5]]
+    assert backend.calls == [["a", "bb"], ["ccc"]]
+    assert cache.stats() == {"hits": 1, "misses": 3}
+
+    reopened = CachedEmbeddings(backend, "openai", "small", path)
+    assert reopened.embed_documents(["a", "ccc"]) == [[1.0, 0.5], [3.0, 0.5]]
+    assert len(backend.calls) == 2
+
+    # Vectors are cached per model, so another model misses
+    CachedEmbeddings(backend, "openai", "large", path).embed_documents(["a"])
+    assert backend.calls[-1] == ["a"]
+
+def test_least_recently_used_vectors_are_evicted(tmp_path):
+    backend = CountingEmbeddings()
+    cache = CachedEmbeddings(backend, "openai", "small", str(tmp_path / "embeddings.sqlite"), max_entries=2)
+    cache.embed_documents(["a"])
+    cache.embed_documents(["bb"])
+    cache.embed_documents(["ccc"])
+
+    cache.embed_documents(["ccc", "bb"])
+    assert len(backend.calls) == 3
+
+    cache.embed_documents(["a"])
+    assert backend.calls[-1] == ["a"]
+
+def test_queries_use_the_backend_query_embedding_and_their_own_keys(tmp_path):
+    backend = CountingEmbeddings()
+    cache = CachedEmbeddings(backend, "openai", "small", str(tmp_path / "embeddings.sqlite"))
+
+    assert cache.embed_documents(["bb"]) == [[2.0, 0.5]]
+    assert cache.embed_query("bb") == [2.0, 1.0]
+    assert cache.embed_query("bb") == [2.0, 1.0]
+    assert cache.embed_documents(["bb"]) == [[2.0, 0.5]]
+    assert backend.calls == [["bb"], ["query: bb"]]
+    assert cache.stats() == {"hits": 2, "misses": 2}
@@ -0,0 +1,63 @@
+import pytest
+from types import SimpleNamespace
+from agents.document_checker_agent import DocumentCheckerAgent, CheckOutputError, parse_check_result
+
+def test_tolerant_parse():
+    assert parse_check_result('{"verdict": true, "suggested_edit": ""}') == {"verdict": True, "suggested_edit": ""}
+    reply = '<think>\nLooks like a typo.\n</think>\nHere you go:\n```json\n{"verdict": "false", "suggested_edit": "Fixed",}\n```'
+    assert parse_check_result(reply) == {"verdict": False, "suggested_edit": "Fixed"}
+    with pytest.raises(ValueError):
+        parse_check_result("The document looks fine to me.")
+
+class BadRequest(Exception):
+    status_code = 400
+
+class FakeCompletionProvider:
+    def __init__(self, replies, reject_response_format=False, error=None):
+        self.replies = list(replies)
+        self.reject_response_format = reject_response_format
+        self.error = error
+        self.requests = []
+
+    def chat_completion(self, messages, response_format=None, **kwargs):
+        self.requests.append((messages[-1]["content"], response_format))
+        if self.error is not None:
+            raise self.error
+        if response_format and self.reject_response_format:
+            raise BadRequest("response_format not supported")
+        content = self.replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def checker(provider, **output_conf):
+    root = SimpleNamespace(root_dir=".")
+    return DocumentCheckerAgent(root, None, None, provider, "document_checker_agent", output_conf)
+
+def test_repair_resends_only_the_malformed_reply():
+    provider = FakeCompletionProvider(["verdict: false, edit: We're here", '{"verdict": false, "suggested_edit": "We\'re here"}'])
+    agent = checker(provider)
+
+    assert agent.check("Were here") == {"verdict": False, "suggested_edit": "We're here"}
+    assert provider.requests[0] == ("Were here", agent.response_format())
+    assert "verdict: false, edit: We're here" in provider.requests[1][0]
+    assert "Were here\n" not in provider.requests[1][0]
+
+def test_repair_is_bounded():
+    provider = FakeCompletionProvider(["nope", "still nope", "never"])
+    with pytest.raises(CheckOutputError):
+        checker(provider, repair_retries=1).check("text")
+    assert len(provider.requests) == 2
+
+def test_rejected_response_format_falls_back():
+    provider = FakeCompletionProvider(['{"verdict": true, "suggested_edit": ""}'], reject_response_format=True)
+    agent = checker(provider)
+    assert agent.check("fine")["verdict"] is True
+    assert agent.response_format() is None
+    assert [fmt is None for _, fmt in provider.requests] == [False, True]
+
+def test_other_bad_requests_keep_response_format():
+    provider = FakeCompletionProvider([], error=BadRequest("This model's maximum context length is 8192 tokens"))
+    agent = checker(provider)
+    with pytest.raises(BadRequest):
+        agent.check("a very long document")
+    assert agent.response_format() is not None
+    assert len(provider.requests) == 1
@@ -0,0 +1,60 @@
+import asyncio
+from core.llm_tools.check_result_cache import CheckResultCache
+
+AGENT_CONF = {"service": {"result_cache": {"enabled": True}}}
+
+def test_concurrent_identical_checks_share_one_call(fake_settings):
+    cache = CheckResultCache(fake_settings(AGENT_CONF), "checker", "model", "prompt")
+    calls = []
+
+    async def compute(text):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return {"verdict": True, "suggested_edit": ""}
+
+    async def main():
+        return await asyncio.gather(*(cache.single_flight("same text", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == ["same text"]
+    assert all(r == {"verdict": True, "suggested_edit": ""} for r in results)
+    assert cache.get("same text") is not None
+    assert cache.stats()["shared_in_flight"] == 4
+
+def test_cancelled_caller_does_not_cancel_other_waiters(fake_settings):
+    cache = CheckResultCache(fake_settings(AGENT_CONF), "checker", "model", "prompt")
+
+    async def compute(text):
+        await asyncio.sleep(0.02)
+        return {"verdict": True, "suggested_edit": ""}
+
+    async def main():
+        owner = asyncio.create_task(cache.single_flight("same text", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.single_flight("same text", compute))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await waiter, owner.cancelled()
+
+    result, owner_cancelled = asyncio.run(main())
+    assert owner_cancelled
+    assert result == {"verdict": True, "suggested_edit": ""}
+    assert cache.get("same text") == result
+
+def test_document_result_maps_onto_paragraphs(fake_settings):
+    cache = CheckResultCache(fake_settings(AGENT_CONF), "checker", "model", "prompt")
+    cache.store_document(
+        "Good one.\n\nBad teh.",
+        {"verdict": False, "suggested_edit": "Good one.\n\nBad the."},
+        1.0,
+    )
+    blocks, results = cache.lookup_paragraphs("Good one.\n\nBad teh.\n\nNew one.")
+    assert results[0] == {"verdict": True, "suggested_edit": ""}
+    assert results[1] == {"verdict": False, "suggested_edit": "Bad the."}
+    assert results[2] is None
+
+def test_prompt_change_invalidates(fake_settings):
+    cache = CheckResultCache(fake_settings(AGENT_CONF), "checker", "model", "prompt")
+    cache.put("text", {"verdict": True, "suggested_edit": ""}, 1.0)
+    other = CheckResultCache(fake_settings(AGENT_CONF), "checker", "model", "new prompt")
+    assert cache.make_key("text") != other.make_key("text")
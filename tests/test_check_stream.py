@@ -0,0 +1,34 @@
+import json
+import asyncio
+from fastapi.testclient import TestClient
+import main_docs_service
+from core.llm_tools.check_result_cache import CheckResultCache
+
+def test_stream_yields_in_completion_order_and_merges_chunks(monkeypatch, fake_settings):
+    async def run_checker(text):
+        await asyncio.sleep(0.2 if "slow" in text else 0.01)
+        if "teh" in text:
+            return {"verdict": False, "suggested_edit": text.replace("teh", "the")}
+        return {"verdict": True, "suggested_edit": ""}
+
+    monkeypatch.setattr(main_docs_service, "run_checker", run_checker)
+    settings = fake_settings({"service": {"result_cache": {"enabled": False}}})
+    monkeypatch.setattr(main_docs_service, "check_cache", CheckResultCache(settings, "checker", "model", "prompt"))
+    monkeypatch.setattr(main_docs_service, "chunk_max_chars", 40)
+
+    chunked = "First paragraph is slow to check.\n\nSecond has teh typo."
+    texts = ["A slow document.", chunked, "Fine."]
+    with TestClient(main_docs_service.app) as client:
+        response = client.post("/check/stream", json={"texts": texts})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    # Fast results first, each chunk line before its document's merged line
+    order = [(line["index"], line.get("chunk"), line.get("merged", False)) for line in lines]
+    assert set(order[:2]) == {(2, 0, False), (1, 1, False)}
+    assert order.index((1, None, True)) > max(order.index((1, 0, False)), order.index((1, 1, False)))
+    assert len(lines) == 5
+
+    merged = next(line for line in lines if line.get("merged"))
+    assert merged["verdict"] is False
+    assert merged["suggested_edit"] == "First paragraph is slow to check.\n\nSecond has the typo."
@@ -0,0 +1,35 @@
+from langchain.schema import Document
+from core.db_tools.context_builder import ContextBuilder
+
+def chunk(content, start, text):
+    return Document(page_content=text, metadata={"source": content, "start_index": start})
+
+def test_overlapping_chunks_merge_and_cite_line_ranges(tmp_path):
+    path = tmp_path / "notes.txt"
+    text = "".join(f"line {i}\n" for i in range(1, 11))
+    path.write_text(text)
+    source = str(path)
+    builder = ContextBuilder({"context": {"min_score": 0.5, "max_tokens": 1000}})
+
+    docs = builder.build([
+        (chunk(source, 14, text[14:35]), 0.9),
+        (chunk(source, 0, text[0:21]), 0.8),
+        (chunk(source, 42, text[42:56]), 0.2),
+    ])
+    assert len(docs) == 1
+    assert docs[0].page_content == text[0:35]
+    assert docs[0].metadata["citation"] == f"{source}:1-5"
+    assert docs[0].metadata["score"] == 0.9
+
+def test_budget_keeps_best_chunks_first():
+    builder = ContextBuilder({"context": {"max_tokens": 30}})
+    docs = builder.build([
+        (Document(page_content="a" * 80, metadata={"source": "a.txt"}), 0.9),
+        (Document(page_content="b" * 80, metadata={"source": "b.txt"}), 0.8),
+        (Document(page_content="c" * 20, metadata={"source": "c.txt"}), 0.7),
+    ])
+    assert [doc.metadata["citation"] for doc in docs] == ["a.txt", "c.txt"]
+    assert [doc.metadata["citation"] for doc in builder.build([
+        (Document(page_content="c" * 20, metadata={"source": "c.txt"}), 0.7),
+        (Document(page_content="d" * 20, metadata={"source": "d.txt"}), 0.6),
+    ], limit=1)] == ["c.txt"]
@@ -0,0 +1,44 @@
+import pytest
+from core.memory_tools.conversation_memory import ConversationMemory
+
+@pytest.fixture
+def make_memory(fake_settings):
+    def make(**conversation_conf):
+        return ConversationMemory(fake_settings({"memory": {"conversation": conversation_conf}}), "agent")
+    return make
+
+def make_messages(count, size=40):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"{i} " + "x" * size} for i in range(count)]
+
+def test_small_history_is_unchanged(make_memory):
+    memory = make_memory(max_tokens=1000)
+    messages = make_messages(4)
+    assert memory.window(messages) == messages
+    assert len(messages) == 4
+
+def test_budget_drops_oldest_messages(make_memory):
+    memory = make_memory(max_tokens=100, keep_recent_messages=2)
+    messages = make_messages(20)
+    assert len(memory.window(messages)) < 20
+    assert len(messages) == 20
+
+    window = memory.window(messages, prune=True)
+    assert window == messages
+    assert window[-1]["content"].startswith("19 ")
+    assert sum(memory.message_tokens(m) for m in window) <= 100
+
+def test_large_old_messages_are_shrunk(make_memory):
+    memory = make_memory(max_tokens=10000, keep_recent_messages=2, max_message_tokens=50)
+    messages = [{"role": "assistant", "content": "y" * 4000}] + make_messages(2)
+    window = memory.window(messages)
+    assert "tokens of earlier content omitted" in window[0]["content"]
+    assert window[1:] == messages[1:]
+    assert messages[0]["content"] == "y" * 4000
+
+def test_shrink_keeps_max_message_tokens(make_memory):
+    memory = make_memory(max_message_tokens=20, tokenizer="tiktoken")
+    content = " ".join(f"word{i}" for i in range(500))
+    shrunk = memory.shrink({"role": "assistant", "content": content})["content"]
+    head = shrunk.split("\n[...")[0]
+    assert memory.count_tokens(head) == 20
+    assert content.startswith(head)
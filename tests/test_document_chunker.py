@@ -0,0 +1,21 @@
+from core.utils.document_chunker import split_document, merge_chunk_results
+
+def test_split_on_paragraphs_round_trips():
+    text = "# Intro\nFirst paragraph.\n\nSecond paragraph.\n\n# Next\n" + "x" * 50 + "\n\nTail."
+    chunks = split_document(text, max_chars=40)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert chunks[0] == "# Intro\nFirst paragraph.\n\n"
+
+def test_merge_reassembles_edits_and_keeps_failed_chunks():
+    chunks = ["Fine.\n\n", "Were late.\n\n", "Broken chunk."]
+    results = [
+        {"verdict": True, "suggested_edit": ""},
+        {"verdict": False, "suggested_edit": "We're late."},
+        ValueError("bad json"),
+    ]
+    merged = merge_chunk_results(chunks, results)
+    assert merged["verdict"] is False
+    assert merged["suggested_edit"] == "Fine.\n\nWe're late.\n\nBroken chunk."
+    assert merged["chunks"] == 3
+    assert merged["errors"] == ["chunk 2: ValueError: bad json"]
@@ -0,0 +1,156 @@
+import json
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from core.llm_tools import llm_chat_completion_provider
+from core.llm_tools.llm_chat_completion_provider import LLMChatCompletionProvider
+from core.utils.tracing import Tracer
+
+class StubBackend:
+    """Local OpenAI-compatible server answering `name` after `delay` seconds (or a 500)."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                backend.requests += 1
+                time.sleep(backend.delay)
+                if backend.fail:
+                    self.send_response(500)
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    self.wfile.write(b'{"error": {"message": "boom"}}')
+                    return
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for piece in (name, " done"):
+                        chunk = {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                                 "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        chunk = {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                                 "choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    return
+                payload = json.dumps({
+                    "id": "c", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": name}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.delay = delay
+        self.fail = fail
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.handle_error = lambda request, address: None  # hedged losers disconnect
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def backends():
+    primary, secondary = StubBackend("primary"), StubBackend("secondary")
+    yield primary, secondary
+    primary.close()
+    secondary.close()
+
+@pytest.fixture
+def provider_for(fake_settings):
+    def make(primary, secondary, delay, cache=None):
+        comp_conf = backend_conf(primary, "m")
+        comp_conf["hedge"] = {"delay_seconds": delay, "backends": [backend_conf(secondary, "m2")]}
+        if cache:
+            comp_conf["cache"] = cache
+        return LLMChatCompletionProvider(fake_settings({"llm": {"chat_completion": comp_conf}}), "agent")
+    return make
+
+def backend_conf(backend, model):
+    return {"model": model, "base_url": backend.base_url, "api_key_name": "KEY", "rate_limit": {"max_retries": 0}}
+
+def answer(provider):
+    return provider.chat_completion([{"role": "user", "content": "hi"}]).choices[0].message.content
+
+def test_fast_primary_is_not_hedged(backends, provider_for):
+    primary, secondary = backends
+    provider = provider_for(primary, secondary, delay=1.0)
+    assert answer(provider) == "primary"
+    assert secondary.requests == 0
+
+def test_slow_primary_is_hedged(backends, provider_for):
+    primary, secondary = backends
+    primary.delay = 1.0
+    provider = provider_for(primary, secondary, delay=0.05)
+
+    start = time.monotonic()
+    assert answer(provider) == "secondary"
+    assert time.monotonic() - start < 0.8
+    stats = provider.backend_stats()
+    assert stats[secondary.base_url]["wins"] == 1
+    assert stats[primary.base_url]["wins"] == 0
+
+def test_failed_primary_fails_over(backends, provider_for):
+    primary, secondary = backends
+    primary.fail = True
+    provider = provider_for(primary, secondary, delay=5.0)
+
+    start = time.monotonic()
+    assert answer(provider) == "secondary"
+    assert time.monotonic() - start < 2.0
+    assert provider.backend_stats()[primary.base_url]["errors"] == 1
+
+def test_stream_hedges_on_first_token(backends, provider_for):
+    primary, secondary = backends
+    primary.delay = 1.0
+    provider = provider_for(primary, secondary, delay=0.05)
+
+    start = time.monotonic()
+    assert "".join(provider.stream_chat_completion([{"role": "user", "content": "hi"}])) == "secondary done"
+    assert time.monotonic() - start < 0.8
+    assert provider.backend_stats()[secondary.base_url]["wins"] == 1
+
+def test_hedged_answer_is_not_cached_and_counts_for_its_model(backends, monkeypatch, provider_for):
+    tracer = Tracer()
+    tracer.configure({"enabled": True})
+    monkeypatch.setattr(llm_chat_completion_provider, "get_tracer", lambda: tracer)
+    primary, secondary = backends
+    primary.delay = 1.0
+    provider = provider_for(primary, secondary, delay=0.05, cache={"enabled": True})
+
+    assert answer(provider) == "secondary"
+    assert provider.cache_stats()["memory_entries"] == 0
+    assert set(tracer.stats()["tokens"]) == {"m2"}
+
+    primary.delay = 0.0
+    provider.hedge_delay = 5.0
+    assert answer(provider) == "primary"
+    assert answer(provider) == "primary"
+    assert primary.requests == 2
+    assert set(tracer.stats()["tokens"]) == {"m", "m2"}
+
+def test_stream_usage_is_requested_when_tracing(backends, monkeypatch, provider_for):
+    tracer = Tracer()
+    tracer.configure({"enabled": True})
+    monkeypatch.setattr(llm_chat_completion_provider, "get_tracer", lambda: tracer)
+    primary, secondary = backends
+    provider = provider_for(primary, secondary, delay=5.0)
+
+    assert "".join(provider.stream_chat_completion([{"role": "user", "content": "hi"}])) == "primary done"
+    assert tracer.stats()["tokens"] == {"m": {"requests": 1, "prompt": 3, "completion": 2}}
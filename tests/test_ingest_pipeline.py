@@ -0,0 +1,90 @@
+import pytest
+from core.db_tools.vector_db_provider import VectorDBProvider
+from core.db_tools.ingest_pipeline import IngestPipeline
+
+class FakeDB:
+    def __init__(self):
+        self.chunks = {}
+        self.deletes = []
+
+    def delete(self, where):
+        self.deletes.extend(where["source"]["$in"])
+        for path in where["source"]["$in"]:
+            self.chunks.pop(path, None)
+
+    def add_documents(self, chunks):
+        for chunk in chunks:
+            self.chunks.setdefault(chunk.metadata["source"], []).append(chunk.page_content)
+
+def make_tree(tmp_path, n_files):
+    root = tmp_path / "project"
+    for i in range(n_files):
+        directory = root / f"dir_{i % 2}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file_{i}.txt").write_text(f"file {i} " * 20)
+    return root
+
+@pytest.fixture
+def make_provider(tmp_path, fake_settings):
+    def make(root):
+        settings = fake_settings({
+            "project_root": str(root),
+            "memory": {"vector_db": {
+                "persist_directory": str(tmp_path / "db"),
+                "chunk_size": 50,
+                "chunk_overlap": 0,
+                "hybrid": {"enabled": False},
+                "write_behind": {"enabled": False},
+            }},
+        })
+        provider = VectorDBProvider(settings, "agent", None)
+        db = FakeDB()
+        provider.get_db = lambda: db
+        return provider, db
+    return make
+
+def test_pipeline_parses_in_worker_processes_and_resumes(tmp_path, make_provider):
+    root = make_tree(tmp_path, 5)
+    provider, db = make_provider(root)
+    pipeline = IngestPipeline(provider, parse_workers=2, embed_workers=2, batch_size=4, files_per_task=2)
+
+    report = pipeline.run(str(root))
+    assert report["added"] == 5 and report["failed"] == 0
+    assert len(db.chunks) == 5 and all(len(chunks) > 1 for chunks in db.chunks.values())
+    assert report["chunks"] == sum(len(chunks) for chunks in db.chunks.values())
+    assert set(provider.manifest) == set(db.chunks)
+
+    (root / "dir_0" / "file_0.txt").write_text("edited")
+    report = pipeline.run(str(root))
+    assert (report["updated"], report["skipped"]) == (1, 4)
+    assert db.chunks[str(root / "dir_0" / "file_0.txt")] == ["edited"]
+
+def test_build_uses_the_pipeline(tmp_path, make_provider):
+    root = make_tree(tmp_path, 3)
+    provider, db = make_provider(root)
+    assert provider.build(str(root)) is db
+    assert len(db.chunks) == 3
+    assert len(provider.manifest) == 3
+
+def test_only_files_with_old_or_partial_vectors_are_cleared(tmp_path, make_provider):
+    root = make_tree(tmp_path, 4)
+    provider, db = make_provider(root)
+    pipeline = IngestPipeline(provider, parse_workers=1, embed_workers=1)
+    journal = tmp_path / "db" / "ingest_journal.txt"
+
+    pipeline.run(str(root), rebuild=True)
+    assert db.deletes == [] and not journal.exists()
+
+    # A new file an interrupted run had partly stored
+    partial = str(root / "dir_0" / "partial.txt")
+    (root / "dir_0" / "partial.txt").write_text("partial file " * 20)
+    db.chunks[partial] = ["stale"]
+    journal.write_text(partial + "\n")
+    new = str(root / "dir_1" / "new.txt")
+    (root / "dir_1" / "new.txt").write_text("new file")
+
+    report = pipeline.run(str(root))
+    assert report["added"] == 2
+    assert db.deletes == [partial]
+    assert "stale" not in db.chunks[partial] and db.chunks[new] == ["new file"]
+    assert not journal.exists()
@@ -0,0 +1,17 @@
+from core.utils.json_stream_parser import JsonMapStreamParser
+
+def test_maps_complete_across_chunks():
+    parser = JsonMapStreamParser()
+    text = '{"tool": "add_nums", "arguments": {"a": "4", "b": "5"}},\n{"tool": "get_weather", "arguments": {}}'
+    maps = []
+    for i in range(0, len(text), 7):
+        maps.extend(parser.feed(text[i:i + 7]))
+    assert maps == [
+        '{"tool": "add_nums", "arguments": {"a": "4", "b": "5"}}',
+        '{"tool": "get_weather", "arguments": {}}',
+    ]
+
+def test_braces_inside_strings_are_ignored():
+    parser = JsonMapStreamParser()
+    text = 'Sure! {"tool": "t", "arguments": {"code": "if x: { print(\\"}\\") }"}} trailing'
+    assert parser.feed(text) == ['{"tool": "t", "arguments": {"code": "if x: { print(\\"}\\") }"}}']
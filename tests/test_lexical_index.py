@@ -0,0 +1,69 @@
+from langchain.schema import Document
+from core.db_tools.lexical_index import LexicalIndex, tokenize
+from core.db_tools.hybrid_retriever import HybridRetriever
+
+def test_tokenize_splits_identifiers():
+    tokens = tokenize("VectorDBProvider.get_db")
+    assert "vectordbprovider" in tokens and "get_db" in tokens
+    assert {"vector", "db", "provider", "get"} <= set(tokens)
+
+def test_search_finds_identifiers_and_forgets_deleted_sources(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.sqlite"))
+    index.add_documents([
+        Document(page_content="def load_agent_config(self, name): ...", metadata={"source": "settings_loader.py"}),
+        Document(page_content="Notes about the project layout.", metadata={"source": "notes.txt"}),
+    ])
+    doc, _, coverage = index.search("load_agent_config", k=1)[0]
+    assert doc.metadata["source"] == "settings_loader.py" and coverage == 1.0
+    assert index.search("notes", k=1)[0][0].metadata["source"] == "notes.txt"
+
+    index.delete_sources(["settings_loader.py"])
+    assert index.search("load_agent_config") == []
+    assert len(LexicalIndex(str(tmp_path / "lexical.sqlite"))) == 1
+
+def test_reciprocal_rank_fusion_prefers_documents_in_both_lists():
+    a, b, c = (Document(page_content=t, metadata={"source": t}) for t in "abc")
+    retriever = HybridRetriever(vector_db_provider=None)
+    assert retriever.fuse([[a, b], [b, c]])[0] is b
+
+class FakeVectorDB:
+    def __init__(self):
+        self.queries = []
+
+    def similarity_search_with_relevance_scores(self, query, k):
+        self.queries.append(query)
+        return []
+
+class FakeVectorDBProvider:
+    def __init__(self, index):
+        self.index = index
+        self.db = FakeVectorDB()
+
+    def get_lexical_index(self):
+        return self.index
+
+    def get_db(self):
+        return self.db
+
+def test_fast_path_only_for_identifiers(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.sqlite"))
+    index.add_documents([
+        Document(page_content=f"The index stores note number {i}.", metadata={"source": f"note_{i}.txt"})
+        for i in range(20)
+    ] + [
+        Document(page_content="def load_agent_config(self, name): ...", metadata={"source": "settings_loader.py"}),
+        Document(page_content="Notes about the project layout.", metadata={"source": "notes.txt"}),
+    ])
+    provider = FakeVectorDBProvider(index)
+    retriever = HybridRetriever(vector_db_provider=provider)
+
+    docs = retriever.invoke("load_agent_config")
+    assert docs[0].metadata["source"] == "settings_loader.py"
+    assert provider.db.queries == []
+
+    # An ordinary word, even one with lexical hits, still goes through vector search and fusion
+    assert [doc.metadata["source"] for doc in retriever.invoke("layout")] == ["notes.txt"]
+    assert provider.db.queries == ["layout"]
+
+    # A word most chunks share scores below the BM25 floor, so those hits are not fused in
+    assert retriever.invoke("index") == []
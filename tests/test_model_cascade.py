@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from core.memory_tools.conversation_memory import ConversationMemory
+from agents.base_agent import BaseAgent
+
+ROLES = {"router": "small", "generator": "large"}
+
+class FakeCompletionProvider:
+    def __init__(self, replies):
+        self.replies = replies  # model -> reply content
+        self.models = []
+
+    def chat_completion(self, messages, model=None, **kwargs):
+        self.models.append(model)
+        message = SimpleNamespace(content=self.replies[model], tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def agent_with(tmp_path, replies, roles=ROLES):
+    provider = FakeCompletionProvider(replies)
+    root = SimpleNamespace(root_dir=str(tmp_path))
+    return BaseAgent(root, None, None, provider, "test_agent", model_roles=roles), provider
+
+ADD = '{"tool": "add_nums", "arguments": {"a": "2", "b": "3"}}'
+
+def test_router_handles_the_turn(tmp_path):
+    agent, provider = agent_with(tmp_path, {"small": ADD, "large": ADD})
+    assert agent.run("add 2 and 3") == (["The sum between 2 and 3 is: 5"], True)
+    assert provider.models == ["small"]
+
+def test_unparsable_reply_escalates(tmp_path):
+    agent, provider = agent_with(tmp_path, {"small": "Sure! I'll add them.", "large": ADD})
+    assert agent.run("add 2 and 3") == (["The sum between 2 and 3 is: 5"], True)
+    assert provider.models == ["small", "large"]
+    # The router's reply is not kept in the history
+    assert [m["content"] for m in agent.messages] == ["add 2 and 3", ADD, ADD]
+
+def test_unknown_tool_escalates(tmp_path):
+    agent, provider = agent_with(tmp_path, {"small": '{"tool": "add_numbers", "arguments": {}}', "large": ADD})
+    assert agent.run("add 2 and 3")[1] is True
+    assert provider.models == ["small", "large"]
+
+def test_conversation_and_disabled_escalation_stay_on_router(tmp_path):
+    agent, provider = agent_with(tmp_path, {"small": "CONVERSATION: Hi!", "large": ADD})
+    assert agent.run("hello") == ([" Hi!"], False)
+
+    agent, provider = agent_with(tmp_path, {"small": "not json", "large": ADD}, dict(ROLES, escalate=False))
+    assert agent.run("add 2 and 3") == ([], True)
+    assert provider.models == ["small"]
+
+def test_escalation_drops_the_router_reply_after_pruning(tmp_path, fake_settings):
+    agent, provider = agent_with(tmp_path, {"small": "Sure, adding!", "large": ADD})
+    agent.memory = ConversationMemory(fake_settings({"memory": {"conversation": {"max_tokens": 40}}}), "test_agent")
+    agent.messages = [{"role": "user", "content": "x" * 100}, {"role": "assistant", "content": "y" * 40}]
+
+    assert agent.run("add 2 and 3") == (["The sum between 2 and 3 is: 5"], True)
+    assert provider.models == ["small", "large"]
+    # Routing pruned the oldest message; the router's reply is still not kept
+    assert [m["content"] for m in agent.messages] == ["y" * 40, "add 2 and 3", ADD, ADD]
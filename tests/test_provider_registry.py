@@ -0,0 +1,17 @@
+from core.factory.provider_registry import ProviderRegistry
+from core.utils.tool_scheduler import ToolScheduler
+
+CONFIGS = {
+    "agent_a": {"name": "a", "tools": {"max_workers": 2}},
+    "agent_b": {"name": "b", "tools": {"max_workers": 2}},
+    "agent_c": {"name": "c", "tools": {"max_workers": 8}},
+}
+
+def test_providers_are_shared_by_effective_config(fake_settings):
+    registry = ProviderRegistry(fake_settings(configs=CONFIGS))
+    a = registry.get(ToolScheduler, "agent_a")
+    assert registry.get(ToolScheduler, "agent_a") is a
+    # Different agent name, same tools section
+    assert registry.get(ToolScheduler, "agent_b") is a
+    assert registry.get(ToolScheduler, "agent_c") is not a
+    assert len(registry) == 2
@@ -0,0 +1,61 @@
+import threading
+import time
+from core.llm_tools.rate_limiter import RateLimiter, get_rate_limiter, parse_retry_after
+
+def test_idle_backend_is_not_delayed():
+    limiter = RateLimiter(tokens_per_second=1.0, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire_token()
+    assert time.monotonic() - start < 0.1
+
+def test_bucket_refills_at_rate():
+    limiter = RateLimiter(tokens_per_second=20.0, burst=1)
+    limiter.acquire_token()
+    start = time.monotonic()
+    limiter.acquire_token()
+    assert time.monotonic() - start >= 0.04
+
+def test_max_in_flight():
+    limiter = RateLimiter(max_in_flight=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        with limiter.slot():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) == 2
+
+def test_backoff_honours_retry_after():
+    limiter = RateLimiter(tokens_per_second=10.0, burst=5)
+    limiter.backoff(retry_after=0.1)
+    assert limiter.rate == 5.0
+    start = time.monotonic()
+    limiter.acquire_token()
+    assert time.monotonic() - start >= 0.09
+    limiter.success()
+    assert limiter.rate > 5.0
+
+def test_shared_by_base_url():
+    conf = {"rate_limit_seconds": 0.0}
+    first = get_rate_limiter("http://limiter-test/v1", conf)
+    second = get_rate_limiter("http://limiter-test/v1", {"rate_limit": {"max_in_flight": 3}})
+    assert first is second
+    assert first.max_in_flight == 3
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after": "2"}) == 2.0
+    assert parse_retry_after({"retry-after-ms": "250"}) == 0.25
+    assert parse_retry_after({}) is None
@@ -0,0 +1,42 @@
+import time
+from core.llm_tools.response_cache import ResponseCache
+
+def test_key_depends_on_messages_and_params():
+    cache = ResponseCache()
+    messages = [{"role": "user", "content": "hi"}]
+    key = cache.make_key("m", "http://x", messages, temperature=0.0, max_tokens=10)
+    assert key == cache.make_key("m", "http://x", list(messages), temperature=0.0, max_tokens=10)
+    assert key != cache.make_key("m", "http://x", messages, temperature=0.0, max_tokens=20)
+    assert key != cache.make_key("m", "http://y", messages, temperature=0.0, max_tokens=10)
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl_seconds=0.05)
+    cache.put("a", "1")
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(sqlite_path=path).put("a", "1")
+    cache = ResponseCache(sqlite_path=path)
+    assert cache.get("a") == "1"
+    assert cache.stats()["disk_hits"] == 1
+
+def test_disk_tier_size_eviction(tmp_path):
+    cache = ResponseCache(max_entries=1, sqlite_path=str(tmp_path / "cache.sqlite"), disk_max_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.put(key, key)
+        time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.get("b") == "b"
@@ -0,0 +1,84 @@
+import threading
+import pytest
+from types import SimpleNamespace
+from agents.base_agent import BaseAgent
+from core.utils.tool_scheduler import ToolScheduler
+from core.memory_tools.conversation_memory import ConversationMemory
+
+ADD = '{"tool": "add_nums", "arguments": {"a": "2", "b": "3"}}'
+ADD_ONE = '{"tool": "add_nums", "arguments": {"a": "1", "b": "1"}}'
+
+class FakeStreamingProvider:
+    def __init__(self, pieces):
+        self.pieces = pieces  # strings to yield, or callables run between them
+        self.closed = False
+
+    def stream_chat_completion(self, messages, model=None, **kwargs):
+        try:
+            for piece in self.pieces:
+                if callable(piece):
+                    piece()
+                else:
+                    yield piece
+        finally:
+            self.closed = True
+
+def stream_agent(tmp_path, pieces, tool_scheduler=None):
+    provider = FakeStreamingProvider(pieces)
+    root = SimpleNamespace(root_dir=str(tmp_path))
+    agent = BaseAgent(root, None, None, provider, "test_agent", tool_scheduler=tool_scheduler)
+    called = []
+    call_tool = agent.call_tool
+    agent.call_tool = lambda tool, arguments: called.append(arguments) or call_tool(tool, arguments)
+    return agent, provider, called
+
+def test_tools_run_while_the_reply_is_still_streaming(tmp_path):
+    seen = []
+    agent, provider, called = stream_agent(tmp_path, [
+        ADD[:20], ADD[20:], ", ",
+        lambda: seen.append(list(called)),
+        ADD_ONE,
+    ])
+
+    results, success = agent.run_stream("add 2 and 3, then 1 and 1")
+    assert success
+    assert results == ["The sum between 2 and 3 is: 5", "The sum between 1 and 1 is: 2"]
+    # The first call ran before the second one had been generated
+    assert seen == [[{"a": "2", "b": "3"}]]
+    assert [m["content"] for m in agent.messages] == ["add 2 and 3, then 1 and 1", f"{ADD}, {ADD_ONE}", ADD, ADD_ONE]
+
+def test_conversation_is_passed_on_in_pieces(tmp_path):
+    agent, _, called = stream_agent(tmp_path, ["CONVER", "SATION: Hi", " there!"])
+    pieces = []
+    assert agent.run_stream("hello", pieces.append) == ([" Hi there!"], False)
+    assert pieces == [" Hi", " there!"] and called == []
+
+def test_failed_stream_waits_for_dispatched_calls(tmp_path, fake_settings):
+    release = threading.Event()
+    finished = []
+
+    def fail():
+        release.set()
+        raise ConnectionError("stream dropped")
+
+    scheduler = ToolScheduler(fake_settings(), "test_agent")
+    agent, provider, _ = stream_agent(tmp_path, [ADD, ", ", fail], tool_scheduler=scheduler)
+
+    def slow_tool(tool, arguments):
+        release.wait(5)
+        finished.append(tool)
+        return "done"
+    agent.call_tool = slow_tool
+
+    with pytest.raises(ConnectionError):
+        agent.run_stream("add 2 and 3")
+    # The dispatched call is not left running, and the stream is closed
+    assert finished == ["add_nums"] and provider.closed
+
+def test_reply_follows_its_query_when_history_is_pruned(tmp_path, fake_settings):
+    agent, _, _ = stream_agent(tmp_path, [ADD])
+    agent.memory = ConversationMemory(fake_settings({"memory": {"conversation": {"max_tokens": 40}}}), "test_agent")
+    agent.messages = [{"role": "user", "content": "x" * 100}, {"role": "assistant", "content": "y" * 40}]
+
+    assert agent.run_stream("add 2 and 3") == (["The sum between 2 and 3 is: 5"], True)
+    assert [m["content"] for m in agent.messages] == ["y" * 40, "add 2 and 3", ADD, ADD]
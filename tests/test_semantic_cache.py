@@ -0,0 +1,63 @@
+from langchain.schema import Document
+from core.memory_tools.semantic_cache import SemanticQueryCache
+
+AGENT_CONF = {"memory": {"vector_db": {"query_cache": {"enabled": True, "similarity_threshold": 0.9}}}}
+
+class FakeEmbeddings:
+    vectors = {
+        "how do I build the index?": [1.0, 0.0, 0.1],
+        "how to build the index": [1.0, 0.0, 0.15],
+        "what is the weather?": [0.0, 1.0, 0.0],
+    }
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+class FakeVectorDBProvider:
+    def __init__(self):
+        self.embeddings = FakeEmbeddings()
+        self.listeners = []
+
+    def add_change_listener(self, callback):
+        self.listeners.append(callback)
+
+def answer(source):
+    return {"result": "answer", "source_documents": [Document(page_content="...", metadata={"source": source})]}
+
+def test_similar_query_hits_until_source_changes(fake_settings):
+    provider = FakeVectorDBProvider()
+    cache = SemanticQueryCache(fake_settings(AGENT_CONF), "agent", provider)
+
+    response, ticket = cache.lookup("how do I build the index?")
+    assert response is None
+    cache.store(ticket, answer("docs/ingest.md"))
+
+    assert cache.lookup("how to build the index")[0]["result"] == "answer"
+    assert cache.lookup("what is the weather?")[0] is None
+
+    for callback in provider.listeners:
+        callback({"docs/other.md"})
+    assert cache.lookup("how to build the index")[0] is not None
+    for callback in provider.listeners:
+        callback({"docs/ingest.md"})
+    assert cache.lookup("how to build the index")[0] is None
+
+def test_answer_is_not_stored_if_documents_changed_meanwhile(fake_settings):
+    provider = FakeVectorDBProvider()
+    cache = SemanticQueryCache(fake_settings(AGENT_CONF), "agent", provider)
+    _, ticket = cache.lookup("how do I build the index?")
+    cache.invalidate({"docs/ingest.md"})
+    cache.store(ticket, answer("docs/ingest.md"))
+    assert cache.stats()["entries"] == 0
+
+def test_exact_lookup_never_embeds(fake_settings):
+    provider = FakeVectorDBProvider()
+    cache = SemanticQueryCache(fake_settings(AGENT_CONF), "agent", provider)
+
+    response, ticket = cache.lookup("load_agent_config", exact=True)
+    assert response is None
+    cache.store(ticket, answer("settings_loader.py"))
+    assert cache.lookup("load_agent_config", exact=True)[0]["result"] == "answer"
+    assert cache.lookup("load_agent_conf", exact=True)[0] is None
+    # Exact entries have no embedding and are skipped by similarity lookups
+    assert cache.lookup("how to build the index")[0] is None
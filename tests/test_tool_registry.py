@@ -0,0 +1,70 @@
+import json
+import pytest
+from types import SimpleNamespace
+from agents.base_agent import BaseAgent
+from core.utils.tool_registry import ToolRegistry, ToolArgumentError
+
+def resize(path: str, width: int, keep_ratio: bool = True) -> str:
+    """
+    Resize an image.
+
+    Arguments:
+        path (string): Image to resize.
+        width (int): New width in pixels.
+    """
+    return f"{path} {width} {keep_ratio}"
+
+def test_compiled_schema_and_binder():
+    registry = ToolRegistry([resize])
+    function = registry.definitions()[0]["function"]
+    assert function["description"] == "Resize an image."
+    assert function["parameters"] == {
+        "type": "object",
+        "properties": {
+            "path": {"type": "string", "description": "Image to resize."},
+            "width": {"type": "integer", "description": "New width in pixels."},
+            "keep_ratio": {"type": "boolean"},
+        },
+        "required": ["path", "width"],
+    }
+    assert registry.call("resize", {"width": "640", "path": "a.png", "keep_ratio": "false"}) == "a.png 640 False"
+    assert registry.call("resize", {"path": "a.png", "width": 10, "extra": 1}) == "a.png 10 True"
+
+    with pytest.raises(ToolArgumentError):
+        registry.call("resize", {"path": "a.png"})
+    with pytest.raises(ToolArgumentError):
+        registry.call("resize", {"path": "a.png", "width": "wide"})
+
+class FakeCompletionProvider:
+    def __init__(self, message):
+        self.message = message
+        self.requests = []
+
+    def chat_completion(self, messages, tools=None, **kwargs):
+        self.requests.append(tools)
+        return SimpleNamespace(choices=[SimpleNamespace(message=self.message)])
+
+def tool_call(name, arguments):
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+def native_agent(tmp_path, message):
+    provider = FakeCompletionProvider(message)
+    root = SimpleNamespace(root_dir=str(tmp_path))
+    return BaseAgent(root, None, None, provider, "test_agent", tool_mode="native"), provider
+
+def test_native_mode_reads_tool_calls(tmp_path):
+    message = SimpleNamespace(content=None, tool_calls=[
+        tool_call("add_nums", {"a": "2", "b": "3"}),
+        tool_call("get_weather", {"city": "Paris", "country": "France"}),
+    ])
+    agent, provider = native_agent(tmp_path, message)
+
+    results, success = agent.run("add 2 and 3, and what's the weather in Paris?")
+    assert success
+    assert results[0] == "The sum between 2 and 3 is: 5"
+    assert results[1].startswith("The weather in Paris, France")
+    assert [tool["function"]["name"] for tool in provider.requests[0]] == [tool.__name__ for tool in agent.tools]
+
+def test_native_mode_conversation(tmp_path):
+    agent, _ = native_agent(tmp_path, SimpleNamespace(content="Hi there!", tool_calls=None))
+    assert agent.run("hello") == (["Hi there!"], False)
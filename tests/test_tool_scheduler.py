@@ -0,0 +1,81 @@
+import threading
+import time
+import pytest
+from core.utils.tool_scheduler import ToolScheduler
+
+@pytest.fixture
+def scheduler(fake_settings):
+    return ToolScheduler(fake_settings({"tools": {"max_workers": 4}}), "test_agent")
+
+def test_path_dependencies(scheduler):
+    mkdir = ("create_directory", {"relative_path": "scripts"})
+    create = ("create_document", {"filename": "scripts/hello.py"})
+    other = ("create_document", {"filename": "notes.txt"})
+    rag = ("query_rag", {"query": "hello"})
+
+    assert scheduler.depends_on(mkdir, create)
+    assert not scheduler.depends_on(mkdir, other)
+    assert not scheduler.depends_on(("add_nums", {"a": "1", "b": "2"}), create)
+    assert scheduler.depends_on(create, rag)
+
+def test_independent_calls_run_concurrently_in_order(scheduler):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def execute(tool, arguments):
+        barrier.wait()
+        return arguments["filename"]
+
+    calls = [("create_document", {"filename": f"file_{i}.txt"}) for i in range(3)]
+    assert scheduler.run(calls, execute) == ["file_0.txt", "file_1.txt", "file_2.txt"]
+
+def test_dependent_call_waits(scheduler):
+    finished = []
+
+    def execute(tool, arguments):
+        if tool == "create_directory":
+            time.sleep(0.05)
+        finished.append(tool)
+        return tool
+
+    calls = [
+        ("create_directory", {"relative_path": "scripts"}),
+        ("create_document", {"filename": "scripts/hello.py"}),
+    ]
+    assert scheduler.run(calls, execute) == ["create_directory", "create_document"]
+    assert finished == ["create_directory", "create_document"]
+
+def test_failure_propagates(scheduler):
+    def execute(tool, arguments):
+        if tool == "create_directory":
+            raise ValueError("boom")
+        return tool
+
+    calls = [
+        ("create_directory", {"relative_path": "scripts"}),
+        ("create_document", {"filename": "scripts/hello.py"}),
+    ]
+    with pytest.raises(ValueError):
+        scheduler.run(calls, execute)
+
+def test_failure_only_fails_dependents_and_waits_for_all(scheduler):
+    finished = []
+
+    def execute(tool, arguments):
+        if tool == "create_directory":
+            raise ValueError("boom")
+        time.sleep(0.05)
+        finished.append(arguments["filename"])
+        return tool
+
+    batch = scheduler.start(execute)
+    batch.submit("create_directory", {"relative_path": "scripts"})
+    time.sleep(0.02)  # the failed call is already done when its dependent is submitted
+    dependent = batch.submit("create_document", {"filename": "scripts/hello.py"})
+    independent = batch.submit("create_document", {"filename": "notes.txt"})
+
+    with pytest.raises(ValueError):
+        batch.results()
+    # results() returned only after the independent call finished
+    assert finished == ["notes.txt"]
+    assert batch.futures[independent].result() == "create_document"
+    assert isinstance(batch.futures[dependent].exception(), ValueError)
@@ -0,0 +1,41 @@
+import json
+from types import SimpleNamespace
+from core.utils.tracing import Tracer, NULL_SPAN
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    assert tracer.span("chat_completion") is NULL_SPAN
+    with tracer.span("chat_completion"):
+        tracer.record_usage("model", SimpleNamespace(prompt_tokens=10, completion_tokens=2))
+    assert tracer.stats() == {"enabled": False, "stages": {}, "tokens": {}}
+
+def test_spans_nest_and_export(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer()
+    tracer.configure({"enabled": True, "jsonl_path": str(path)})
+
+    with tracer.span("agent_run"):
+        with tracer.span("chat_completion", model="small"):
+            tracer.record_usage("small", SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+        try:
+            with tracer.span("tool.add_nums"):
+                raise ValueError("bad arguments")
+        except ValueError:
+            pass
+
+    spans = {s["name"]: s for s in map(json.loads, path.read_text().splitlines())}
+    root = spans["agent_run"]
+    assert root["parent_id"] is None
+    assert spans["chat_completion"]["parent_id"] == root["span_id"]
+    assert spans["chat_completion"]["attrs"] == {"model": "small", "prompt_tokens": 120, "completion_tokens": 30}
+    assert spans["tool.add_nums"]["trace_id"] == root["trace_id"]
+    assert spans["tool.add_nums"]["attrs"]["error"] == "ValueError"
+
+    stats = tracer.stats()
+    assert stats["tokens"] == {"small": {"requests": 1, "prompt": 120, "completion": 30}}
+    assert stats["stages"]["tool.add_nums"]["errors"] == 1
+
+    metrics = tracer.render_prometheus()
+    assert 'agent_stage_seconds_count{stage="agent_run"} 1' in metrics
+    assert 'agent_stage_seconds_bucket{stage="chat_completion",le="+Inf"} 1' in metrics
+    assert 'llm_tokens_total{model="small",kind="prompt"} 120' in metrics
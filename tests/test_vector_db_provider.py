@@ -0,0 +1,169 @@
+import time
+import pytest
+from types import SimpleNamespace
+from agents.base_agent import BaseAgent
+from core.db_tools.index_watcher import IndexWatcher
+from core.db_tools.vector_db_provider import VectorDBProvider
+
+class FakeDB:
+    """Chroma stand-in holding chunks per source; add_documents fails while `down` is set."""
+
+    def __init__(self):
+        self.chunks = {}
+        self.deletes = []
+        self.adds = []
+        self.down = False
+
+    def delete(self, where):
+        paths = where["source"]["$in"]
+        self.deletes.append(sorted(paths))
+        for path in paths:
+            self.chunks.pop(path, None)
+
+    def get(self, include=None):
+        metadatas = [{"source": path} for path, texts in self.chunks.items() for _ in texts]
+        return {"documents": [text for texts in self.chunks.values() for text in texts], "metadatas": metadatas}
+
+    def add_documents(self, chunks):
+        if self.down:
+            raise ConnectionError("embedding backend unavailable")
+        self.adds.append(len(chunks))
+        for chunk in chunks:
+            self.chunks.setdefault(chunk.metadata["source"], []).append(chunk.page_content)
+
+@pytest.fixture
+def make_provider(tmp_path, fake_settings):
+    def make(**write_behind):
+        root = tmp_path / "project"
+        root.mkdir()
+        settings = fake_settings({
+            "project_root": str(root),
+            "memory": {"vector_db": {
+                "persist_directory": str(tmp_path / "db"),
+                "chunk_size": 200,
+                "chunk_overlap": 0,
+                "hybrid": {"enabled": False},
+                "write_behind": write_behind or {"enabled": False},
+            }},
+        })
+        provider = VectorDBProvider(settings, "agent", None)
+        provider.db = FakeDB()
+        return provider, root
+    return make
+
+def test_flush_batches_queued_writes(make_provider):
+    provider, root = make_provider(enabled=True, flush_interval_seconds=60)
+    paths = []
+    for name in "abc":
+        path = root / f"{name}.txt"
+        path.write_text(f"contents of {name}")
+        paths.append(str(path))
+        provider.upsert_file(str(path))
+    provider.upsert_file(paths[0])  # coalesced with the first write
+
+    assert provider.db.adds == []
+    assert provider.flush() == 3
+    assert provider.db.deletes == [sorted(paths)]
+    assert provider.db.adds == [3]
+    assert set(provider.manifest) == set(paths)
+
+def test_background_flush_on_max_batch(make_provider):
+    provider, root = make_provider(enabled=True, max_batch=2, flush_interval_seconds=60)
+    for name in "ab":
+        path = root / f"{name}.txt"
+        path.write_text(name)
+        provider.upsert_file(str(path))
+
+    deadline = time.monotonic() + 5
+    while provider.db.adds != [2] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert provider.db.adds == [2]
+    assert not provider.pending_writes
+
+def test_failed_flush_keeps_writes_queued(make_provider):
+    provider, root = make_provider(enabled=True, flush_interval_seconds=60)
+    a, b = root / "a.txt", root / "b.txt"
+    a.write_text("old a")
+    b.write_text("b")
+    provider.upsert_file(str(a))
+    provider.upsert_file(str(b))
+
+    provider.db.down = True
+    with pytest.raises(ConnectionError):
+        provider.flush()
+    assert list(provider.pending_writes) == [str(a), str(b)]
+    assert provider.manifest == {}
+
+    # A newer write to the same file wins over the requeued one
+    provider.delete_file(str(a))
+    assert provider.pending_writes[str(a)] == "delete"
+
+    provider.db.down = False
+    assert provider.flush() == 2
+    assert provider.db.chunks == {str(b): ["b"]}
+    assert set(provider.manifest) == {str(b)}
+
+def test_plan_sync_compares_with_manifest(make_provider):
+    provider, root = make_provider()
+    same, touched, edited, gone = (root / f"{name}.txt" for name in ("same", "touched", "edited", "gone"))
+    for path in (same, touched, edited, gone):
+        path.write_text(path.name)
+        provider.manifest[str(path)] = provider.file_record(str(path))
+    gone.unlink()
+    touched.write_text("touched.txt")  # same content, new mtime
+    provider.manifest[str(touched)]["mtime"] -= 10
+    edited.write_text("new contents")
+    new = root / "new.txt"
+    new.write_text("new")
+
+    plan = provider.plan_sync(str(root))
+    assert sorted((path, previous is not None) for path, _, previous in plan["changed"]) == [
+        (str(edited), True), (str(new), False),
+    ]
+    assert plan["removed"] == [str(gone)]
+    assert plan["skipped"] == 2
+
+def test_first_sync_without_manifest_replaces_existing_vectors(make_provider):
+    provider, root = make_provider()
+    path = root / "a.txt"
+    path.write_text("contents")
+    # Vectors stored by an earlier build that left no manifest behind
+    provider.db.chunks[str(path)] = ["contents"]
+
+    assert provider.sync(str(root))["added"] == 1
+    assert provider.db.chunks == {str(path): ["contents"]}
+    assert provider.sync(str(root))["skipped"] == 1
+
+def test_lexical_index_is_backfilled_for_a_db_without_manifest(make_provider):
+    provider, root = make_provider()
+    provider.hybrid = True
+    # Stored by a version that kept neither a manifest nor a lexical index
+    provider.db.chunks = {str(root / "settings_loader.py"): ["def load_agent_config(self, name): ..."]}
+    assert not provider.manifest
+
+    hits = provider.get_lexical_index().search("load_agent_config")
+    assert [doc.metadata["source"] for doc, _, _ in hits] == [str(root / "settings_loader.py")]
+
+class FakeCompletionProvider:
+    def __init__(self, content):
+        self.content = content
+
+    def chat_completion(self, messages, **kwargs):
+        message = SimpleNamespace(content=self.content, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def test_agent_writes_are_readable_while_the_watcher_debounces(make_provider):
+    provider, root = make_provider(enabled=True, flush_interval_seconds=60)
+    (root / "notes.txt").write_text("old contents")
+    provider.index_watcher = IndexWatcher(provider, str(root), debounce_seconds=60, sync_on_start=False)
+    provider.index_watcher.start()
+    agent = BaseAgent(SimpleNamespace(root_dir=str(root)), provider, None, FakeCompletionProvider("new contents"), "agent")
+    try:
+        agent.modify_document("notes.txt")
+        # What query_rag does before retrieving: the write is visible without waiting for the watcher
+        provider.flush()
+        assert provider.db.chunks[str(root / "notes.txt")] == ["new contents"]
+    finally:
+        provider.stop_watching()
+    # The watcher's own event for the write finds the file already indexed
+    assert provider.db.adds == [1]